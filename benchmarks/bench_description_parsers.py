@@ -0,0 +1,98 @@
+"""
+Compares the speed and output of the description extraction backends.
+
+Each page of the parity corpus (tests/fixtures/descriptions) is inflated to the
+size of a real Printables model page by adding a large inline state script in
+<head> and comment/related-model markup after the description.
+
+Usage:
+    python benchmarks/bench_description_parsers.py [--iterations N] [--json]
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import printables_api
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "descriptions")
+
+
+def inflate_page(html: str, script_kb: int = 600, trailing_items: int = 400) -> str:
+    """
+    Pads a fixture page to real-page size with a state script and trailing markup.
+    """
+    state = {"models": [{"id": str(i), "name": f"Model {i}", "html": "<div class=\"card\"><p>card</p></div>"} for i in range(script_kb * 10)]}
+    script = f"<script>window.__STATE__ = {json.dumps(state)};</script>"
+    trailing = "".join(
+        f'<div class="comment"><div class="author"><a href="/@user{i}">user{i}</a></div><p>Comment {i} with <b>markup</b>.</p></div>'
+        for i in range(trailing_items)
+    )
+    html = html.replace("</head>", script + "</head>", 1) if "</head>" in html else script + html
+    return html.replace("</body>", trailing + "</body>", 1) if "</body>" in html else html + trailing
+
+
+def load_corpus():
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, encoding="utf-8", newline="") as f:
+            pages[os.path.basename(path)] = inflate_page(f.read())
+    return pages
+
+
+def available_parsers():
+    parsers = []
+    for name in printables_api.DESCRIPTION_PARSERS:
+        try:
+            printables_api.extract_description("<div class='user-inserted'><p>x</p></div>", name)
+        except Exception:
+            continue
+        parsers.append(name)
+    return parsers
+
+
+def run(iterations: int):
+    pages = load_corpus()
+    results = []
+    for name, html in pages.items():
+        reference = printables_api.extract_description(html, "html.parser")
+        for parser in available_parsers():
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                output = printables_api.extract_description(html, parser)
+                timings.append(time.perf_counter() - start)
+            if parser == "lxml" and reference is not None:
+                matches = output == reference.replace("\r", "")
+            else:
+                matches = output == reference
+            results.append({
+                "page": name,
+                "page_bytes": len(html.encode("utf-8")),
+                "parser": parser,
+                "mean_ms": statistics.mean(timings) * 1000,
+                "min_ms": min(timings) * 1000,
+                "matches_reference": matches,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark description extraction backends.")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="Timed runs per page and backend (default: 5).")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'page':<20} {'KB':>6} {'parser':<12} {'mean ms':>9} {'min ms':>9}  parity")
+        for row in results:
+            print(f"{row['page']:<20} {row['page_bytes'] // 1024:>6} {row['parser']:<12} "
+                  f"{row['mean_ms']:>9.2f} {row['min_ms']:>9.2f}  {'ok' if row['matches_reference'] else 'MISMATCH'}")
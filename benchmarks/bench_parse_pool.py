@@ -0,0 +1,98 @@
+"""
+Measures description parsing throughput with and without the process pool.
+
+Pages of the parity corpus are inflated to real Printables page size (see
+bench_description_parsers.py) and parsed by several threads at once, the way
+concurrent description fetches parse them: first inline on the threads, then
+through printables_api.configure_parse_pool with 1, 2, 4, ... worker processes
+up to the number of cores.
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--pages 64] [--parser stream] [--max-workers N] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import printables_api
+from bench_description_parsers import load_corpus
+
+
+def throughput(pages: list, threads: int, parser: str) -> float:
+    """
+    Parses every page on a pool of threads and returns pages per second.
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda html: printables_api._parse_description(html, parser), pages))
+        return len(pages) / (time.perf_counter() - start)
+
+
+def worker_counts(max_workers: int) -> list:
+    counts = [1]
+    while counts[-1] * 2 < max_workers:
+        counts.append(counts[-1] * 2)
+    return counts + [max_workers] if max_workers > 1 else counts
+
+
+def run(page_count: int, parser: str, max_workers: int) -> dict:
+    corpus = list(load_corpus().values())
+    pages = [corpus[i % len(corpus)] for i in range(page_count)]
+    threads = max(4, max_workers)
+    rows = []
+
+    printables_api.configure_parse_pool(0)
+    for thread_count in sorted({1, threads}):
+        rows.append({"mode": "inline", "workers": 0, "threads": thread_count,
+                     "pages_per_s": round(throughput(pages, thread_count, parser), 1)})
+
+    for workers in worker_counts(max_workers):
+        start = time.perf_counter()
+        pool = printables_api.configure_parse_pool(workers, min_size=0)
+        throughput(pages[:workers], workers, parser)  # Start the worker processes
+        startup_ms = (time.perf_counter() - start) * 1000
+        rows.append({"mode": "process pool", "workers": workers, "threads": threads,
+                     "pages_per_s": round(throughput(pages, threads, parser), 1),
+                     "startup_ms": round(startup_ms, 1)})
+        assert pool.stats()["failures"] == 0
+    printables_api.configure_parse_pool(0)
+
+    baseline = rows[0]["pages_per_s"]
+    for row in rows:
+        row["speedup"] = round(row["pages_per_s"] / baseline, 2)
+    return {
+        "pages": page_count,
+        "mean_page_kb": round(sum(len(html) for html in pages) / len(pages) / 1024),
+        "parser": parser,
+        "cpu_count": os.cpu_count(),
+        "results": rows,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark description parsing throughput across processes.")
+    parser.add_argument("-n", "--pages", type=int, default=64, help="Number of pages parsed per measurement (default: 64).")
+    parser.add_argument("--parser", type=str, default=printables_api.DEFAULT_DESCRIPTION_PARSER,
+                        choices=sorted(printables_api.DESCRIPTION_PARSERS),
+                        help=f"Description extraction backend (default: {printables_api.DEFAULT_DESCRIPTION_PARSER}).")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1,
+                        help="Largest number of worker processes measured (default: number of cores).")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    args = parser.parse_args()
+
+    report = run(args.pages, args.parser, args.max_workers)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['pages']} pages of ~{report['mean_page_kb']} KB, parser {report['parser']}, "
+              f"{report['cpu_count']} cores")
+        print(f"{'mode':<14} {'workers':>8} {'threads':>8} {'pages/s':>10} {'speedup':>8} {'startup ms':>11}")
+        for row in report["results"]:
+            startup = f"{row['startup_ms']:>11.1f}" if "startup_ms" in row else f"{'':>11}"
+            print(f"{row['mode']:<14} {row['workers']:>8} {row['threads']:>8} {row['pages_per_s']:>10.1f} "
+                  f"{row['speedup']:>8.2f} {startup}")
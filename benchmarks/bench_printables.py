@@ -0,0 +1,203 @@
+"""
+Measures latency and throughput of printables_api and the MCP server against a local stand-in server.
+
+Starts benchmarks/fake_printables.py in-process, points printables_api at it and
+times search_models, get_model_files (for several file counts),
+get_model_description (real-size pages) and, unless --skip-mcp is given, MCP tool
+calls over stdio against a server subprocess. Client-side rate limits are lifted
+unless --keep-limits is given, so the numbers reflect the code rather than the pacing.
+
+Usage:
+    python benchmarks/bench_printables.py [--calls N] [--concurrency C] [--latency-ms 20] [--jitter-ms 5]
+                                          [--error-rate 0.0] [--throttle-rate 0.0] [--files 1,10,50,200]
+                                          [--skip-mcp] [--keep-limits] [--json] [--output FILE]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import printables_api
+from fake_printables import FakeConfig, FakePrintablesServer
+
+SERVER_SCRIPT = os.path.join(ROOT, "mcp", "printables_mcp_server.py")
+UNLIMITED = 1_000_000
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(scenario: str, latencies: list, errors: int, wall: float, concurrency: int, **extra) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "scenario": scenario,
+        **extra,
+        "calls": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_per_s": round(len(latencies) / wall, 2) if wall else 0.0,
+        "mean_ms": round(statistics.mean(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+    }
+
+
+def measure(scenario: str, call, calls: int, concurrency: int, is_error, **extra) -> dict:
+    """
+    Runs call(i) for i in range(calls) on concurrency threads and summarizes the timings.
+    """
+    def timed(i):
+        start = time.perf_counter()
+        try:
+            failed = is_error(call(i))
+        except Exception:
+            failed = True
+        return time.perf_counter() - start, failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(timed, range(calls)))
+    wall = time.perf_counter() - start
+    return summarize(scenario, [t for t, _ in outcomes], sum(failed for _, failed in outcomes), wall, concurrency, **extra)
+
+
+def run_api(server: FakePrintablesServer, calls: int, concurrency: int, file_counts: list) -> list:
+    results = [measure(
+        "search_models", lambda i: printables_api.search_models(f"query {i}", 20), calls, concurrency,
+        lambda result: not result,
+    )]
+    for count in file_counts:
+        def files_call(i, count=count):
+            printables_api.download_link_cache.clear()
+            return printables_api.get_model_files(str(count))
+        results.append(measure(
+            "get_model_files", files_call, calls, concurrency,
+            lambda result, count=count: len(result) != count or not all(f["download_url"] for f in result),
+            files=count,
+        ))
+    results.append(measure(
+        "get_model_description", lambda i: printables_api.get_model_description(server.model_url(i + 1)),
+        calls, concurrency, lambda result: not result or result.startswith("Error:"),
+    ))
+    return results
+
+
+async def run_mcp(server: FakePrintablesServer, calls: int, concurrency: int, keep_limits: bool) -> list:
+    """
+    Times tool calls through a real MCP client session talking to the server over stdio.
+    """
+    from mcp import ClientSession, StdioServerParameters
+    from mcp.client.stdio import stdio_client
+
+    env = {**os.environ, "PRINTABLES_API_URL": server.api_url}
+    if not keep_limits:
+        env.update({"PRINTABLES_API_RATE": str(UNLIMITED), "PRINTABLES_API_MIN_RATE": str(UNLIMITED),
+                    "PRINTABLES_API_MAX_RATE": str(UNLIMITED), "PRINTABLES_LINK_RATE": str(UNLIMITED)})
+    params = StdioServerParameters(command=sys.executable, args=[SERVER_SCRIPT], env=env)
+
+    scenarios = [
+        ("mcp:search_printables", lambda i: ("search_printables", {"search_term": f"query {i}", "limit": 20})),
+        # Fresh model IDs with 10 files each, so every call mints links
+        ("mcp:get_printables_files", lambda i: ("get_printables_files", {"model_id": str((i + 1) * 1000 + 10)})),
+        ("mcp:get_printables_description", lambda i: ("get_printables_description", {"model_url": server.model_url(i + 1)})),
+    ]
+    results = []
+    async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for scenario, make_call in scenarios:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def timed(i):
+                    name, arguments = make_call(i)
+                    async with semaphore:
+                        start = time.perf_counter()
+                        try:
+                            result = await session.call_tool(name, arguments)
+                            failed = result.isError
+                        except Exception:
+                            failed = True
+                        return time.perf_counter() - start, failed
+
+                start = time.perf_counter()
+                outcomes = await asyncio.gather(*(timed(i) for i in range(calls)))
+                wall = time.perf_counter() - start
+                results.append(summarize(scenario, [t for t, _ in outcomes], sum(f for _, f in outcomes), wall, concurrency))
+    return results
+
+
+def run(args) -> dict:
+    config = FakeConfig(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate, args.throttle_rate, seed=args.seed)
+    with FakePrintablesServer(config) as server:
+        printables_api.configure_client(api_url=server.api_url, pool_size=max(10, args.concurrency))
+        printables_api.configure_persistent_cache(None)
+        if not args.keep_limits:
+            printables_api.configure_upstream("127.0.0.1", rate=UNLIMITED, burst=UNLIMITED,
+                                              min_rate=UNLIMITED, max_rate=UNLIMITED)
+            printables_api.download_link_limiter = printables_api.RateLimiter(rate=UNLIMITED, burst=UNLIMITED)
+
+        results = run_api(server, args.calls, args.concurrency, args.files)
+        if not args.skip_mcp:
+            results += asyncio.run(run_mcp(server, args.calls, args.concurrency, args.keep_limits))
+        printables_api.close_client()
+
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {
+                "calls": args.calls, "concurrency": args.concurrency, "latency_ms": args.latency_ms,
+                "jitter_ms": args.jitter_ms, "error_rate": args.error_rate, "throttle_rate": args.throttle_rate,
+                "keep_limits": args.keep_limits,
+            },
+            "server": {"requests": config.requests, "errors": config.errors, "throttled": config.throttled},
+            "results": results,
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark printables_api and the MCP server against a local fake server.")
+    parser.add_argument("-n", "--calls", type=int, default=50, help="Calls per scenario (default: 50).")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Calls in flight at the same time (default: 4).")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mean fake server delay (default: 20).")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="Uniform jitter around the delay (default: 5).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of responses that are 500 errors (default: 0).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of responses that are 429 (default: 0).")
+    parser.add_argument("--files", type=lambda value: [int(v) for v in value.split(",")], default=[1, 10, 50, 200],
+                        help="Comma-separated file counts for get_model_files (default: 1,10,50,200).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the fake server's jitter and failures.")
+    parser.add_argument("--skip-mcp", action="store_true", help="Skip the MCP-over-stdio scenarios.")
+    parser.add_argument("--keep-limits", action="store_true", help="Keep the default client-side rate limits.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'scenario':<32} {'calls':>5} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for row in report["results"]:
+            name = row["scenario"] + (f" ({row['files']} files)" if "files" in row else "")
+            print(f"{name:<32} {row['calls']:>5} {row['errors']:>4} {row['throughput_per_s']:>8.1f} "
+                  f"{row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}")
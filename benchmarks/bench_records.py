@@ -0,0 +1,133 @@
+"""
+Compares the typed model records of printables_records with the plain dicts the CLI used to build.
+
+Builds N synthetic models (search result, description, file list) both ways and
+measures build time, memory held by the built records, and serialization time and
+size of the CLI results file (indented and --compact) and of the JSONL lines.
+
+Usage:
+    python benchmarks/bench_records.py [--models 5000] [--repeat 5] [--json]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import printables_records
+from printables_records import ModelDetails, dumps
+
+
+def synthetic_models(count: int, files_per_model: int = 4):
+    models = []
+    for i in range(count):
+        search_result = {
+            "id": str(100000 + i), "name": f"Model {i} — vase", "slug": f"model-{i}-vase",
+            "ratingAvg": 4.5, "likesCount": i * 3, "downloadCount": i * 11, "datePublished": "2024-05-01T12:00:00Z",
+            "user": {"publicUsername": f"maker{i % 97}"}, "image": {"filePath": f"media/prints/{i}/image.png"},
+        }
+        description = f"Model {i} description. " * 20
+        files = [{"file_id": str(i * 10 + j), "name": f"part_{j}.stl", "download_url": f"https://files.printables.com/{i}/{j}?sig=abcdef",
+                  "size_bytes": 123456 + j, "file_type": "stl"} for j in range(files_per_model)]
+        models.append((search_result, description, files))
+    return models
+
+
+def build_dict(model: dict, description: str, files: list) -> dict:
+    """
+    The record dictionary build_model_record returned before the typed records.
+    """
+    main_image_url = None
+    if (image_info := model.get('image')) and image_info.get('filePath'):
+        main_image_url = "https://media.printables.com/" + image_info['filePath']
+    return {
+        "name": model.get('name'),
+        "url": f"https://www.printables.com/model/{model['id']}-{model.get('slug')}",
+        "main_image_url": main_image_url,
+        "author": model.get('user', {}).get('publicUsername'),
+        "stats": {
+            "likes": model.get('likesCount'),
+            "downloads": model.get('downloadCount'),
+            "rating": model.get('ratingAvg'),
+            "published_date": model.get('datePublished')
+        },
+        "description": description,
+        "files": [dict(entry) for entry in files],
+    }
+
+
+def build_record(model: dict, description: str, files: list) -> ModelDetails:
+    return ModelDetails.from_api(model, description, files)
+
+
+def best_of(repeat: int, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def measure_build(models, build):
+    """
+    Returns the bytes still allocated after building every record (the records themselves).
+    """
+    tracemalloc.start()
+    built = {model["id"]: build(model, description, files) for model, description, files in models}
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return size
+
+
+def run(model_count: int, repeat: int) -> dict:
+    models = synthetic_models(model_count)
+    paths = {
+        "dict + json": {
+            "build": build_dict,
+            "file": lambda data: json.dumps(data, ensure_ascii=False, indent=4),
+            "compact": lambda data: json.dumps(data, ensure_ascii=False, separators=(",", ":")),
+            "jsonl": lambda data: "\n".join(json.dumps({"id": model_id, **record}, ensure_ascii=False)
+                                            for model_id, record in data.items()),
+        },
+        "records + dumps": {
+            "build": build_record,
+            "file": lambda data: dumps(data, indent=True),
+            "compact": lambda data: dumps(data),
+            "jsonl": lambda data: "\n".join(dumps(record) for record in data.values()),
+        },
+    }
+    results = {}
+    for name, path in paths.items():
+        build = path["build"]
+        build_seconds, data = best_of(repeat, lambda: {model["id"]: build(model, description, files)
+                                                        for model, description, files in models})
+        row = {"build_ms": round(build_seconds * 1000, 1), "memory_kb": round(measure_build(models, build) / 1024)}
+        for output in ("file", "compact", "jsonl"):
+            seconds, text = best_of(repeat, lambda: path[output](data))
+            row[f"{output}_ms"] = round(seconds * 1000, 1)
+            row[f"{output}_kb"] = round(len(text.encode("utf-8")) / 1024)
+        results[name] = row
+    return {"models": model_count, "orjson": printables_records.orjson is not None, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark typed model records against plain dicts.")
+    parser.add_argument("-n", "--models", type=int, default=5000, help="Number of synthetic models (default: 5000).")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Repetitions; the fastest is reported (default: 5).")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    args = parser.parse_args()
+
+    report = run(args.models, args.repeat)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['models']} models, orjson {'installed' if report['orjson'] else 'not installed'}")
+        columns = ("build_ms", "memory_kb", "file_ms", "file_kb", "compact_ms", "compact_kb", "jsonl_ms")
+        print(f"{'path':<18}" + "".join(f"{column:>12}" for column in columns))
+        for name, row in report["results"].items():
+            print(f"{name:<18}" + "".join(f"{row[column]:>12}" for column in columns))
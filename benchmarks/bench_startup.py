@@ -0,0 +1,144 @@
+"""
+Measures how long the MCP server takes to start, and which imports that time goes to.
+
+Spawns the server over stdio the way an MCP client does, sends an initialize
+request and times the response (cold start as seen by the user), then runs
+`python -X importtime` on the server module and lists the slowest imports.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--top 15] [--script] [--json] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIM_SCRIPT = os.path.join(ROOT, "mcp", "printables_mcp_server.py")
+# Imports deferred until a tool needs them; reported so regressions show up
+DEFERRED_MODULES = ("cloudscraper", "bs4", "lxml")
+
+
+def initialize_request() -> bytes:
+    from mcp.types import LATEST_PROTOCOL_VERSION
+    request = {
+        "jsonrpc": "2.0", "id": 1, "method": "initialize",
+        "params": {"protocolVersion": LATEST_PROTOCOL_VERSION, "capabilities": {},
+                   "clientInfo": {"name": "bench-startup", "version": "0"}},
+    }
+    return (json.dumps(request) + "\n").encode("utf-8")
+
+
+def time_to_initialize(command: list) -> float:
+    """
+    Starts the server and returns the seconds until its initialize response arrives.
+    """
+    request = initialize_request()
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    try:
+        process.stdin.write(request)
+        process.stdin.flush()
+        line = process.stdout.readline()
+        elapsed = time.perf_counter() - start
+        if not line or json.loads(line).get("id") != 1:
+            raise RuntimeError(f"Unexpected initialize response: {line!r}")
+        return elapsed
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def import_breakdown(top: int) -> dict:
+    """
+    Runs `python -X importtime` on the server module.
+
+    Returns:
+        Dictionary with the total import time, the server module's own share (module-level
+        setup such as registering tools), its slowest direct imports and which deferred
+        modules were loaded anyway
+    """
+    code = f"import sys, printables_mcp_server; print(sorted(set({DEFERRED_MODULES!r}) & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    rows = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = line.replace("import time:", "|", 1).split("|")
+        if not self_us.strip().isdigit():
+            continue  # Header line
+        # Names are indented by two spaces per nesting level, after one separating space
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append({"module": name.strip(), "depth": depth, "self_ms": int(self_us) / 1000,
+                     "cumulative_ms": int(cumulative_us) / 1000})
+    # importtime lists a module after everything it imports, so the server's own imports
+    # are the depth-1 rows between the previous top-level row and the server row
+    server_index = next(index for index, row in enumerate(rows) if row["module"] == "printables_mcp_server")
+    first_child = max((index + 1 for index, row in enumerate(rows[:server_index]) if row["depth"] == 0), default=0)
+    children = sorted((row for row in rows[first_child:server_index] if row["depth"] == 1),
+                      key=lambda row: -row["cumulative_ms"])
+    server = rows[server_index]
+    return {
+        "total_ms": round(sum(row["cumulative_ms"] for row in rows if row["depth"] == 0), 1),
+        "server_module_ms": server["cumulative_ms"],
+        "server_self_ms": server["self_ms"],
+        "imports": [{key: row[key] for key in ("module", "cumulative_ms", "self_ms")} for row in children[:top]],
+        "deferred_loaded": json.loads(output.stdout.strip().replace("'", '"')),
+    }
+
+
+def run(args) -> dict:
+    command = [sys.executable, SHIM_SCRIPT] if args.script else [sys.executable, "-m", "printables_mcp_server"]
+    time_to_initialize(command)  # Warm the OS file cache and bytecode caches
+    timings = sorted(time_to_initialize(command) for _ in range(args.runs))
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "command": " ".join(os.path.relpath(part, ROOT) if part.startswith(ROOT) else part for part in command[1:]),
+        "initialize": {
+            "runs": args.runs,
+            "min_ms": round(timings[0] * 1000, 1),
+            "median_ms": round(statistics.median(timings) * 1000, 1),
+            "max_ms": round(timings[-1] * 1000, 1),
+        },
+        "imports": import_breakdown(args.top),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MCP server startup time.")
+    parser.add_argument("-n", "--runs", type=int, default=10, help="Server starts to time (default: 10).")
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports listed (default: 15).")
+    parser.add_argument("--script", action="store_true", help="Start through mcp/printables_mcp_server.py instead of the module.")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable JSON instead of a table.")
+    parser.add_argument("-o", "--output", type=str, default=None, help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        init = report["initialize"]
+        print(f"time to initialize response ({report['command']}, {init['runs']} runs): "
+              f"min {init['min_ms']} ms, median {init['median_ms']} ms, max {init['max_ms']} ms")
+        imports = report["imports"]
+        print(f"\nimport time: {imports['total_ms']} ms, of which printables_mcp_server {imports['server_module_ms']} ms "
+              f"({imports['server_self_ms']} ms module-level setup)")
+        print(f"{'imported by the server':<32} {'cumulative ms':>14} {'self ms':>8}")
+        for row in imports["imports"]:
+            print(f"{row['module']:<32} {row['cumulative_ms']:>14.1f} {row['self_ms']:>8.1f}")
+        print(f"\ndeferred modules loaded at startup: {', '.join(report['imports']['deferred_loaded']) or 'none'}")
@@ -0,0 +1,214 @@
+"""
+Local stand-in for the Printables GraphQL API and model pages, for offline benchmarks.
+
+Answers the operations printables_api sends (SearchModels, ModelSummary,
+ModelFiles, GetDownloadLink, GetDownloadLinks) with synthetic data and serves
+real-size model pages at /model/<id>-<slug>. Model <id> has <id> % 1000 STL
+files, so get_model_files can be measured for any file count (and 1010, 2010, ...
+give fresh models with the same count as 10).
+Every response can be delayed and can fail at a configurable rate.
+
+Usage:
+    python benchmarks/fake_printables.py [--port 8765] [--latency-ms 20] [--jitter-ms 5]
+                                         [--error-rate 0.0] [--throttle-rate 0.0]
+
+The GraphQL endpoint is http://127.0.0.1:<port>/graphql/.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_description_parsers import FIXTURES_DIR, inflate_page
+
+
+class FakeConfig:
+    """
+    Behaviour of the fake server; latency and jitter are in seconds, rates are probabilities per request.
+    """
+    def __init__(self, latency: float = 0.02, jitter: float = 0.005, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def roll(self):
+        """
+        Returns (delay, outcome) for one request, outcome being "ok", "error" or "throttle".
+        """
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            draw = self.random.random()
+            if draw < self.throttle_rate:
+                self.throttled += 1
+                return delay, "throttle"
+            if draw < self.throttle_rate + self.error_rate:
+                self.errors += 1
+                return delay, "error"
+            return delay, "ok"
+
+
+def fake_model(model_id) -> dict:
+    return {
+        "id": str(model_id), "name": f"Model {model_id}", "slug": f"model-{model_id}", "ratingAvg": 4.5,
+        "likesCount": int(model_id) * 3, "downloadCount": int(model_id) * 10, "datePublished": "2024-01-01T00:00:00",
+        "user": {"id": "1", "handle": "maker", "publicUsername": "maker", "__typename": "UserType"},
+        "image": {"filePath": f"media/prints/{model_id}/cover.png"}, "__typename": "PrintType",
+    }
+
+
+def fake_files(model_id) -> list:
+    count = int(model_id) % 1000 if str(model_id).isdigit() else 1
+    return [{"id": f"{model_id}{index:04d}", "name": f"part_{index}.stl", "fileSize": 1024 * (index + 1),
+             "__typename": "STLType"} for index in range(count)]
+
+
+def fake_link(file_id) -> dict:
+    return {"ok": True, "errors": None, "output": {"link": f"https://files.example.invalid/{file_id}.stl", "count": 1, "ttl": 600}}
+
+
+def graphql_response(payload: dict) -> dict:
+    operation = payload.get("operationName")
+    variables = payload.get("variables") or {}
+    if operation == "SearchModels":
+        offset = variables.get("offset") or 0
+        items = [fake_model(offset + index + 1) for index in range(variables.get("limit") or 10)]
+        return {"data": {"result": {"items": items}}}
+    if operation == "ModelSummary":
+        return {"data": {"model": fake_model(variables["id"])}}
+    if operation == "ModelFiles":
+        return {"data": {"model": {"id": variables["id"], "stls": fake_files(variables["id"]), "gcodes": [],
+                                   "slas": [], "otherFiles": []}}}
+    if operation == "GetDownloadLink":
+        return {"data": {"getDownloadLink": fake_link(variables["id"])}}
+    if operation == "GetDownloadLinks":
+        aliases = sorted(int(key[2:]) for key in variables if re.fullmatch(r"id\d+", key))
+        return {"data": {f"f{index}": fake_link(variables[f"id{index}"]) for index in aliases}}
+    return {"errors": [{"message": f"Unknown operation {operation}"}]}
+
+
+def load_page() -> bytes:
+    with open(os.path.join(FIXTURES_DIR, "nested.html"), encoding="utf-8") as f:
+        return inflate_page(f.read()).encode("utf-8")
+
+
+def make_handler(config: FakeConfig, page: bytes):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are separate writes; without this Nagle's algorithm adds ~40ms to every response
+        disable_nagle_algorithm = True
+
+        def _delay_or_fail(self) -> bool:
+            delay, outcome = config.roll()
+            time.sleep(delay)
+            if outcome == "throttle":
+                self._send(429, b'{"errors": [{"message": "Too many requests"}]}', extra={"Retry-After": str(config.retry_after)})
+                return True
+            if outcome == "error":
+                self._send(500, b'{"errors": [{"message": "Internal error"}]}')
+                return True
+            return False
+
+        def _send(self, status: int, body: bytes, content_type: str = "application/json", extra: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (extra or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if self._delay_or_fail():
+                return
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self._send(400, b'{"errors": [{"message": "Invalid JSON"}]}')
+                return
+            self._send(200, json.dumps(graphql_response(payload)).encode("utf-8"))
+
+        def do_GET(self):
+            if not self.path.startswith("/model/"):
+                self._send(404, b"Not found", "text/plain")
+                return
+            if self._delay_or_fail():
+                return
+            self._send(200, page, "text/html; charset=utf-8")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class FakePrintablesServer:
+    """
+    Runs the fake server on a background thread; use as a context manager.
+    """
+    def __init__(self, config: FakeConfig = None, port: int = 0):
+        self.config = config or FakeConfig()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), make_handler(self.config, load_page()))
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def api_url(self) -> str:
+        return self.base_url + "/graphql/"
+
+    def model_url(self, model_id) -> str:
+        return f"{self.base_url}/model/{model_id}-model-{model_id}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local stand-in Printables server.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765, 0 picks a free one).")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Mean response delay (default: 20).")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="Uniform jitter around the delay (default: 5).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500 (default: 0).")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429 (default: 0).")
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with 429 responses (default: 0).")
+    args = parser.parse_args()
+
+    server = FakePrintablesServer(FakeConfig(args.latency_ms / 1000, args.jitter_ms / 1000, args.error_rate,
+                                             args.throttle_rate, args.retry_after), args.port)
+    print(f"Fake Printables API at {server.api_url}, model pages at {server.base_url}/model/<id>-<slug>", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,295 +1,2468 @@
 import requests
-import cloudscraper
-from bs4 import BeautifulSoup, NavigableString
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 import json
+import logging
+import os
 import argparse
+import asyncio
+import contextvars
+import email.utils
+import functools
+import itertools
+import threading
 import time
+from collections import OrderedDict
+from datetime import timedelta
+from contextlib import contextmanager
+from html.parser import HTMLParser
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
 
+import printables_metrics
+from printables_cache import PersistentCache, FRESH, STALE
+from printables_records import ModelDetails, dumps
 
-def search_models(search_term: str, limit: int = 5, ordering: str = "best_match", debug: bool = False):
+
+API_URL = "https://api.printables.com/graphql/"
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"}
+# Failures are logged, not printed: on stdout they would corrupt the MCP server's stdio protocol stream.
+# Without logging configured (the CLI), warnings still reach stderr.
+logger = logging.getLogger("printables-api")
+
+
+def _translate_httpx_error(error) -> requests.exceptions.RequestException:
+    """
+    Maps an httpx error onto the requests exception hierarchy used throughout this module.
+    """
+    import httpx
+    if isinstance(error, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(error))
+    if isinstance(error, httpx.HTTPStatusError):
+        return requests.exceptions.HTTPError(str(error))
+    return requests.exceptions.ConnectionError(str(error))
+
+
+def _raise_for_status(response):
+    """
+    Raises requests.exceptions.HTTPError for error responses from either transport.
+    """
+    try:
+        response.raise_for_status()
+    except requests.exceptions.HTTPError:
+        raise
+    except Exception as e:
+        import httpx
+        if isinstance(e, httpx.HTTPStatusError):
+            raise requests.exceptions.HTTPError(str(e), response=response) from e
+        raise
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        with printables_metrics.stage("connect"):
+            super().connect()
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        with printables_metrics.stage("connect"):
+            super().connect()
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose new connections report their TCP+TLS setup time as the "connect" stage.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPConnectionPool, "https": _TimedHTTPSConnectionPool}
+
+
+class PrintablesClient:
+    """
+    Shared HTTP client for the Printables GraphQL API.
+    
+    Keeps a pool of keep-alive connections so repeated calls reuse the same
+    TCP+TLS connection instead of doing a fresh handshake per request.
+    
+    Args:
+        pool_size: Maximum number of pooled keep-alive connections
+        http2: Use HTTP/2 through httpx (requires the optional 'httpx' and 'h2' packages)
+        headers: Extra headers merged over the default headers
+        timeout: Default timeout in seconds for every request
+        api_url: GraphQL endpoint URL
+        max_retries: Extra attempts after a 429/503 response (paced by the host's adaptive limiter)
+    """
+    def __init__(self, pool_size: int = 10, http2: bool = False, headers: dict = None,
+                 timeout: float = 15, api_url: str = API_URL, max_retries: int = 2):
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.timeout = timeout
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._http2_client = None
+        self.session = None
+
+        if http2:
+            import httpx
+            self._http2_client = httpx.Client(
+                http2=True,
+                headers=self.headers,
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+            adapter = _TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+    def post_graphql(self, payload: dict, timeout: float = None) -> dict:
+        """
+        POSTs a GraphQL payload to the API and returns the decoded JSON body.
+        
+        Requests are paced by the shared limiter of the API host and refused while its
+        circuit breaker is open. 429/503 responses are retried up to max_retries times,
+        as long as the current deadline leaves time for it; the timeout shrinks to fit it.
+        Raises requests.exceptions.RequestException subclasses on failure, for both transports.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        guard = get_upstream_guard(self.api_url)
+        for attempt in range(self.max_retries + 1):
+            with printables_metrics.stage("queue"):
+                trial = guard.before_request()
+            try:
+                response = self._post(payload, budget_timeout(timeout))
+                if guard.is_throttled(response) and attempt < self.max_retries and can_retry():
+                    continue
+                _raise_for_status(response)
+                with printables_metrics.stage("parse"):
+                    data = response.json()
+            except requests.exceptions.RequestException as e:
+                error = blame_deadline(e)
+                guard.record_error(error)
+                if error is not e:
+                    raise error
+                raise
+            finally:
+                # A trial ending in a retry, a 4xx or any other exception leaves the circuit to the next request
+                if trial:
+                    guard.record_neutral()
+            guard.record_success()
+            return data
+
+    def _post(self, payload: dict, timeout: float):
+        """
+        Sends one request, adding its ttfb and body stages (and connect, if a connection was opened) to the current call.
+        """
+        if self._http2_client is None:
+            timer = printables_metrics.current_timer()
+            connect_before = timer.get("connect") if timer else 0.0
+            start = time.perf_counter()
+            response = self.session.post(self.api_url, json=payload, timeout=timeout)
+            total = time.perf_counter() - start
+            # requests measures elapsed up to the response headers; the body is read afterwards
+            if isinstance(getattr(response, 'elapsed', None), timedelta):
+                elapsed = response.elapsed.total_seconds()
+                connect = (timer.get("connect") - connect_before) if timer else 0.0
+                printables_metrics.add_stage("ttfb", elapsed - connect)
+                printables_metrics.add_stage("body", total - elapsed)
+            return response
+        import httpx
+        trace, _, apply_trace = printables_metrics.httpx_trace()
+        try:
+            response = self._http2_client.post(self.api_url, json=payload, timeout=timeout, extensions={"trace": trace})
+        except httpx.HTTPError as e:
+            raise _translate_httpx_error(e) from e
+        apply_trace()
+        return response
+
+    def close(self):
+        """
+        Closes all pooled connections. The client must not be used afterwards.
+        """
+        if self.session is not None:
+            self.session.close()
+        if self._http2_client is not None:
+            self._http2_client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class AsyncPrintablesClient:
+    """
+    Async counterpart of PrintablesClient built on httpx.AsyncClient.
+    
+    Takes the same arguments as PrintablesClient. Errors are raised as
+    requests.exceptions.RequestException subclasses so both code paths share
+    the same error handling.
+    """
+    def __init__(self, pool_size: int = 10, http2: bool = False, headers: dict = None,
+                 timeout: float = 15, api_url: str = API_URL, max_retries: int = 2):
+        import httpx
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.timeout = timeout
+        self.api_url = api_url
+        self.max_retries = max_retries
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            headers=self.headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def post_graphql(self, payload: dict, timeout: float = None) -> dict:
+        """
+        POSTs a GraphQL payload to the API and returns the decoded JSON body.
+        """
+        import httpx
+        timeout = self.timeout if timeout is None else timeout
+        guard = get_upstream_guard(self.api_url)
+        for attempt in range(self.max_retries + 1):
+            with printables_metrics.stage("queue"):
+                trial = await guard.before_request_async()
+            try:
+                _, trace, apply_trace = printables_metrics.httpx_trace()
+                try:
+                    response = await self._client.post(self.api_url, json=payload, timeout=budget_timeout(timeout),
+                                                       extensions={"trace": trace})
+                except httpx.HTTPError as e:
+                    raise _translate_httpx_error(e) from e
+                apply_trace()
+                if guard.is_throttled(response) and attempt < self.max_retries and can_retry():
+                    continue
+                _raise_for_status(response)
+                with printables_metrics.stage("parse"):
+                    data = response.json()
+            except requests.exceptions.RequestException as e:
+                error = blame_deadline(e)
+                guard.record_error(error)
+                if error is not e:
+                    raise error
+                raise
+            finally:
+                # A trial ending in a retry, a 4xx or any other exception leaves the circuit to the next request
+                if trial:
+                    guard.record_neutral()
+            guard.record_success()
+            return data
+
+    async def aclose(self):
+        """
+        Closes all pooled connections. The client must not be used afterwards.
+        """
+        await self._client.aclose()
+
+
+_client = None
+_async_client = None
+_client_settings = {}
+_client_lock = threading.Lock()
+# aclose() tasks of replaced async clients, referenced until they finish
+_closing_clients = set()
+
+
+def get_client() -> PrintablesClient:
+    """
+    Returns the shared module-level client, creating it with default settings on first use.
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PrintablesClient()
+        return _client
+
+
+def get_async_client() -> AsyncPrintablesClient:
+    """
+    Returns the shared async client, created on first use with the settings passed to configure_client().
+    """
+    global _async_client
+    with _client_lock:
+        if _async_client is None:
+            _async_client = AsyncPrintablesClient(**_client_settings)
+        return _async_client
+
+
+def configure_client(**kwargs) -> PrintablesClient:
+    """
+    Replaces the shared client with one built from the given PrintablesClient arguments.
+    The previous clients (if any) are closed, and the async client is rebuilt with the
+    same settings on its next use.
+    """
+    global _client, _async_client, _client_settings
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client_settings = dict(kwargs)
+        _client = PrintablesClient(**kwargs)
+        async_client, _async_client = _async_client, None
+    _discard_async_client(async_client)
+    return _client
+
+
+def _discard_async_client(client):
+    """
+    Closes a replaced async client, as a task on the running event loop if there is
+    one and otherwise right away.
+    """
+    if client is None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if loop is not None:
+        task = loop.create_task(client.aclose())
+        _closing_clients.add(task)
+        task.add_done_callback(_closing_clients.discard)
+        return
+    try:
+        asyncio.run(client.aclose())
+    except Exception as e:
+        # Connections opened on an event loop that has since closed cannot be shut down cleanly
+        logger.warning(f"Could not close the previous async client: {e}")
+
+
+def close_client():
+    """
+    Closes the shared client. The next call to get_client() creates a fresh one.
+    
+    The async client is only dropped here; use aclose_client() from async code to
+    close its connections as well.
+    """
+    global _client, _async_client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+        _async_client = None
+
+
+async def aclose_client():
+    """
+    Closes both the shared sync and async clients.
+    """
+    global _async_client
+    with _client_lock:
+        async_client, _async_client = _async_client, None
+    if async_client is not None:
+        await async_client.aclose()
+    close_client()
+
+
+# A request is not sent (nor retried) with less of the deadline left than this
+MIN_REQUEST_BUDGET = 0.5
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised instead of sending, retrying or waiting for a request that cannot finish before the current deadline.
+    """
+
+
+class Deadline:
+    """
+    Point in time by which a whole operation, such as one MCP tool call, has to be done.
+    
+    Args:
+        seconds: Budget from now
+    """
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+_deadline = contextvars.ContextVar("printables_deadline", default=None)
+
+
+def current_deadline():
+    """
+    Returns the Deadline of the calls running in this context, or None.
+    """
+    return _deadline.get()
+
+
+@contextmanager
+def deadline(seconds):
+    """
+    Runs the enclosed calls under a total time budget.
+    
+    Every request made meanwhile gets its timeout shrunk to the remaining budget,
+    retries and rate-limit waits that cannot finish in time are skipped, and
+    DeadlineExceeded is raised once too little is left. A nested budget never
+    extends an outer one.
+    
+    Args:
+        seconds: Budget in seconds, a Deadline to share, or None to keep the current one
+    """
+    if seconds is None:
+        yield _deadline.get()
+        return
+    budget = seconds if isinstance(seconds, Deadline) else Deadline(seconds)
+    outer = _deadline.get()
+    if outer is not None and outer.expires_at < budget.expires_at:
+        budget = outer
+    token = _deadline.set(budget)
+    try:
+        yield budget
+    finally:
+        _deadline.reset(token)
+
+
+def detach_deadline():
+    """
+    Drops the deadline of the current context, e.g. in background work started from a call that has one.
+    """
+    _deadline.set(None)
+
+
+def check_deadline():
+    """
+    Raises DeadlineExceeded if the current deadline leaves too little time for another request.
+    """
+    budget = _deadline.get()
+    if budget is not None and budget.remaining() < MIN_REQUEST_BUDGET:
+        raise DeadlineExceeded(f"Deadline of {budget.seconds:g}s reached")
+
+
+def budget_timeout(timeout: float) -> float:
+    """
+    Shrinks a per-request timeout to the remaining deadline budget.
+    
+    Raises:
+        DeadlineExceeded if too little of the budget is left to send the request
+    """
+    budget = _deadline.get()
+    if budget is None:
+        return timeout
+    check_deadline()
+    return min(timeout, budget.remaining())
+
+
+def can_retry() -> bool:
+    """
+    Tells whether the current deadline leaves time for another attempt.
+    """
+    budget = _deadline.get()
+    return budget is None or budget.remaining() >= MIN_REQUEST_BUDGET
+
+
+def _check_wait(seconds: float):
+    budget = _deadline.get()
+    if budget is not None and seconds > budget.remaining() - MIN_REQUEST_BUDGET:
+        raise DeadlineExceeded(f"Deadline of {budget.seconds:g}s reached while waiting for the rate limit")
+
+
+def blame_deadline(error: Exception) -> Exception:
+    """
+    Turns a timeout caused by a shrunken per-request timeout into DeadlineExceeded, so it does not count against the upstream.
+    """
+    if isinstance(error, requests.exceptions.Timeout) and not isinstance(error, DeadlineExceeded):
+        budget = _deadline.get()
+        if budget is not None and budget.remaining() < MIN_REQUEST_BUDGET:
+            exceeded = DeadlineExceeded(f"Deadline of {budget.seconds:g}s reached: {error}")
+            exceeded.__cause__ = error
+            return exceeded
+    return error
+
+
+def bind_deadline(func):
+    """
+    Returns func running under the current deadline, for handing it to another thread.
+    """
+    budget = _deadline.get()
+    if budget is None:
+        return func
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        with deadline(budget):
+            return func(*args, **kwargs)
+    return run
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how often callers may proceed.
+    
+    Args:
+        rate: Tokens added per second (sustained requests per second)
+        burst: Maximum number of tokens that can accumulate (short bursts allowed)
+    """
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """
+        Takes one token and returns how many seconds the caller has to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def _reserve_within_deadline(self) -> float:
+        """
+        Like _reserve, but gives the token back and raises DeadlineExceeded when the wait would overrun the current deadline.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            try:
+                _check_wait(wait)
+            except DeadlineExceeded:
+                with self._lock:
+                    self._tokens += 1
+                raise
+        return wait
+
+    def acquire(self):
+        """
+        Blocks until a token is available.
+        """
+        wait = self._reserve_within_deadline()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Waits without blocking the event loop until a token is available.
+        """
+        wait = self._reserve_within_deadline()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    Token bucket whose rate follows what the upstream tolerates.
+    
+    Each throttling response (429/503) halves the rate, down to min_rate, and a
+    Retry-After value holds every caller back until it has passed. Each success
+    raises the rate by increase, up to max_rate.
+    
+    Args:
+        rate: Starting requests per second
+        burst: Maximum number of tokens that can accumulate
+        min_rate: Lowest rate the limiter backs off to
+        max_rate: Highest rate the limiter speeds up to
+        increase: Requests per second added after each success
+        decrease: Factor applied to the rate after each throttling response
+    """
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = 0.2, max_rate: float = None,
+                 increase: float = 0.05, decrease: float = 0.5):
+        super().__init__(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate * 4
+        self.increase = increase
+        self.decrease = decrease
+        self.throttled = 0
+        self._blocked_until = 0.0
+
+    def _reserve(self) -> float:
+        wait = super()._reserve()
+        with self._lock:
+            return max(wait, self._blocked_until - time.monotonic())
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: float = None):
+        """
+        Slows down after a throttling response; retry_after (seconds) pauses every caller.
+        """
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # Drop the saved-up burst so the next caller really waits at the lower rate
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request while the upstream's circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an upstream is persistently failing.
+    
+    After failure_threshold consecutive failures the circuit opens and requests
+    are refused for reset_timeout seconds. Then a single trial request is let
+    through: success closes the circuit, failure opens it again.
+    
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        reset_timeout: Seconds the circuit stays open before a trial request
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self, name: str = "upstream") -> bool:
+        """
+        Raises CircuitOpenError if requests must not be sent right now.
+        
+        Returns:
+            True if the caller was let through as the trial request, which it must end with
+            record_success, record_failure or record_neutral
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(f"Circuit breaker open for {name}: too many recent upstream errors")
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def record_neutral(self):
+        """
+        Ends a trial request whose outcome says nothing about the upstream (e.g. a 4xx or a
+        deadline), so the next request becomes the trial instead.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def _parse_retry_after(value) -> float:
+    """
+    Converts a Retry-After header (seconds or HTTP date) to seconds, or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class UpstreamGuard:
+    """
+    Pacing and failure protection for one upstream host: an adaptive rate limiter plus a circuit breaker.
+    """
+    def __init__(self, host: str, limiter: AdaptiveRateLimiter, breaker: CircuitBreaker):
+        self.host = host
+        self.limiter = limiter
+        self.breaker = breaker
+
+    def before_request(self) -> bool:
+        """
+        Fails fast if the circuit is open, otherwise waits for a token.
+        
+        Returns:
+            True for the circuit's trial request: the caller must call record_neutral once it
+            is done, unless record_success or record_error already settled it
+        """
+        trial = self.breaker.before_request(self.host)
+        try:
+            self.limiter.acquire()
+        except BaseException:
+            if trial:
+                self.breaker.record_neutral()
+            raise
+        return trial
+
+    async def before_request_async(self) -> bool:
+        trial = self.breaker.before_request(self.host)
+        try:
+            await self.limiter.acquire_async()
+        except BaseException:
+            if trial:
+                self.breaker.record_neutral()
+            raise
+        return trial
+
+    def is_throttled(self, response) -> bool:
+        """
+        Tells whether a response asks us to slow down (429/503), adapting the limiter if so.
+        """
+        if response.status_code not in THROTTLE_STATUS_CODES:
+            return False
+        self.limiter.on_throttle(_parse_retry_after(response.headers.get('Retry-After')))
+        return True
+
+    def record_success(self):
+        self.limiter.on_success()
+        self.breaker.record_success()
+
+    def record_neutral(self):
+        self.breaker.record_neutral()
+
+    def record_error(self, error: Exception):
+        """
+        Counts network errors, 5xx and 429 responses towards the circuit breaker; other 4xx are the caller's
+        fault, and running out of a deadline is nobody's.
+        """
+        response = getattr(error, 'response', None)
+        status = getattr(response, 'status_code', None)
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)) \
+                or (isinstance(status, int) and (status >= 500 or status == 429)):
+            if not isinstance(error, (CircuitOpenError, DeadlineExceeded)):
+                self.breaker.record_failure()
+                self.limiter.on_throttle()
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.limiter.rate, 3),
+            "throttled": self.limiter.throttled,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "circuit_opened": self.breaker.opened,
+        }
+
+
+# Starting points for the shared per-host limiters; each adapts between min_rate and max_rate
+UPSTREAM_DEFAULTS = {
+    "api.printables.com": {"rate": 5, "burst": 10, "min_rate": 0.5, "max_rate": 20},
+    "www.printables.com": {"rate": 2, "burst": 4, "min_rate": 0.2, "max_rate": 5},
+}
+_FALLBACK_UPSTREAM = {"rate": 5, "burst": 10, "min_rate": 0.5, "max_rate": 20}
+_upstream_guards = {}
+_upstream_lock = threading.Lock()
+
+
+def get_upstream_guard(url: str) -> UpstreamGuard:
+    """
+    Returns the shared guard (limiter + circuit breaker) for the host of url.
+    """
+    host = urlsplit(url).hostname or url
+    with _upstream_lock:
+        guard = _upstream_guards.get(host)
+        if guard is None:
+            settings = UPSTREAM_DEFAULTS.get(host, _FALLBACK_UPSTREAM)
+            guard = UpstreamGuard(host, AdaptiveRateLimiter(**settings), CircuitBreaker())
+            _upstream_guards[host] = guard
+        return guard
+
+
+def configure_upstream(host: str, failure_threshold: int = 5, reset_timeout: float = 30, **limiter_kwargs) -> UpstreamGuard:
+    """
+    Replaces the guard for one host with new limiter (AdaptiveRateLimiter arguments) and breaker settings.
+    """
+    settings = {**UPSTREAM_DEFAULTS.get(host, _FALLBACK_UPSTREAM), **limiter_kwargs}
+    guard = UpstreamGuard(host, AdaptiveRateLimiter(**settings), CircuitBreaker(failure_threshold, reset_timeout))
+    with _upstream_lock:
+        _upstream_guards[host] = guard
+    return guard
+
+
+def reset_upstream_guards():
+    """
+    Drops all guards, so limiters and breakers start over from their defaults.
+    """
+    with _upstream_lock:
+        _upstream_guards.clear()
+
+
+def upstream_stats() -> dict:
+    """
+    Returns the current rate, throttle count and circuit state per upstream host.
+    """
+    with _upstream_lock:
+        guards = list(_upstream_guards.values())
+    return {guard.host: guard.stats() for guard in guards}
+
+
+class DownloadLinkCache:
+    """
+    Thread-safe, LRU-bounded cache of minted download links that honors their TTL.
+    
+    Entries are keyed by (model_id, file_id, file_type) and expire safety_margin
+    seconds before the TTL returned by getDownloadLink, so a cached link is never
+    handed out right before it stops working.
+    
+    Args:
+        max_entries: Maximum number of links kept; the least recently used are evicted first
+        safety_margin: Seconds subtracted from every TTL
+    """
+    def __init__(self, max_entries: int = 1024, safety_margin: float = 30):
+        self.max_entries = max_entries
+        self.safety_margin = safety_margin
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """
+        Returns the cached link for key, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            link, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return link
+
+    def put(self, key: tuple, link: str, ttl: float):
+        """
+        Stores a link for ttl seconds (minus the safety margin). Links without a usable TTL are not cached.
+        """
+        try:
+            lifetime = float(ttl) - self.safety_margin
+        except (TypeError, ValueError):
+            return
+        if lifetime <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (link, time.monotonic() + lifetime)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: tuple):
+        """
+        Drops one link, e.g. after the server refused it.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.expirations = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the current size and hit/miss/expiration/eviction counters.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+            }
+
+
+download_link_cache = DownloadLinkCache()
+
+# Pacing for getDownloadLink mutations, shared by every concurrent resolver
+DEFAULT_LINK_WORKERS = 4
+DEFAULT_LINK_BATCH_SIZE = 10
+download_link_limiter = RateLimiter(rate=4, burst=4)
+
+
+_persistent_cache = None
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def configure_persistent_cache(path: str = None, **kwargs):
+    """
+    Enables the on-disk cache for search results, file manifests and descriptions.
+    
+    Args:
+        path: SQLite file to use, or None to disable the cache
+        **kwargs: Extra PersistentCache arguments (ttls, max_bytes, stale_while_revalidate)
+    
+    Returns:
+        The new PersistentCache, or None if caching was disabled
+    """
+    global _persistent_cache
+    if _persistent_cache is not None:
+        _persistent_cache.close()
+    _persistent_cache = PersistentCache(path, **kwargs) if path else None
+    return _persistent_cache
+
+
+def get_persistent_cache():
+    """
+    Returns the active PersistentCache, or None if on-disk caching is disabled.
+    """
+    return _persistent_cache
+
+
+def _start_revalidation(namespace: str, key: str) -> bool:
+    """
+    Marks a stale entry as being refreshed. Returns False if a refresh is already running.
+    """
+    with _revalidating_lock:
+        if (namespace, key) in _revalidating:
+            return False
+        _revalidating.add((namespace, key))
+        return True
+
+
+def _finish_revalidation(namespace: str, key: str):
+    with _revalidating_lock:
+        _revalidating.discard((namespace, key))
+
+
+def _cached_call(namespace: str, key: str, loader, is_cacheable):
+    """
+    Serves loader() through the persistent cache (if enabled).
+    
+    Fresh entries are returned directly. Stale entries are returned while a background
+    thread reloads them. Only results accepted by is_cacheable are stored.
+    """
+    cache = _persistent_cache
+    if cache is None:
+        return loader()
+
+    value, state = cache.lookup(namespace, key)
+    if state == FRESH:
+        printables_metrics.set_outcome("cache_hit")
+        return value
+    if state == STALE:
+        printables_metrics.set_outcome("stale_hit")
+        if _start_revalidation(namespace, key):
+            def refresh():
+                try:
+                    fresh_value = loader()
+                    if is_cacheable(fresh_value):
+                        cache.set(namespace, key, fresh_value)
+                except Exception:
+                    pass
+                finally:
+                    _finish_revalidation(namespace, key)
+            threading.Thread(target=refresh, daemon=True).start()
+        return value
+
+    value = loader()
+    if is_cacheable(value):
+        cache.set(namespace, key, value)
+    return value
+
+
+_revalidation_tasks = set()
+
+
+async def _cached_call_async(namespace: str, key: str, loader, is_cacheable):
+    """
+    Async version of _cached_call. loader is a zero-argument coroutine function.
+    """
+    cache = _persistent_cache
+    if cache is None:
+        return await loader()
+
+    value, state = cache.lookup(namespace, key)
+    if state == FRESH:
+        printables_metrics.set_outcome("cache_hit")
+        return value
+    if state == STALE:
+        printables_metrics.set_outcome("stale_hit")
+        if _start_revalidation(namespace, key):
+            async def refresh():
+                try:
+                    fresh_value = await loader()
+                    if is_cacheable(fresh_value):
+                        cache.set(namespace, key, fresh_value)
+                except Exception:
+                    pass
+                finally:
+                    _finish_revalidation(namespace, key)
+            task = asyncio.ensure_future(refresh())
+            _revalidation_tasks.add(task)
+            task.add_done_callback(_revalidation_tasks.discard)
+        return value
+
+    value = await loader()
+    if is_cacheable(value):
+        cache.set(namespace, key, value)
+    return value
+
+
+# Model fields shared by search results and single-model summaries
+_MODEL_FRAGMENTS = """
+    fragment AvatarUser on UserType { id handle publicUsername __typename }
+    fragment Model on PrintType { 
+        id name slug ratingAvg likesCount downloadCount makesCount datePublished 
+        user { ...AvatarUser __typename } 
+        image { filePath } 
+        __typename 
+    }
+    """
+
+def _build_search_payload(search_term: str, limit: int, ordering: str, offset: int = 0) -> dict:
+    """
+    Builds the SearchModels GraphQL payload, validating the ordering.
+    """
+    query = """
+    query SearchModels($query: String!, $limit: Int, $offset: Int, $ordering: SearchChoicesEnum) {
+      result: searchPrints2(query: $query, printType: print, limit: $limit, offset: $offset, ordering: $ordering) {
+        items { ...Model __typename }
+      }
+    }
+    """ + _MODEL_FRAGMENTS
+    # Validate ordering parameter
+    valid_orderings = ["best_match", "popular", "latest", "rating", "makes_count"]
+    if ordering not in valid_orderings:
+        raise ValueError(f"Invalid ordering '{ordering}'. Must be one of: {', '.join(valid_orderings)}")
+    
+    variables = {"query": search_term, "limit": limit, "offset": offset, "ordering": ordering}
+    return {"operationName": "SearchModels", "query": query, "variables": variables}
+
+def _search_cache_key(search_term: str, limit: int, ordering: str, offset: int) -> str:
+    return f"{ordering}|{limit}|{search_term}" if not offset else f"{ordering}|{limit}|{offset}|{search_term}"
+
+def _parse_search_response(data: dict) -> list:
+    with printables_metrics.stage("process"):
+        if 'data' in data and data.get('data').get('result'):
+            return data['data']['result']['items']
+        return []
+
+@printables_metrics.tracked()
+def search_models(search_term: str, limit: int = 5, ordering: str = "best_match", debug: bool = False,
+                  offset: int = 0, raise_errors: bool = False):
+    """
+    Searches Printables.com for models using the GraphQL API.
+    
+    Args:
+        search_term: The search query
+        limit: Maximum number of results to return
+        ordering: Search ordering - one of: "best_match", "popular", "latest", "rating", "makes_count"
+        debug: Enable debug output
+        offset: Number of results to skip (for paging)
+        raise_errors: Raise request failures instead of returning an empty list, which looks like the end of the results
+    """
+    payload = _build_search_payload(search_term, limit, ordering, offset)
+    
+    if debug:
+        print(f"Searching for '{search_term}' (limit: {limit}, offset: {offset}, ordering: {ordering})...")
+    try:
+        return _cached_call(
+            "search", _search_cache_key(search_term, limit, ordering, offset),
+            lambda: _parse_search_response(get_client().post_graphql(payload)),
+            bool
+        )
+    except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
+        logger.warning(f"Request failed during search: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+DEFAULT_SEARCH_PAGE_SIZE = 20
+
+def iter_search_models(search_term: str, ordering: str = "best_match", max_items: int = None,
+                       page_size: int = DEFAULT_SEARCH_PAGE_SIZE, debug: bool = False, raise_errors: bool = False):
+    """
+    Iterates over search results beyond a single page.
+    
+    Pages through searchPrints2 by offset, fetching the next page in the background
+    while the caller consumes the current one. Models already yielded (e.g. shifted
+    onto the next page by new uploads) are skipped.
+    
+    Args:
+        search_term: The search query
+        ordering: Search ordering - one of: "best_match", "popular", "latest", "rating", "makes_count"
+        max_items: Stop after this many models (None pages until the results run out)
+        page_size: Number of models requested per page
+        debug: Enable debug output
+        raise_errors: Raise when a page cannot be fetched instead of ending the iteration there
+    
+    Yields:
+        Model dictionaries, as returned by search_models
+    """
+    _build_search_payload(search_term, page_size, ordering)  # Validate ordering before starting
+    seen = set()
+    yielded = 0
+    offset = 0
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="printables-prefetch") as executor:
+        next_page = executor.submit(search_models, search_term, page_size, ordering, debug, offset, raise_errors)
+        while True:
+            page = next_page.result()
+            offset += page_size
+            last_page = len(page) < page_size
+            if not last_page:
+                next_page = executor.submit(search_models, search_term, page_size, ordering, debug, offset, raise_errors)
+            for model in page:
+                model_id = model.get('id')
+                if model_id in seen:
+                    continue
+                seen.add(model_id)
+                yield model
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    if not last_page:
+                        next_page.cancel()
+                    return
+            if last_page:
+                return
+
+def _build_model_summary_payload(model_id_str: str) -> dict:
+    query = """
+    query ModelSummary($id: ID!) {
+      model: print(id: $id) { ...Model __typename }
+    }
+    """ + _MODEL_FRAGMENTS
+    return {"operationName": "ModelSummary", "query": query, "variables": {"id": model_id_str}}
+
+def _parse_model_summary_response(data: dict):
+    if 'data' in data and data.get('data').get('model'):
+        return data['data']['model']
+    return None
+
+@printables_metrics.tracked()
+def get_model_summary(model_id_str: str, debug: bool = False):
+    """
+    Fetches the metadata of a single model (name, slug, stats, author, image).
+    
+    Args:
+        model_id_str: The numeric ID of the model
+        debug: Enable debug output
+    
+    Returns:
+        Model dictionary in the same shape as a search_models result, or None if not found or on error
+    """
+    if debug:
+        print(f"    -> Fetching summary for model {model_id_str}")
+    try:
+        return _cached_call(
+            "summary", model_id_str,
+            lambda: _parse_model_summary_response(get_client().post_graphql(_build_model_summary_payload(model_id_str))),
+            lambda value: value is not None
+        )
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Request failed fetching summary for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return None
+
+def _build_download_link_payload(file_id: str, model_id: str, file_type: str) -> dict:
+    query = """
+    mutation GetDownloadLink($id: ID!, $modelId: ID!, $fileType: DownloadFileTypeEnum!, $source: DownloadSourceEnum!) {
+      getDownloadLink(id: $id, printId: $modelId, fileType: $fileType, source: $source) {
+        ok
+        errors {
+          ...Error
+          __typename
+        }
+        output {
+          link
+          count
+          ttl
+          __typename
+        }
+        __typename
+      }
+    }
+    fragment Error on ErrorType {
+      field
+      messages
+      __typename
+    }
+    """
+    variables = {"id": file_id, "modelId": model_id, "fileType": file_type, "source": "model_detail"}
+    return {"operationName": "GetDownloadLink", "query": query, "variables": variables}
+
+def _parse_download_link(download_data: dict, file_id: str, debug: bool = False, cache_key: tuple = None):
+    """
+    Extracts the link from one getDownloadLink result, or returns None if it failed.
+    Successful links are stored in download_link_cache under cache_key using the returned TTL.
+    """
+    if download_data:
+        if download_data.get('ok') and (download_data.get('output') or {}).get('link'):
+            output = download_data['output']
+            if cache_key is not None:
+                download_link_cache.put(cache_key, output['link'], output.get('ttl'))
+            return output['link']
+        elif download_data.get('errors'):
+            if debug:
+                print(f"    -> GraphQL errors for file {file_id}: {download_data['errors']}")
+        else:
+            if debug:
+                print(f"    -> No valid download link returned for file {file_id}")
+    return None
+
+def _parse_download_link_response(data: dict, file_id: str, debug: bool = False, cache_key: tuple = None):
+    if debug:
+        print(f"    -> GraphQL response for file {file_id}: {data}")
+    
+    if 'data' in data:
+        return _parse_download_link(data['data'].get('getDownloadLink'), file_id, debug, cache_key)
+    elif 'errors' in data:
+        if debug:
+            print(f"    -> GraphQL query errors for file {file_id}: {data['errors']}")
+    return None
+
+@printables_metrics.tracked()
+def get_real_download_url(file_id: str, model_id: str, file_type: str, debug: bool = False):
+    """
+    Performs the GetDownloadLink mutation to get a temporary direct download URL.
+    Links still valid in download_link_cache are returned without a request.
+    """
+    cache_key = (model_id, file_id, file_type)
+    cached = download_link_cache.get(cache_key)
+    if cached:
+        printables_metrics.set_outcome("cache_hit")
+        return cached
+    payload = _build_download_link_payload(file_id, model_id, file_type)
+    try:
+        return _parse_download_link_response(get_client().post_graphql(payload), file_id, debug, cache_key)
+    except requests.exceptions.RequestException as e:
+        if debug:
+            print(f"    -> Request failed for file ID {file_id}: {e}")
+    printables_metrics.set_outcome("error")
+    return None
+
+def _build_download_links_payload(files: list, model_id: str) -> dict:
+    """
+    Packs one aliased getDownloadLink mutation per (file_id, file_type) into a single document.
+    """
+    declarations = ["$modelId: ID!", "$source: DownloadSourceEnum!"]
+    selections = []
+    variables = {"modelId": model_id, "source": "model_detail"}
+    for index, (file_id, file_type) in enumerate(files):
+        declarations.append(f"$id{index}: ID!")
+        declarations.append(f"$fileType{index}: DownloadFileTypeEnum!")
+        selections.append(
+            f"f{index}: getDownloadLink(id: $id{index}, printId: $modelId, fileType: $fileType{index}, source: $source) "
+            "{ ok errors { ...Error __typename } output { link count ttl __typename } __typename }"
+        )
+        variables[f"id{index}"] = file_id
+        variables[f"fileType{index}"] = file_type
+
+    query = (
+        f"mutation GetDownloadLinks({', '.join(declarations)}) {{\n  "
+        + "\n  ".join(selections)
+        + "\n}\nfragment Error on ErrorType { field messages __typename }\n"
+    )
+    return {"operationName": "GetDownloadLinks", "query": query, "variables": variables}
+
+def _split_batches(items: list, batch_size: int) -> list:
+    batch_size = max(1, batch_size)
+    return [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+def _batch_results(data: dict, batch_len: int, debug: bool = False):
+    """
+    Returns the aliased results of a batch response, or None if the server rejected the batch.
+    """
+    if debug:
+        print(f"    -> GraphQL response for batch of {batch_len} files: {data}")
+    results = data.get('data')
+    if not results and debug:
+        print(f"    -> Batch rejected, falling back to per-file calls: {data.get('errors')}")
+    return results
+
+@printables_metrics.tracked()
+def get_real_download_urls(files: list, model_id: str, batch_size: int = DEFAULT_LINK_BATCH_SIZE, debug: bool = False):
+    """
+    Resolves download URLs for several files of one model using batched GetDownloadLink mutations.
+    
+    Links still valid in download_link_cache are reused; only the remaining files are
+    minted, up to batch_size mutations per request as aliases (f0, f1, ...). Every
+    request takes a token from download_link_limiter. If the server rejects a batch,
+    or leaves an alias without a result, the affected files fall back to one
+    get_real_download_url call each.
+    
+    Args:
+        files: List of (file_id, file_type) tuples
+        model_id: The numeric ID of the model the files belong to
+        batch_size: Maximum number of mutations packed into one request
+        debug: Enable debug output
+    
+    Returns:
+        List of download URLs (None where no link could be obtained, or once the deadline is reached), in the order of files
+    """
+    urls = [download_link_cache.get((model_id, file_id, file_type)) for file_id, file_type in files]
+    missing = [index for index, url in enumerate(urls) if url is None]
+    for batch_indexes in _split_batches(missing, batch_size):
+        if not can_retry():
+            break  # Deadline reached: the remaining files get no link
+        batch = [files[index] for index in batch_indexes]
+        results = None
+        if len(batch) > 1:
+            try:
+                download_link_limiter.acquire()
+                data = get_client().post_graphql(_build_download_links_payload(batch, model_id))
+                results = _batch_results(data, len(batch), debug)
+            except requests.exceptions.RequestException as e:
+                if debug:
+                    print(f"    -> Batch request failed, falling back to per-file calls: {e}")
+
+        for alias_index, (file_index, (file_id, file_type)) in enumerate(zip(batch_indexes, batch)):
+            download_data = (results or {}).get(f"f{alias_index}")
+            if download_data is None:
+                try:
+                    download_link_limiter.acquire()
+                except DeadlineExceeded:
+                    break
+                urls[file_index] = get_real_download_url(file_id, model_id, file_type, debug)
+            else:
+                urls[file_index] = _parse_download_link(download_data, file_id, debug, (model_id, file_id, file_type))
+    return urls
+
+def _build_model_files_payload(model_id_str: str) -> dict:
+    """
+    Builds the ModelFiles query, selecting only the fields the file manifest keeps.
+    
+    Printer, material, preview and slicing details are never used here, so they are
+    not requested; this keeps the response small for models with many G-codes.
+    """
+    operation_name = "ModelFiles"
+    graphql_query = """
+    query ModelFiles($id: ID!) {
+      model: print(id: $id) {
+        id
+        gcodes { id name fileSize __typename }
+        stls { id name fileSize __typename }
+        slas { id __typename }
+        otherFiles { id __typename }
+        __typename
+      }
+    }
+    """
+    variables = {"id": model_id_str}
+    return {"operationName": operation_name, "query": graphql_query, "variables": variables}
+
+def _collect_supported_files(data: dict, debug: bool = False):
+    """
+    Returns the (file_item, file_type) pairs that can be downloaded, or None if the model was not found.
+    """
+    if not ('data' in data and data.get('data', {}).get('model')):
+        return None
+    model_files = data['data']['model']
+    
+    supported_file_types = {'stls': 'stl', 'gcodes': 'gcode'} 
+    unsupported_file_types = {'slas': 'sla', 'otherFiles': 'other'}
+    
+    pending = []
+    for list_name, api_type in supported_file_types.items():
+        if model_files.get(list_name):
+            for file_item in model_files[list_name]:
+                # Keep only what is needed to mint links, so cached manifests stay small
+                pending.append(({key: file_item.get(key) for key in ('id', 'name', 'fileSize')}, api_type))
+    
+    # Log "unsupported" file types found (for future implementation/testing)
+    for list_name in unsupported_file_types:
+        if model_files.get(list_name):
+            count = len(model_files[list_name])
+            if debug:
+                print(f"    -> Found {count} {list_name} files (not yet supported)")
+    return pending
+
+def _manifest_entries(pending: list) -> list:
+    return [{
+        "file_id": file_item.get('id'),
+        "name": file_item.get('name'),
+        "size_bytes": file_item.get('fileSize'),
+        "file_type": api_type
+    } for file_item, api_type in pending]
+
+def _file_entries(batch: list, urls: list) -> list:
+    return [{
+        "file_id": file_item.get('id'),
+        "name": file_item.get('name'),
+        "download_url": real_url,
+        "size_bytes": file_item.get('fileSize'),
+        "file_type": api_type
+    } for (file_item, api_type), real_url in zip(batch, urls)]
+
+def _load_manifest(model_id_str: str, debug: bool = False):
+    """
+    Returns the cached or freshly fetched (file_item, file_type) pairs of a model, or None if it was not found.
+    """
+    def load():
+        data = get_client().post_graphql(_build_model_files_payload(model_id_str))
+        with printables_metrics.stage("process"):
+            return _collect_supported_files(data, debug)
+    return _cached_call("manifest", model_id_str, load, lambda value: value is not None)
+
+@printables_metrics.tracked()
+def get_model_manifest(model_id_str: str, debug: bool = False, raise_errors: bool = False):
+    """
+    Lists the downloadable files of a model without minting any download links.
+    
+    Costs a single lightweight request (or none when the manifest is cached). Links
+    for the files actually needed can then be minted with get_real_download_url.
+    
+    Args:
+        model_id_str: The numeric ID of the model
+        debug: Enable debug output
+        raise_errors: Raise request failures instead of returning an empty list, which looks like a model without files
+    
+    Returns:
+        List of file dictionaries containing file_id, name, size_bytes and file_type
+    """
+    try:
+        pending = _load_manifest(model_id_str, debug)
+        if pending is not None:
+            return _manifest_entries(pending)
+    except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
+        logger.warning(f"Request failed fetching file list for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+@printables_metrics.tracked()
+def get_model_files(model_id_str: str, debug: bool = False, max_workers: int = DEFAULT_LINK_WORKERS,
+                    batch_size: int = DEFAULT_LINK_BATCH_SIZE, raise_errors: bool = False):
+    """
+    Fetches the file list and then gets the real download URL for each file.
+    
+    Download links are minted in batches of batch_size aliased mutations, with at
+    most max_workers batches in flight and the overall rate governed by
+    download_link_limiter. The returned list keeps the order of the files in the model.
+    The file manifest is cached on disk (when enabled) separately from the short-lived
+    links, which only live in download_link_cache. Once the current deadline is
+    reached, the remaining files are returned with a None download_url.
+    
+    Args:
+        model_id_str: The numeric ID of the model
+        debug: Enable debug output
+        max_workers: Maximum number of link batches resolved at the same time (1 resolves serially)
+        batch_size: Maximum number of download links minted per request
+        raise_errors: Raise request failures instead of returning an empty list, which looks like a model without files
+    """
+    try:
+        pending = _load_manifest(model_id_str, debug)
+        # Links are minted either way, so a cached manifest does not make this a cache hit
+        printables_metrics.set_outcome("ok")
+        if pending is not None:
+            batches = _split_batches(pending, batch_size)
+
+            def resolve(batch):
+                if debug:
+                    print(f"    -> Fetching download links for: {', '.join(str(f.get('name')) for f, _ in batch)}")
+                urls = get_real_download_urls(
+                    [(file_item.get('id'), api_type) for file_item, api_type in batch],
+                    model_id_str, batch_size, debug
+                )
+                return _file_entries(batch, urls)
+
+            if max_workers <= 1 or len(batches) <= 1:
+                resolved = [resolve(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                    resolved = list(executor.map(bind_deadline(resolve), batches))
+            return [entry for batch in resolved for entry in batch]
+    except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
+        logger.warning(f"Request failed fetching file list for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+class ScraperPool:
+    """
+    Thread-safe pool of long-lived cloudscraper sessions.
+    
+    Sessions keep their cookies (including Cloudflare clearance) between requests.
+    A session is checked out for one request at a time, and is recycled after
+    max_uses requests or as soon as a request through it fails a Cloudflare challenge.
+    
+    Args:
+        size: Maximum number of sessions alive at the same time
+        max_uses: Number of requests after which a session is replaced
+        **scraper_kwargs: Arguments passed to cloudscraper.create_scraper
+    """
+    def __init__(self, size: int = 4, max_uses: int = 100, **scraper_kwargs):
+        self.size = size
+        self.max_uses = max_uses
+        self.scraper_kwargs = scraper_kwargs or {"browser": "chrome", "delay": 1}
+        self.created = 0
+        self.recycled = 0
+        self._idle = []
+        self._alive = 0
+        self._cleared = False
+        self._condition = threading.Condition()
+
+    def checkout(self):
+        """
+        Returns an idle session, creating one if the pool is not full, otherwise waits for one.
+        """
+        with self._condition:
+            while not self._idle and self._alive >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._alive += 1
+        try:
+            import cloudscraper
+            scraper = cloudscraper.create_scraper(**self.scraper_kwargs)
+        except Exception:
+            with self._condition:
+                self._alive -= 1
+                self._condition.notify()
+            raise
+        scraper._printables_uses = 0
+        with self._condition:
+            self.created += 1
+        return scraper
+
+    def checkin(self, scraper, discard: bool = False):
+        """
+        Returns a session to the pool, or closes it if it is worn out, discard is set or the pool was cleared.
+        """
+        scraper._printables_uses = getattr(scraper, '_printables_uses', 0) + 1
+        with self._condition:
+            if discard or self._cleared or scraper._printables_uses >= self.max_uses:
+                self._alive -= 1
+                self.recycled += 1
+                retired = scraper
+            else:
+                self._idle.append(scraper)
+                retired = None
+            self._condition.notify()
+        if retired is not None:
+            retired.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Checks out a session for the duration of the with block.
+        """
+        scraper = self.checkout()
+        discard = False
+        try:
+            yield scraper
+        except Exception as e:
+            discard = _is_challenge_failure(e)
+            raise
+        finally:
+            self.checkin(scraper, discard)
+
+    def clear(self):
+        """
+        Closes every idle session. Sessions currently checked out are closed when returned.
+        """
+        with self._condition:
+            self._cleared = True
+            idle, self._idle = self._idle, []
+            self._alive -= len(idle)
+            self._condition.notify_all()
+        for scraper in idle:
+            scraper.close()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self.size,
+                "alive": self._alive,
+                "idle": len(self._idle),
+                "created": self.created,
+                "recycled": self.recycled,
+            }
+
+
+def _is_challenge_failure(error: Exception) -> bool:
+    """
+    Tells whether an error means Cloudflare refused the session (challenge failed or clearance lost).
+    """
+    import cloudscraper
+    if isinstance(error, cloudscraper.exceptions.CloudflareException):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code in (403, 503)
+
+
+scraper_pool = ScraperPool()
+
+
+def configure_scraper_pool(size: int = 4, max_uses: int = 100, **scraper_kwargs) -> ScraperPool:
+    """
+    Replaces the shared scraper pool. Idle sessions of the previous pool are closed.
+    """
+    global scraper_pool
+    scraper_pool.clear()
+    scraper_pool = ScraperPool(size, max_uses, **scraper_kwargs)
+    return scraper_pool
+
+
+def _description_markdown(description_div) -> str:
+    """
+    Converts the description container to Markdown (h3 to '##', links, <br> line breaks).
     """
-    Searches Printables.com for models using the GraphQL API.
+    from bs4 import NavigableString
+    content_container = description_div.find('body') or description_div
+
+    clean_description = []
+    for tag in content_container.find_all(['h3', 'p']):
+        if tag.name == 'h3':
+            clean_description.append(f"\n## {tag.get_text(strip=True)}")
+        elif tag.name == 'p':
+            p_parts = [item.string if isinstance(item, NavigableString) else f"[{item.get_text(strip=True)}]({item.get('href', '')})" if item.name == 'a' else "\n" if item.name == 'br' else '' for item in tag.contents]
+            clean_description.append("".join(filter(None, p_parts)).strip())
     
-    Args:
-        search_term: The search query
-        limit: Maximum number of results to return
-        ordering: Search ordering - one of: "best_match", "popular", "latest", "rating", "makes_count"
-        debug: Enable debug output
+    return "\n".join(clean_description)
+
+def _find_description_full(html: str):
     """
-    api_url = "https://api.printables.com/graphql/"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"}
-    
-    query = """
-    query SearchModels($query: String!, $limit: Int, $ordering: SearchChoicesEnum) {
-      result: searchPrints2(query: $query, printType: print, limit: $limit, ordering: $ordering) {
-        items { ...Model __typename }
-      }
-    }
-    fragment AvatarUser on UserType { id handle publicUsername __typename }
-    fragment Model on PrintType { 
-        id name slug ratingAvg likesCount downloadCount datePublished 
-        user { ...AvatarUser __typename } 
-        image { filePath } 
-        __typename 
-    }
+    Parses the whole page with html.parser (the reference backend).
     """
-    # Validate ordering parameter
-    valid_orderings = ["best_match", "popular", "latest", "rating", "makes_count"]
-    if ordering not in valid_orderings:
-        raise ValueError(f"Invalid ordering '{ordering}'. Must be one of: {', '.join(valid_orderings)}")
-    
-    variables = {"query": search_term, "limit": limit, "ordering": ordering}
-    payload = {"operationName": "SearchModels", "query": query, "variables": variables}
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, 'html.parser').find('div', class_='user-inserted')
+
+def _has_description_class(value) -> bool:
+    # At parse time the class attribute may still be one unsplit string
+    if not value:
+        return False
+    classes = value.split() if isinstance(value, str) else value
+    return 'user-inserted' in classes
+
+def _find_description_strainer(html: str):
+    """
+    Builds a tree only for the description container, using html.parser with a SoupStrainer.
     
-    if debug:
-        print(f"Searching for '{search_term}' (limit: {limit}, ordering: {ordering})...")
-    try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        if 'data' in data and data.get('data').get('result'):
-            return data['data']['result']['items']
-    except requests.exceptions.RequestException as e:
-        print(f"Request failed during search: {e}")
-    return []
+    Unlike a full parse, a container still open when an enclosing element ends (e.g.
+    '<section><div class="user-inserted">...</section>') takes in the rest of the page.
+    """
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer('div', class_=_has_description_class)
+    return BeautifulSoup(html, 'html.parser', parse_only=strainer).find('div', class_='user-inserted')
 
-def get_real_download_url(file_id: str, model_id: str, file_type: str, debug: bool = False):
+def _find_description_lxml(html: str):
     """
-    Performs the GetDownloadLink mutation to get a temporary direct download URL.
+    Same as the strainer backend, but tokenized by lxml (requires the optional 'lxml' package).
+    Note that lxml normalizes carriage returns, so '\r' characters never reach the output,
+    and that it shares the strainer backend's handling of containers closed by an enclosing element.
     """
-    api_url = "https://api.printables.com/graphql/"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"}
+    from bs4 import BeautifulSoup, SoupStrainer
+    strainer = SoupStrainer('div', class_=_has_description_class)
+    return BeautifulSoup(html, 'lxml', parse_only=strainer).find('div', class_='user-inserted')
 
-    query = """
-    mutation GetDownloadLink($id: ID!, $modelId: ID!, $fileType: DownloadFileTypeEnum!, $source: DownloadSourceEnum!) {
-      getDownloadLink(id: $id, printId: $modelId, fileType: $fileType, source: $source) {
-        ok
-        errors {
-          ...Error
-          __typename
-        }
-        output {
-          link
-          count
-          ttl
-          __typename
-        }
-        __typename
-      }
-    }
-    fragment Error on ErrorType {
-      field
-      messages
-      __typename
-    }
+# Elements html.parser (as used by BeautifulSoup) never keeps open
+_VOID_ELEMENTS = frozenset([
+    'area', 'base', 'basefont', 'bgsound', 'br', 'col', 'command', 'embed', 'frame', 'hr', 'image', 'img',
+    'input', 'isindex', 'keygen', 'link', 'menuitem', 'meta', 'nextid', 'param', 'source', 'spacer', 'track', 'wbr',
+])
+
+class _DescriptionSlicer(HTMLParser):
     """
-    variables = {"id": file_id, "modelId": model_id, "fileType": file_type, "source": "model_detail"}
-    payload = {"operationName": "GetDownloadLink", "query": query, "variables": variables}
+    Tokenizes a page until the description container closes and records where it starts and ends.
+    
+    Open elements are tracked the way BeautifulSoup's html.parser builder tracks them:
+    an end tag closes the most recent open element of that name (and everything opened
+    after it) and is ignored if none is open. So the container also ends at the end
+    tag of an element it sits in (ancestor_closed is True then).
+    """
+    class Done(Exception):
+        pass
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.start = None
+        self.end = None
+        self.ancestor_closed = False
+        self._open = []
+        self._container = None
 
+    def handle_starttag(self, tag, attrs):
+        if tag in _VOID_ELEMENTS:
+            return
+        self._open.append(tag)
+        if self.start is None and tag == 'div':
+            classes = (dict(attrs).get('class') or '').split()
+            if 'user-inserted' in classes:
+                self.start = self.getpos()
+                self._container = len(self._open) - 1
+
+    def handle_endtag(self, tag):
+        if tag in _VOID_ELEMENTS:
+            return
+        for index in range(len(self._open) - 1, -1, -1):
+            if self._open[index] == tag:
+                break
+        else:
+            return
+        if self._container is not None and index <= self._container:
+            self.end = self.getpos()
+            self.ancestor_closed = index < self._container
+            raise self.Done()
+        del self._open[index:]
+
+def _find_description_stream(html: str):
+    """
+    Streams the page through a tokenizer that stops once the container closes, then
+    parses only that slice of the page.
+    """
+    slicer = _DescriptionSlicer()
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=15)
-        response.raise_for_status()
-        data = response.json()
-        
-        if debug:
-            print(f"    -> GraphQL response for file {file_id}: {data}")
-        
-        if 'data' in data:
-            download_data = data['data'].get('getDownloadLink')
-            if download_data:
-                if download_data.get('ok') and download_data.get('output', {}).get('link'):
-                    return download_data['output']['link']
-                elif download_data.get('errors'):
-                    if debug:
-                        print(f"    -> GraphQL errors for file {file_id}: {download_data['errors']}")
-                else:
-                    if debug:
-                        print(f"    -> No valid download link returned for file {file_id}")
-        elif 'errors' in data:
-            if debug:
-                print(f"    -> GraphQL query errors for file {file_id}: {data['errors']}")
-            
-    except requests.exceptions.RequestException as e:
-        if debug:
-            print(f"    -> Request failed for file ID {file_id}: {e}")
-    return None
+        slicer.feed(html)
+    except _DescriptionSlicer.Done:
+        pass
+    if slicer.start is None:
+        return None
 
-def get_model_files(model_id_str: str, debug: bool = False):
+    # HTMLParser reports (line, column) positions, with lines split on '\n' only
+    line_starts = [0]
+    for line in html.split('\n'):
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    def offset(position):
+        line, column = position
+        return line_starts[line - 1] + column
+
+    start = offset(slicer.start)
+    if slicer.end is None:
+        # Never closed: the container runs to the end of the page
+        end = len(html)
+    elif slicer.ancestor_closed:
+        # Closed by an enclosing element's end tag, which is left out of the slice
+        end = offset(slicer.end)
+    else:
+        end = html.index('>', offset(slicer.end)) + 1
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html[start:end], 'html.parser').find('div', class_='user-inserted')
+
+# Description extraction backends: each takes the page HTML and returns the
+# 'div.user-inserted' Tag (or None). Markdown conversion is shared by all of them.
+DESCRIPTION_PARSERS = {
+    "html.parser": _find_description_full,
+    "strainer": _find_description_strainer,
+    "lxml": _find_description_lxml,
+    "stream": _find_description_stream,
+}
+DEFAULT_DESCRIPTION_PARSER = "stream"
+# The backends worker processes have, as they import this module without later registrations
+_BUILTIN_DESCRIPTION_PARSERS = dict(DESCRIPTION_PARSERS)
+
+def register_description_parser(name: str, find_container):
     """
-    Fetches the file list and then gets the real download URL for each file.
+    Registers a description extraction backend.
+    
+    Args:
+        name: Name used to select the backend
+        find_container: Callable taking the page HTML and returning the 'div.user-inserted' Tag or None
+    """
+    DESCRIPTION_PARSERS[name] = find_container
+
+def extract_description(html: str, parser: str = None):
     """
-    api_url = "https://api.printables.com/graphql/"
-    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36"}
+    Extracts the model description from a Printables model page as Markdown.
     
-    operation_name = "ModelFiles"
-    graphql_query = """
-    query ModelFiles($id: ID!) {
-      model: print(id: $id) {
-        id
-        filesType
-        gcodes { ...GcodeDetail __typename }
-        stls { ...StlDetail __typename }
-        slas { ...SlaDetail __typename }
-        otherFiles { ...OtherFileDetail __typename }
-        __typename
-      }
-    }
-    fragment GcodeDetail on GCodeType { id created name folder note printer { id name __typename } excludeFromTotalSum printDuration layerHeight nozzleDiameter material { id name __typename } weight fileSize filePreviewPath rawDataPrinter order __typename }
-    fragment OtherFileDetail on OtherFileType { id created name folder note fileSize filePreviewPath order __typename }
-    fragment SlaDetail on SLAType { id created name folder note expTime firstExpTime printer { id name __typename } printDuration layerHeight usedMaterial fileSize filePreviewPath order __typename }
-    fragment StlDetail on STLType { id created name folder note fileSize filePreviewPath order __typename }
+    Args:
+        html: The model page HTML
+        parser: Name of a backend in DESCRIPTION_PARSERS (default: DEFAULT_DESCRIPTION_PARSER)
+    
+    Returns:
+        The Markdown description, or None if the page has no description container
     """
-    variables = {"id": model_id_str}
-    payload = {"operationName": operation_name, "query": graphql_query, "variables": variables}
+    description_div = DESCRIPTION_PARSERS[parser or DEFAULT_DESCRIPTION_PARSER](html)
+    if not description_div:
+        return None
+    return _description_markdown(description_div)
+
+# Pages shorter than this (in characters) are parsed inline even when the parse pool is enabled:
+# for them, sending the HTML to a worker costs more than the parse saves
+DEFAULT_PARSE_POOL_MIN_SIZE = 100_000
+
+
+class ParsePool:
+    """
+    Process pool that extracts descriptions off the calling process.
+
+    Description parsing is CPU-bound and holds the GIL, so concurrent fetch threads
+    end up waiting for each other once pages arrive faster than one core parses them.
+    Large pages are sent to worker processes as raw HTML and only the Markdown comes
+    back; small pages, and every page after a worker crash, are parsed inline.
+    Workers start on first use, through a fork server (or spawned where that is not
+    available) rather than forked from this multithreaded process, so they import
+    this module afresh: pages for parsers added with register_description_parser
+    are parsed inline.
     
-    try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if 'data' in data and data.get('data', {}).get('model'):
-            model_files = data['data']['model']
-            all_files_with_links = []
-            
-            supported_file_types = {'stls': 'stl', 'gcodes': 'gcode'} 
-            unsupported_file_types = {'slas': 'sla', 'otherFiles': 'other'}
-            
-            for list_name, api_type in supported_file_types.items():
-                if model_files.get(list_name):
-                    for file_item in model_files[list_name]:
-                        file_id = file_item.get('id')
-                        file_name = file_item.get('name')
-                        if debug:
-                            print(f"    -> Fetching download link for: {file_name}")
-                        
-                        real_url = get_real_download_url(file_id, model_id_str, api_type, debug)
-                        all_files_with_links.append({
-                            "name": file_name,
-                            "download_url": real_url,
-                            "size_bytes": file_item.get('fileSize'),
-                            "file_type": api_type
-                        })
-                        time.sleep(0.5)
-            
-            # Log "unsupported" file types found (for future implementation/testing)
-            for list_name in unsupported_file_types:
-                if model_files.get(list_name):
-                    count = len(model_files[list_name])
-                    if debug:
-                        print(f"    -> Found {count} {list_name} files (not yet supported)")
-            return all_files_with_links
-    except requests.exceptions.RequestException as e:
-        print(f"Request failed fetching file list for model {model_id_str}: {e}")
-    return []
+    Args:
+        workers: Number of worker processes
+        min_size: Pages shorter than this many characters are parsed inline
+    """
+    def __init__(self, workers: int, min_size: int = DEFAULT_PARSE_POOL_MIN_SIZE):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+        self.workers = workers
+        self.min_size = min_size
+        # Forking while the server's event loop and pool threads run can deadlock the child
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(start_method))
+        self._lock = threading.Lock()
+        self.offloaded = 0
+        self.inline = 0
+        self.failures = 0
+
+    def extract(self, html: str, parser: str = None):
+        """
+        Extracts the description like extract_description, in a worker process when the page is large enough.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+        parser = parser or DEFAULT_DESCRIPTION_PARSER
+        if len(html) >= self.min_size and DESCRIPTION_PARSERS.get(parser) is _BUILTIN_DESCRIPTION_PARSERS.get(parser):
+            try:
+                result = self._executor.submit(extract_description, html, parser).result()
+            except BrokenProcessPool:
+                with self._lock:
+                    self.failures += 1
+            else:
+                with self._lock:
+                    self.offloaded += 1
+                return result
+        with self._lock:
+            self.inline += 1
+        return extract_description(html, parser)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "min_size": self.min_size, "offloaded": self.offloaded,
+                    "inline": self.inline, "failures": self.failures}
+
+
+parse_pool = None
+
+
+def configure_parse_pool(workers: int = 0, min_size: int = DEFAULT_PARSE_POOL_MIN_SIZE):
+    """
+    Enables parsing descriptions in worker processes, replacing any previous pool.
+    
+    Args:
+        workers: Number of worker processes (0 parses every page inline on the fetching thread)
+        min_size: Pages shorter than this many characters are parsed inline
+    
+    Returns:
+        The new ParsePool, or None when disabled
+    """
+    global parse_pool
+    if parse_pool is not None:
+        parse_pool.shutdown()
+    parse_pool = ParsePool(workers, min_size) if workers > 0 else None
+    return parse_pool
+
 
-def get_model_description(model_url: str, debug: bool = False):
+def _parse_description(html: str, parser: str = None):
+    pool = parse_pool
+    if pool is None:
+        return extract_description(html, parser)
+    return pool.extract(html, parser)
+
+@printables_metrics.tracked()
+def get_model_description(model_url: str, debug: bool = False, parser: str = None):
     """
     Scrapes and cleans the model description from its page using cloudscraper.
+    Descriptions are served from the persistent cache when it is enabled.
+    
+    Args:
+        model_url: Full URL of the model page
+        debug: Enable debug output
+        parser: Description extraction backend (see DESCRIPTION_PARSERS)
+    """
+    return _cached_call(
+        "description", model_url,
+        lambda: _fetch_model_description(model_url, debug, parser),
+        lambda value: not value.startswith("Error:")
+    )
+
+def _timed_page_get(scraper, url: str, timeout: float):
+    """
+    GETs a page through a scraper session, splitting the time into challenge, ttfb and body stages.
+    
+    A session response hook timestamps every response cloudscraper receives: time
+    spent before the final request (earlier responses and solving a Cloudflare
+    challenge) is the challenge stage, the final response's elapsed time the ttfb
+    stage (connecting included), and reading its body the body stage.
     """
+    responses = []
+    hooks = getattr(scraper, 'hooks', None)
+    response_hooks = hooks.setdefault('response', []) if isinstance(hooks, dict) else None
+
+    def record(response, *args, **kwargs):
+        responses.append((time.perf_counter(), response.elapsed))
+
+    if response_hooks is not None:
+        response_hooks.append(record)
+    start = time.perf_counter()
+    try:
+        response = scraper.get(url, timeout=timeout)
+    finally:
+        if response_hooks is not None:
+            response_hooks.remove(record)
+    total = time.perf_counter() - start
+    if responses and isinstance(responses[-1][1], timedelta):
+        received, elapsed = responses[-1]
+        if len(responses) > 1:
+            printables_metrics.add_stage("challenge", received - start - elapsed.total_seconds())
+        printables_metrics.add_stage("ttfb", elapsed.total_seconds())
+        printables_metrics.add_stage("body", start + total - received)
+    else:
+        printables_metrics.add_stage("ttfb", total)
+    return response
+
+def _fetch_model_description(model_url: str, debug: bool = False, parser: str = None):
     if debug:
         print(f"    -> Fetching description from: {model_url}")
     
-    # Add retry logic for network issues
+    # Retry network errors and throttling; pacing and backoff come from the shared www limiter.
+    # Within a deadline, the timeout shrinks to what is left and retries stop when nothing is.
+    guard = get_upstream_guard(model_url)
     max_retries = 3
     for attempt in range(max_retries):
+        trial = False
         try:
-            scraper = cloudscraper.create_scraper(browser='chrome',delay=1,)
-            
-            response = scraper.get(model_url, timeout=20)  # Increased timeout
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            description_div = soup.find('div', class_='user-inserted')
+            with printables_metrics.stage("queue"):
+                trial = guard.before_request()
+            with scraper_pool.session() as scraper:
+                response = _timed_page_get(scraper, model_url, timeout=budget_timeout(20))  # Increased timeout
+                if guard.is_throttled(response) and attempt < max_retries - 1 and can_retry():
+                    if debug:
+                        print(f"    -> Throttled (HTTP {response.status_code}) on attempt {attempt + 1}/{max_retries}")
+                    continue
+                response.raise_for_status()
+            guard.record_success()
             
-            if not description_div: 
+            with printables_metrics.stage("parse"):
+                description_text = _parse_description(response.text, parser)
+            if description_text is None: 
                 return "Description not found on this page."
-            
-            content_container = description_div.find('body') or description_div
-
-            clean_description = []
-            for tag in content_container.find_all(['h3', 'p']):
-                if tag.name == 'h3':
-                    clean_description.append(f"\n## {tag.get_text(strip=True)}")
-                elif tag.name == 'p':
-                    p_parts = [item.string if isinstance(item, NavigableString) else f"[{item.get_text(strip=True)}]({item.get('href', '')})" if item.name == 'a' else "\n" if item.name == 'br' else '' for item in tag.contents]
-                    clean_description.append("".join(filter(None, p_parts)).strip())
-            
-            description_text = "\n".join(clean_description)
             if debug:
                 print(f"    -> Description fetched successfully ({len(description_text)} characters)")
             return description_text
             
+        except CircuitOpenError as e:
+            if debug:
+                print(f"    -> {e}")
+            printables_metrics.set_outcome("error")
+            return f"Error: {e}"
         except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            e = blame_deadline(e)
+            if isinstance(e, DeadlineExceeded):
+                if debug:
+                    print(f"    -> {e}")
+                printables_metrics.set_outcome("error")
+                return f"Error: {e}"
+            guard.record_error(e)
             if debug:
                 print(f"    -> Attempt {attempt + 1}/{max_retries} failed: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(2 * (attempt + 1))  # Exponential backoff
-                continue
+            continue
         except requests.exceptions.RequestException as e:
+            guard.record_error(e)
             if debug:
                 print(f"    -> Request error on attempt {attempt + 1}: {e}")
+            printables_metrics.set_outcome("error")
             return f"Error: Could not fetch model page after {attempt + 1} attempts. {e}"
         except Exception as e:
             if debug:
                 print(f"    -> Unexpected error: {e}")
+            printables_metrics.set_outcome("error")
             return f"Error: Failed to parse model page. {e}"
+        finally:
+            if trial:
+                guard.record_neutral()
     
+    printables_metrics.set_outcome("error")
     return f"Error: Could not fetch model page after {max_retries} attempts due to network issues."
 
-if __name__ == "__main__":
+DEFAULT_BLOCKING_WORKERS = 4
+_blocking_executor = None
+_blocking_lock = threading.Lock()
+
+
+def configure_blocking_pool(max_workers: int = DEFAULT_BLOCKING_WORKERS):
+    """
+    Sets the size of the thread pool used by the async functions for blocking work (e.g. cloudscraper).
+    """
+    global _blocking_executor
+    with _blocking_lock:
+        if _blocking_executor is not None:
+            _blocking_executor.shutdown(wait=False)
+        _blocking_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="printables-blocking")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking callable on the bounded blocking pool and awaits its result, under the caller's deadline.
+    """
+    global _blocking_executor
+    with _blocking_lock:
+        if _blocking_executor is None:
+            _blocking_executor = ThreadPoolExecutor(max_workers=DEFAULT_BLOCKING_WORKERS, thread_name_prefix="printables-blocking")
+        executor = _blocking_executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(bind_deadline(func), *args, **kwargs))
+
+
+@printables_metrics.tracked()
+async def search_models_async(search_term: str, limit: int = 5, ordering: str = "best_match", debug: bool = False,
+                              offset: int = 0):
+    """
+    Async version of search_models.
+    """
+    payload = _build_search_payload(search_term, limit, ordering, offset)
+    
+    if debug:
+        print(f"Searching for '{search_term}' (limit: {limit}, offset: {offset}, ordering: {ordering})...")
+
+    async def load():
+        return _parse_search_response(await get_async_client().post_graphql(payload))
+    try:
+        return await _cached_call_async("search", _search_cache_key(search_term, limit, ordering, offset), load, bool)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Request failed during search: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+@printables_metrics.tracked()
+async def get_model_summary_async(model_id_str: str, debug: bool = False):
+    """
+    Async version of get_model_summary.
+    """
+    if debug:
+        print(f"    -> Fetching summary for model {model_id_str}")
+
+    async def load():
+        return _parse_model_summary_response(await get_async_client().post_graphql(_build_model_summary_payload(model_id_str)))
+    try:
+        return await _cached_call_async("summary", model_id_str, load, lambda value: value is not None)
+    except requests.exceptions.RequestException as e:
+        logger.warning(f"Request failed fetching summary for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return None
+
+async def aiter_search_models(search_term: str, ordering: str = "best_match", max_items: int = None,
+                              page_size: int = DEFAULT_SEARCH_PAGE_SIZE, debug: bool = False):
+    """
+    Async iterator version of iter_search_models.
+    """
+    _build_search_payload(search_term, page_size, ordering)  # Validate ordering before starting
+    seen = set()
+    yielded = 0
+    offset = 0
+    next_page = asyncio.ensure_future(search_models_async(search_term, page_size, ordering, debug, offset))
+    try:
+        while True:
+            page = await next_page
+            offset += page_size
+            last_page = len(page) < page_size
+            if not last_page:
+                next_page = asyncio.ensure_future(search_models_async(search_term, page_size, ordering, debug, offset))
+            for model in page:
+                model_id = model.get('id')
+                if model_id in seen:
+                    continue
+                seen.add(model_id)
+                yield model
+                yielded += 1
+                if max_items is not None and yielded >= max_items:
+                    return
+            if last_page:
+                return
+    finally:
+        if not next_page.done():
+            next_page.cancel()
+
+@printables_metrics.tracked()
+async def get_real_download_url_async(file_id: str, model_id: str, file_type: str, debug: bool = False):
+    """
+    Async version of get_real_download_url.
+    """
+    cache_key = (model_id, file_id, file_type)
+    cached = download_link_cache.get(cache_key)
+    if cached:
+        printables_metrics.set_outcome("cache_hit")
+        return cached
+    payload = _build_download_link_payload(file_id, model_id, file_type)
+    try:
+        return _parse_download_link_response(await get_async_client().post_graphql(payload), file_id, debug, cache_key)
+    except requests.exceptions.RequestException as e:
+        if debug:
+            print(f"    -> Request failed for file ID {file_id}: {e}")
+    printables_metrics.set_outcome("error")
+    return None
+
+@printables_metrics.tracked()
+async def get_real_download_urls_async(files: list, model_id: str, batch_size: int = DEFAULT_LINK_BATCH_SIZE,
+                                       debug: bool = False):
+    """
+    Async version of get_real_download_urls.
+    """
+    urls = [download_link_cache.get((model_id, file_id, file_type)) for file_id, file_type in files]
+    missing = [index for index, url in enumerate(urls) if url is None]
+    for batch_indexes in _split_batches(missing, batch_size):
+        if not can_retry():
+            break  # Deadline reached: the remaining files get no link
+        batch = [files[index] for index in batch_indexes]
+        results = None
+        if len(batch) > 1:
+            try:
+                await download_link_limiter.acquire_async()
+                data = await get_async_client().post_graphql(_build_download_links_payload(batch, model_id))
+                results = _batch_results(data, len(batch), debug)
+            except requests.exceptions.RequestException as e:
+                if debug:
+                    print(f"    -> Batch request failed, falling back to per-file calls: {e}")
+
+        for alias_index, (file_index, (file_id, file_type)) in enumerate(zip(batch_indexes, batch)):
+            download_data = (results or {}).get(f"f{alias_index}")
+            if download_data is None:
+                try:
+                    await download_link_limiter.acquire_async()
+                except DeadlineExceeded:
+                    break
+                urls[file_index] = await get_real_download_url_async(file_id, model_id, file_type, debug)
+            else:
+                urls[file_index] = _parse_download_link(download_data, file_id, debug, (model_id, file_id, file_type))
+    return urls
+
+async def _load_manifest_async(model_id_str: str, debug: bool = False):
+    async def load():
+        data = await get_async_client().post_graphql(_build_model_files_payload(model_id_str))
+        with printables_metrics.stage("process"):
+            return _collect_supported_files(data, debug)
+    return await _cached_call_async("manifest", model_id_str, load, lambda value: value is not None)
+
+@printables_metrics.tracked()
+async def get_model_manifest_async(model_id_str: str, debug: bool = False, raise_errors: bool = False):
+    """
+    Async version of get_model_manifest.
+    """
+    try:
+        pending = await _load_manifest_async(model_id_str, debug)
+        if pending is not None:
+            return _manifest_entries(pending)
+    except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
+        logger.warning(f"Request failed fetching file list for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+@printables_metrics.tracked()
+async def get_model_files_async(model_id_str: str, debug: bool = False, max_workers: int = DEFAULT_LINK_WORKERS,
+                                batch_size: int = DEFAULT_LINK_BATCH_SIZE, raise_errors: bool = False):
+    """
+    Async version of get_model_files. Link batches are gathered with at most max_workers in flight.
+
+    With raise_errors, request failures are raised instead of returning an empty list,
+    which would look like a model without files.
+    """
+    try:
+        pending = await _load_manifest_async(model_id_str, debug)
+        # Links are minted either way, so a cached manifest does not make this a cache hit
+        printables_metrics.set_outcome("ok")
+        if pending is not None:
+            semaphore = asyncio.Semaphore(max(1, max_workers))
+
+            async def resolve(batch):
+                async with semaphore:
+                    if debug:
+                        print(f"    -> Fetching download links for: {', '.join(str(f.get('name')) for f, _ in batch)}")
+                    urls = await get_real_download_urls_async(
+                        [(file_item.get('id'), api_type) for file_item, api_type in batch],
+                        model_id_str, batch_size, debug
+                    )
+                return _file_entries(batch, urls)
+
+            resolved = await asyncio.gather(*(resolve(batch) for batch in _split_batches(pending, batch_size)))
+            return [entry for batch in resolved for entry in batch]
+    except requests.exceptions.RequestException as e:
+        if raise_errors:
+            raise
+        logger.warning(f"Request failed fetching file list for model {model_id_str}: {e}")
+    printables_metrics.set_outcome("error")
+    return []
+
+async def get_model_description_async(model_url: str, debug: bool = False, parser: str = None):
+    """
+    Async version of get_model_description. The cloudscraper fetch runs on the bounded blocking pool.
+    """
+    return await run_blocking(get_model_description, model_url, debug, parser)
+
+class ModelFetchError(requests.exceptions.RequestException):
+    """
+    Raised by build_model_record when the description page of a model could not be fetched.
+    """
+
+
+def build_model_record(model: dict, debug: bool = False):
+    """
+    Fetches the description and files for one search result and builds its output record.
+    
+    Raises requests.exceptions.RequestException (ModelFetchError for the description)
+    instead of building a record around a failed fetch, so callers do not store it
+    as if the model had been synced.
+    
+    Returns:
+        The ModelDetails record, or None if the search result has no ID
+    """
+    model_id_str = model.get('id')
+    if not model_id_str:
+        return None
+    
+    model_url = f"https://www.printables.com/model/{model_id_str}-{model.get('slug')}"
+    description = get_model_description(model_url, debug)
+    if description.startswith("Error:"):
+        raise ModelFetchError(f"Model {model_id_str}: {description}")
+    files = get_model_files(model_id_str, debug, raise_errors=True)
+    return ModelDetails.from_api(model, description, files)
+
+def read_pipeline_progress(output_path: str) -> set:
+    """
+    Returns the IDs of the models already written to a JSONL output file.
+    
+    A trailing partial line (left by an interrupted run) is cut off so new records
+    can be appended cleanly. Records with an "Error: ..." description (written by
+    versions that stored failed fetches) do not count, so resuming fetches them again.
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'rb+') as f:
+        content = f.read()
+        complete = content[:content.rfind(b'\n') + 1]
+        if len(complete) != len(content):
+            f.truncate(len(complete))
+    for line in complete.decode('utf-8').splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if record.get('id') and not str(record.get('description') or "").startswith("Error:"):
+            done.add(record['id'])
+    return done
+
+def run_pipeline(models: list, output_path: str, workers: int = 4, rate: float = 1.0,
+                 resume: bool = False, debug: bool = False, on_record=None, append: bool = False) -> int:
+    """
+    Fetches descriptions and file lists for several models concurrently and streams
+    each finished model to a JSONL file as soon as it completes.
+    
+    Args:
+        models: Search results (as returned by search_models)
+        output_path: JSONL file to write, one record per line
+        workers: Number of models processed at the same time
+        rate: Maximum number of models started per second, across all workers
+        resume: Skip models already present in output_path and append to it
+        debug: Enable debug output
+        on_record: Optional callable(model_id, record) run on the calling thread for each written record
+        append: Append to output_path instead of overwriting it, without skipping models already in it
+    
+    Returns:
+        Number of records written by this run
+    """
+    done = read_pipeline_progress(output_path) if resume else set()
+    todo = [model for model in models if model.get('id') and model.get('id') not in done]
+    if debug and done:
+        print(f"Resuming: {len(done)} models already in {output_path}, {len(todo)} left")
+
+    limiter = RateLimiter(rate=rate, burst=max(1, workers))
+
+    def process(model):
+        limiter.acquire()
+        if debug:
+            print(f"Processing: {model.get('name')} ({model.get('id')})")
+        return model['id'], build_model_record(model, debug)
+
+    written = 0
+    remaining = iter(todo)
+    # Only a few models are queued ahead of the workers, so Ctrl-C or a failing
+    # on_record waits for the models in flight rather than for the whole list.
+    window = 2 * max(1, workers)
+    pending = set()
+    with open(output_path, 'a' if resume or append else 'w', encoding='utf-8') as f, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        try:
+            while True:
+                for model in itertools.islice(remaining, window - len(pending)):
+                    pending.add(executor.submit(process, model))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    try:
+                        model_id_str, record = future.result()
+                    except Exception as e:
+                        print(f"Failed to process model: {e}")
+                        continue
+                    f.write(dumps(record) + "\n")
+                    f.flush()
+                    written += 1
+                    if on_record is not None:
+                        on_record(model_id_str, record)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    return written
+
+def main(argv: list = None):
+    """
+    Command-line entry point.
+
+    Runs against the importable printables_api module even when this file is executed
+    as a script, so the settings it configures (description parser, parse pool,
+    persistent cache) are the ones printables_sync and printables_index see as well.
+    """
+    global DEFAULT_DESCRIPTION_PARSER
     parser = argparse.ArgumentParser(description="Search Printables.com and fetch model data.")
     parser.add_argument("search_term", type=str, help="The term to search for.")
-    parser.add_argument("-l", "--limit", type=int, default=5, help="Number of results to fetch (default: 5).")
+    parser.add_argument("-l", "--limit", type=int, default=None,
+                       help="Number of results to fetch (default: 5; in sync mode, no limit).")
     parser.add_argument("-o", "--ordering", type=str, default="best_match", 
                        choices=["best_match", "popular", "latest", "rating", "makes_count"],
                        help="Search ordering (default: best_match).")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug output for detailed logging.")
-    args = parser.parse_args()
+    parser.add_argument("--cache", type=str, default=None,
+                       help="Path of an on-disk cache file for search results, file manifests and descriptions.")
+    parser.add_argument("--parser", type=str, default=DEFAULT_DESCRIPTION_PARSER, choices=sorted(DESCRIPTION_PARSERS),
+                       help=f"Description extraction backend (default: {DEFAULT_DESCRIPTION_PARSER}).")
+    parser.add_argument("--parse-workers", type=int, default=0,
+                       help="Worker processes that parse description pages (default: 0, parse on the fetching threads).")
+    parser.add_argument("--jsonl", type=str, default=None,
+                       help="Pipeline mode: process models concurrently and stream each one to this JSONL file as it completes.")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Models processed at the same time in pipeline mode (default: 4).")
+    parser.add_argument("--rate", type=float, default=1.0, help="Maximum models started per second in pipeline mode (default: 1).")
+    parser.add_argument("--resume", action="store_true", help="Pipeline mode: skip models already in the JSONL file and append to it.")
+    parser.add_argument("--compact", action="store_true", help="Write the JSON results file without indentation.")
+    parser.add_argument("--index", type=str, default=None,
+                       help="Also add every fetched model to this local full-text index (see printables_index.py).")
+    parser.add_argument("--sync", type=str, default=None, metavar="STATE",
+                       help="Sync mode (with --jsonl): append only models published or changed since the last run, "
+                            "remembered in this state file. --limit caps the number of new models per run.")
+    args = parser.parse_args(argv)
 
-    search_results = search_models(args.search_term, args.limit, args.ordering, args.debug)
+    DEFAULT_DESCRIPTION_PARSER = args.parser
+    if args.parse_workers:
+        configure_parse_pool(args.parse_workers)
+    if args.cache:
+        configure_persistent_cache(args.cache)
+    model_index = None
+    if args.index:
+        from printables_index import ModelIndex
+        model_index = ModelIndex(args.index)
+
+    if args.sync:
+        if not args.jsonl:
+            parser.error("--sync requires --jsonl")
+        from printables_sync import sync_query
+        try:
+            summary = sync_query(args.search_term, args.jsonl, args.sync, max_items=args.limit, workers=args.workers,
+                                 rate=args.rate, debug=args.debug,
+                                 on_record=model_index.add_record if model_index else None)
+        except requests.exceptions.RequestException as e:
+            print(f"Sync failed, state left unchanged: {e}")
+            exit(1)
+        print(f"\nDone! {summary['written']} new or changed models appended to {args.jsonl} "
+              f"({summary['unchanged']} unchanged, {summary['failed']} failed)")
+        if not summary['complete']:
+            print("Stopped before reaching the previous sync; run again to fetch the remaining models.")
+        return
+
+    search_results = search_models(args.search_term, 5 if args.limit is None else args.limit, args.ordering, args.debug)
     
     if not search_results:
         print("No models found. Exiting.")
-        exit()
+        return
 
-    all_models_data = {}
     if args.debug:
         print(f"\nFound {len(search_results)} models. Fetching details for each...")
 
+    if args.jsonl:
+        written = run_pipeline(search_results, args.jsonl, args.workers, args.rate, args.resume, args.debug,
+                               on_record=model_index.add_record if model_index else None)
+        print(f"\nDone! {written} models streamed to {args.jsonl}")
+        return
+
+    all_models_data = {}
     for i, model in enumerate(search_results):
         model_id_str = model.get('id')
         if not model_id_str: continue
         
-        model_slug = model.get('slug')
-        model_url = f"https://www.printables.com/model/{model_id_str}-{model_slug}"
-        
         if args.debug:
-            print(f"({i+1}/{len(search_results)}) Processing: {model.get('name')} ({model_url})")
+            print(f"({i+1}/{len(search_results)}) Processing: {model.get('name')} ({model_id_str})")
         
-        main_image_url = None
-        if (image_info := model.get('image')) and image_info.get('filePath'):
-            main_image_url = "https://media.printables.com/" + image_info['filePath']
-            
-        description = get_model_description(model_url, args.debug)
-        files = get_model_files(model_id_str, args.debug)
-        
-        all_models_data[model_id_str] = {
-            "name": model.get('name'),
-            "url": model_url,
-            "main_image_url": main_image_url,
-            "author": model.get('user', {}).get('publicUsername'),
-            "stats": {
-                "likes": model.get('likesCount'),
-                "downloads": model.get('downloadCount'),
-                "rating": model.get('ratingAvg'),
-                "published_date": model.get('datePublished')
-            },
-            "description": description,
-            "files": files,
-        }
-        time.sleep(1)
+        try:
+            all_models_data[model_id_str] = build_model_record(model, args.debug)
+        except requests.exceptions.RequestException as e:
+            print(f"Failed to process model: {e}")
+            continue
+        if model_index:
+            model_index.add_record(model_id_str, all_models_data[model_id_str])
 
     output_filename = f"{args.search_term.replace(' ', '_')}_results.json"
     with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(all_models_data, f, ensure_ascii=False, indent=4)
+        f.write(dumps(all_models_data, indent=not args.compact))
         
     print(f"\nDone! All data saved to {output_filename}")
+
+
+if __name__ == "__main__":
+    import printables_api
+    printables_api.main()
@@ -0,0 +1,212 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_TTLS = {
+    "search": 15 * 60,
+    "summary": 60 * 60,
+    "manifest": 6 * 60 * 60,
+    "description": 7 * 24 * 60 * 60,
+}
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+# Hits record their access time in memory; the times are written in one batch once
+# this many are pending or this many seconds have passed (and before evicting)
+ACCESS_FLUSH_ENTRIES = 256
+ACCESS_FLUSH_SECONDS = 60
+
+
+class PersistentCache:
+    """
+    Single-file SQLite cache for search results, file manifests and descriptions.
+
+    Every entry belongs to a namespace ("search", "manifest", "description", ...)
+    with its own lifetime. Entries older than their lifetime can still be served as
+    stale for stale_while_revalidate seconds while the caller refreshes them. When
+    the stored values exceed max_bytes, the least recently used entries are evicted.
+    Lookups only read the database: access times are batched (see ACCESS_FLUSH_ENTRIES),
+    so a hit does not cost a write and commit.
+
+    Args:
+        path: Path of the SQLite database file (created if missing), or ":memory:" for a cache
+              that only lives as long as the process
+        ttls: Lifetime in seconds per namespace, merged over DEFAULT_TTLS
+        max_bytes: Maximum total size of the stored values
+        stale_while_revalidate: Seconds past expiry during which an entry is served as stale (0 disables)
+    """
+    def __init__(self, path: str, ttls: dict = None, max_bytes: int = 64 * 1024 * 1024,
+                 stale_while_revalidate: float = 0):
+        self.path = path
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_bytes = max_bytes
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._accessed = {}
+        self._accessed_flushed = time.time()
+        self._closed = False
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self._conn.commit()
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def lookup(self, namespace: str, key: str):
+        """
+        Returns (value, state) where state is FRESH, STALE or MISS (value is None on a miss).
+        """
+        now = time.time()
+        ttl = self.ttls.get(namespace, 0)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, MISS
+            value, created = row
+            age = now - created
+            if age <= ttl:
+                state = FRESH
+                self.hits += 1
+            elif age <= ttl + self.stale_while_revalidate:
+                state = STALE
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+                return None, MISS
+            self._accessed[(namespace, key)] = now
+            if len(self._accessed) >= ACCESS_FLUSH_ENTRIES or now - self._accessed_flushed >= ACCESS_FLUSH_SECONDS:
+                self._flush_accessed_locked()
+                self._conn.commit()
+        return json.loads(value), state
+
+    def _flush_accessed_locked(self):
+        if self._accessed:
+            self._conn.executemany(
+                "UPDATE entries SET accessed = ? WHERE namespace = ? AND key = ?",
+                [(accessed, namespace, key) for (namespace, key), accessed in self._accessed.items()]
+            )
+            self._accessed.clear()
+        self._accessed_flushed = time.time()
+
+    def contains(self, namespace: str, key: str) -> bool:
+        """
+        Tells whether a fresh entry exists, without counting a hit or miss or marking it as used.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttls.get(namespace, 0)
+
+    def get(self, namespace: str, key: str):
+        """
+        Returns the value if it is fresh, otherwise None.
+        """
+        value, state = self.lookup(namespace, key)
+        return value if state == FRESH else None
+
+    def set(self, namespace: str, key: str, value):
+        """
+        Stores a JSON-serializable value and evicts old entries if the cache grew past max_bytes.
+        """
+        encoded = json.dumps(value, ensure_ascii=False)
+        size = len(encoded.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, encoded, size, now, now)
+            )
+            self._accessed.pop((namespace, key), None)
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self):
+        if self._total_bytes > self.max_bytes:
+            self._flush_accessed_locked()
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                return
+            for namespace, key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    return
+                self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+                self._accessed.pop((namespace, key), None)
+                self._total_bytes -= row[0]
+                self._conn.commit()
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self._accessed.clear()
+            self._total_bytes = 0
+            self.hits = self.stale_hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        """
+        Returns entry count, stored bytes and hit/stale/miss/eviction counters.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush_accessed_locked()
+            self._conn.commit()
+            self._conn.close()
+            self._closed = True
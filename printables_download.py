@@ -0,0 +1,345 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import printables_api
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_DOWNLOAD_WORKERS = 4
+# Files at least this large are fetched as several ranges in parallel, when the server allows it
+DEFAULT_SPLIT_THRESHOLD = 64 * 1024 * 1024
+DEFAULT_SPLIT_PARTS = 4
+# Responses meaning the temporary link is no longer valid and has to be minted again
+EXPIRED_LINK_STATUS_CODES = (401, 403, 404, 410)
+# Models downloaded at the same time by download_model_files_async
+DEFAULT_CONCURRENT_DOWNLOADS = 2
+
+_session = None
+_session_lock = threading.Lock()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class LinkExpiredError(requests.exceptions.HTTPError):
+    """
+    Raised when the file host refuses a temporary download link.
+    """
+
+
+def get_download_session() -> requests.Session:
+    """
+    Returns the shared session used for file transfers (separate from the GraphQL client).
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(printables_api.DEFAULT_HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DEFAULT_DOWNLOAD_WORKERS * DEFAULT_SPLIT_PARTS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+
+def close_download_session():
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        session.close()
+
+
+def configure_download_executor(max_workers: int = DEFAULT_CONCURRENT_DOWNLOADS):
+    """
+    Sets how many models download_model_files_async downloads at the same time.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="printables-download")
+
+
+def safe_filename(name: str, fallback: str) -> str:
+    """
+    Turns a file name from the API into a name that stays inside the target directory.
+    """
+    name = os.path.basename(str(name or "").replace("\\", "/"))
+    name = re.sub(r'[<>:"|?*\x00-\x1f]', "_", name).strip(" .")
+    return name or fallback
+
+
+def _open_stream(url: str, start: int, end: int = None, timeout: float = 30):
+    """
+    GETs url from byte start (to end, inclusive) and returns the streaming response.
+    """
+    headers = {}
+    if start or end is not None:
+        headers["Range"] = f"bytes={start}-" + ("" if end is None else str(end))
+    guard = printables_api.get_upstream_guard(url)
+    trial = guard.before_request()
+    try:
+        try:
+            response = get_download_session().get(url, headers=headers, stream=True,
+                                                  timeout=printables_api.budget_timeout(timeout))
+        except requests.exceptions.RequestException as e:
+            error = printables_api.blame_deadline(e)
+            guard.record_error(error)
+            if error is not e:
+                raise error
+            raise
+        if response.status_code in EXPIRED_LINK_STATUS_CODES:
+            response.close()
+            raise LinkExpiredError(f"Download link refused (HTTP {response.status_code})", response=response)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            response.close()
+            guard.record_error(e)
+            raise
+        guard.record_success()
+        return response
+    finally:
+        # An expired link or a 4xx settles nothing about the host's health
+        if trial:
+            guard.record_neutral()
+
+
+def _fetch_range(url: str, path: str, start: int, end: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Streams bytes start..end of url into path, resuming from what path already holds.
+
+    Returns:
+        The number of bytes in path afterwards
+    """
+    have = os.path.getsize(path) if os.path.exists(path) else 0
+    if end is not None and have >= end - start + 1:
+        return have
+    try:
+        response = _open_stream(url, start + have, end)
+    except requests.exceptions.HTTPError as e:
+        # 416: nothing left past what we already have
+        if have and getattr(e.response, 'status_code', None) == 416:
+            return have
+        raise
+    with response:
+        if response.status_code != 206 and (start or end is not None):
+            raise requests.exceptions.HTTPError("Server does not support range requests")
+        # A server ignoring the Range header of a resume sends the whole file again: start over
+        mode = "ab" if have and response.status_code == 206 else "wb"
+        with open(path, mode) as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    f.write(chunk)
+                    # Past the deadline, stop here; the next call resumes from what was written
+                    printables_api.check_deadline()
+    return os.path.getsize(path)
+
+
+def _supports_ranges(url: str) -> bool:
+    try:
+        with _open_stream(url, 0, 0) as response:
+            return response.status_code == 206
+    except requests.exceptions.RequestException:
+        return False
+
+
+def _download_split(url: str, part_path: str, size: int, parts: int, chunk_size: int):
+    """
+    Downloads size bytes as parts parallel ranges into sidecar files, then joins them into part_path.
+    """
+    step = -(-size // parts)
+    ranges = [(index, start, min(start + step, size) - 1) for index, start in enumerate(range(0, size, step))]
+    with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="printables-range") as executor:
+        futures = [executor.submit(printables_api.bind_deadline(_fetch_range), url, f"{part_path}{index}", start, end, chunk_size)
+                   for index, start, end in ranges]
+        for future in futures:
+            future.result()
+    with open(part_path, "wb") as out:
+        for index, _, _ in ranges:
+            with open(f"{part_path}{index}", "rb") as piece:
+                shutil.copyfileobj(piece, out, chunk_size)
+    for index, _, _ in ranges:
+        os.remove(f"{part_path}{index}")
+
+
+def download_file(resolve_url, path: str, expected_size: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  split_threshold: int = DEFAULT_SPLIT_THRESHOLD, split_parts: int = DEFAULT_SPLIT_PARTS,
+                  max_link_refreshes: int = 2, debug: bool = False) -> int:
+    """
+    Streams one file to disk in chunk_size pieces, so memory use does not grow with the file.
+
+    Data is written to path + ".part" and renamed once complete, so an interrupted
+    download resumes with a Range request on the next call. Files of at least
+    split_threshold bytes are fetched as split_parts parallel ranges when the
+    server supports them.
+
+    Args:
+        resolve_url: Callable returning the download URL; called with refresh=True to mint a new one after the link expired
+        path: Destination file path
+        expected_size: Size in bytes the file must have (None skips the check)
+        chunk_size: Bytes read and written per step
+        split_threshold: Minimum size for a split download
+        split_parts: Number of parallel ranges of a split download
+        max_link_refreshes: How often an expired link is re-minted before giving up
+        debug: Enable debug output
+
+    Returns:
+        The size of the downloaded file
+
+    Raises:
+        requests.exceptions.RequestException on network errors, or ValueError if the size does not match
+    """
+    part_path = path + ".part"
+    url = resolve_url(refresh=False)
+    for attempt in range(max_link_refreshes + 1):
+        if not url:
+            raise requests.exceptions.RequestException(f"No download link for {os.path.basename(path)}")
+        try:
+            have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            if expected_size and have >= expected_size:
+                break
+            split = (expected_size and expected_size >= split_threshold and split_parts > 1
+                     and not have and _supports_ranges(url))
+            if split:
+                if debug:
+                    print(f"    -> Downloading {os.path.basename(path)} in {split_parts} ranges")
+                _download_split(url, part_path, expected_size, split_parts, chunk_size)
+            else:
+                if debug:
+                    print(f"    -> Downloading {os.path.basename(path)}" + (f" (resuming at {have} bytes)" if have else ""))
+                _fetch_range(url, part_path, 0, None, chunk_size)
+            break
+        except LinkExpiredError:
+            if attempt == max_link_refreshes:
+                raise
+            if debug:
+                print(f"    -> Link for {os.path.basename(path)} expired, minting a new one")
+            url = resolve_url(refresh=True)
+
+    size = os.path.getsize(part_path)
+    if expected_size is not None and size != expected_size:
+        os.remove(part_path)
+        raise ValueError(f"Size mismatch for {os.path.basename(path)}: expected {expected_size} bytes, got {size}")
+    os.replace(part_path, path)
+    return size
+
+
+def _link_resolver(model_id: str, file_id: str, file_type: str, debug: bool = False):
+    def resolve(refresh: bool = False):
+        if refresh:
+            printables_api.download_link_cache.invalidate((model_id, file_id, file_type))
+        return printables_api.get_real_download_url(file_id, model_id, file_type, debug)
+    return resolve
+
+
+def download_model_files(model_id_str: str, target_dir: str, files: list = None, file_types: list = None,
+                         max_workers: int = DEFAULT_DOWNLOAD_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         split_threshold: int = DEFAULT_SPLIT_THRESHOLD, debug: bool = False) -> list:
+    """
+    Downloads the files of a model into target_dir, several at a time.
+
+    Links are minted only for files that still need downloading; files already
+    present with the expected size are skipped, and partial files are resumed.
+    Files not finished by the current deadline are reported as errors and resume
+    on the next call.
+
+    Args:
+        model_id_str: The numeric ID of the model
+        target_dir: Directory the files are written to (created if missing)
+        files: File entries to download (as returned by get_model_manifest); None downloads the whole
+               manifest, raising the request error if it cannot be fetched
+        file_types: Only download these types, e.g. ["stl"] (None downloads all)
+        max_workers: Number of files downloaded at the same time
+        chunk_size: Bytes read and written per step
+        split_threshold: Minimum size for fetching one file as parallel ranges
+        debug: Enable debug output
+
+    Returns:
+        One dictionary per file with file_id, name, path, size_bytes and status
+        ("downloaded", "skipped" or "error", with an "error" message)
+    """
+    if files is None:
+        files = printables_api.get_model_manifest(model_id_str, debug, raise_errors=True)
+    if file_types:
+        files = [f for f in files if f.get('file_type') in file_types]
+    os.makedirs(target_dir, exist_ok=True)
+
+    used_names = set()
+    jobs = []
+    for entry in files:
+        name = safe_filename(entry.get('name'), f"{entry.get('file_id')}.{entry.get('file_type')}")
+        base, ext = os.path.splitext(name)
+        counter = 1
+        while name.lower() in used_names:
+            name = f"{base} ({counter}){ext}"
+            counter += 1
+        used_names.add(name.lower())
+        jobs.append((entry, os.path.join(target_dir, name)))
+
+    def run(job):
+        entry, path = job
+        result = {"file_id": entry.get('file_id'), "name": entry.get('name'), "path": path,
+                  "size_bytes": entry.get('size_bytes')}
+        expected = entry.get('size_bytes')
+        if os.path.exists(path) and (expected is None or os.path.getsize(path) == expected):
+            return {**result, "status": "skipped"}
+        try:
+            resolver = _link_resolver(model_id_str, entry.get('file_id'), entry.get('file_type'), debug)
+            size = download_file(resolver, path, expected, chunk_size, split_threshold, debug=debug)
+            return {**result, "size_bytes": size, "status": "downloaded"}
+        except (requests.exceptions.RequestException, OSError, ValueError) as e:
+            if debug:
+                print(f"    -> Download failed for {entry.get('name')}: {e}")
+            return {**result, "status": "error", "error": str(e)}
+
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [run(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)), thread_name_prefix="printables-download") as executor:
+        return list(executor.map(printables_api.bind_deadline(run), jobs))
+
+async def download_model_files_async(model_id_str: str, target_dir: str, files: list = None, file_types: list = None,
+                                     **kwargs) -> list:
+    """
+    Async version of download_model_files, under the caller's deadline.
+
+    Runs on a thread pool of its own rather than printables_api.run_blocking, so
+    downloads that take minutes do not hold the threads description fetches need.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=DEFAULT_CONCURRENT_DOWNLOADS, thread_name_prefix="printables-download")
+        executor = _executor
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(
+        printables_api.bind_deadline(download_model_files), model_id_str, target_dir, files, file_types, **kwargs
+    ))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download the files of a Printables model.")
+    parser.add_argument("model_id", help="The numeric ID of the model.")
+    parser.add_argument("target_dir", help="Directory to write the files to.")
+    parser.add_argument("-t", "--type", action="append", choices=["stl", "gcode"], help="Only download this file type (repeatable).")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_DOWNLOAD_WORKERS, help="Files downloaded at the same time.")
+    parser.add_argument("-d", "--debug", action="store_true", help="Enable verbose debug output.")
+    args = parser.parse_args()
+
+    try:
+        results = download_model_files(args.model_id, args.target_dir, file_types=args.type,
+                                       max_workers=args.workers, debug=args.debug)
+    except requests.exceptions.RequestException as e:
+        print(f"Could not fetch the file list of model {args.model_id}: {e}")
+        exit(1)
+    print(json.dumps(results, ensure_ascii=False, indent=4))
@@ -0,0 +1,248 @@
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+
+ORDERINGS = {
+    "best_match": "rank, m.downloads DESC",
+    "popular": "m.downloads DESC, m.likes DESC",
+    "latest": "m.published DESC",
+    "rating": "m.rating DESC, m.likes DESC",
+    "makes_count": "m.makes DESC, m.downloads DESC",
+}
+
+_FIELDS = ("name", "slug", "url", "author", "image_url", "rating", "likes", "downloads", "makes", "published",
+           "description", "file_names")
+
+
+def _match_expression(query: str) -> str:
+    """
+    Turns free text into an FTS5 query matching every word as a prefix, ignoring FTS syntax characters.
+    """
+    words = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class ModelIndex:
+    """
+    Local SQLite FTS5 index of models for offline search.
+
+    Models are indexed by name, author, description and file names, with their
+    stats stored alongside so results can be ordered like search_models. Fields
+    can be filled in over time (e.g. a search result first, its description
+    later); missing fields never overwrite known ones.
+
+    Args:
+        path: Path of the SQLite database file (created if missing)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS models ("
+            " id TEXT PRIMARY KEY, name TEXT, slug TEXT, url TEXT, author TEXT, image_url TEXT,"
+            " rating REAL, likes INTEGER, downloads INTEGER, makes INTEGER, published TEXT,"
+            " description TEXT, file_names TEXT, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS models_fts USING fts5("
+            " name, author, description, file_names, content='models', tokenize='unicode61 remove_diacritics 2')"
+        )
+        self._conn.commit()
+
+    def upsert(self, model_id: str, **fields):
+        """
+        Adds or updates one model; fields left out or None keep their stored value.
+
+        Args:
+            model_id: The numeric ID of the model
+            **fields: Any of name, slug, url, author, image_url, rating, likes, downloads,
+                      makes, published, description, file_names (list or string)
+        """
+        unknown = set(fields) - set(_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown index fields: {', '.join(sorted(unknown))}")
+        if isinstance(fields.get("file_names"), (list, tuple)):
+            fields["file_names"] = " ".join(str(name) for name in fields["file_names"] if name)
+        fields = {key: value for key, value in fields.items() if value is not None}
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT rowid, {', '.join(_FIELDS)} FROM models WHERE id = ?", (str(model_id),)
+            ).fetchone()
+            if row is not None:
+                rowid, previous = row[0], dict(zip(_FIELDS, row[1:]))
+                # External-content FTS tables need the old values to remove a row from the index
+                self._conn.execute(
+                    "INSERT INTO models_fts (models_fts, rowid, name, author, description, file_names)"
+                    " VALUES ('delete', ?, ?, ?, ?, ?)",
+                    (rowid, previous["name"], previous["author"], previous["description"], previous["file_names"])
+                )
+                merged = {**previous, **fields}
+                self._conn.execute(
+                    f"UPDATE models SET {', '.join(f'{key} = ?' for key in _FIELDS)}, updated = ? WHERE rowid = ?",
+                    (*(merged[key] for key in _FIELDS), time.time(), rowid)
+                )
+            else:
+                merged = {key: fields.get(key) for key in _FIELDS}
+                cursor = self._conn.execute(
+                    f"INSERT INTO models (id, {', '.join(_FIELDS)}, updated) VALUES (?, {', '.join('?' for _ in _FIELDS)}, ?)",
+                    (str(model_id), *(merged[key] for key in _FIELDS), time.time())
+                )
+                rowid = cursor.lastrowid
+            self._conn.execute(
+                "INSERT INTO models_fts (rowid, name, author, description, file_names) VALUES (?, ?, ?, ?, ?)",
+                (rowid, merged["name"], merged["author"], merged["description"], merged["file_names"])
+            )
+            self._conn.commit()
+
+    def add_search_result(self, model: dict):
+        """
+        Indexes a model as returned by search_models or get_model_summary.
+        """
+        if not model or not model.get('id'):
+            return
+        image = (model.get('image') or {}).get('filePath')
+        self.upsert(
+            model['id'],
+            name=model.get('name'),
+            slug=model.get('slug'),
+            url=f"https://www.printables.com/model/{model['id']}-{model['slug']}" if model.get('slug') else None,
+            author=(model.get('user') or {}).get('publicUsername'),
+            image_url=f"https://media.printables.com/{image}" if image else None,
+            rating=model.get('ratingAvg'),
+            likes=model.get('likesCount'),
+            downloads=model.get('downloadCount'),
+            makes=model.get('makesCount'),
+            published=model.get('datePublished'),
+        )
+
+    def add_record(self, model_id: str, record: dict):
+        """
+        Indexes a model record as built by printables_api.build_model_record (or read back from its JSONL output).
+        """
+        if not record:
+            return
+        if not isinstance(record, dict):
+            record = record.to_dict()
+        stats = record.get('stats') or {}
+        description = record.get('description')
+        if description and (description.startswith("Error:") or description == "Description not found on this page."):
+            description = None
+        self.upsert(
+            model_id,
+            name=record.get('name'),
+            url=record.get('url'),
+            author=record.get('author'),
+            image_url=record.get('main_image_url'),
+            rating=stats.get('rating'),
+            likes=stats.get('likes'),
+            downloads=stats.get('downloads'),
+            makes=stats.get('makes'),
+            published=stats.get('published_date'),
+            description=description,
+            file_names=[f.get('name') for f in record.get('files') or []] or None,
+        )
+
+    def search(self, query: str = "", limit: int = 20, ordering: str = "best_match", offset: int = 0) -> list:
+        """
+        Searches the indexed models.
+
+        Args:
+            query: Words to look for in name, author, description and file names (prefix matches; empty lists everything)
+            limit: Maximum number of results
+            ordering: One of "best_match", "popular", "latest", "rating", "makes_count"
+            offset: Number of results to skip
+
+        Returns:
+            List of dictionaries with id, name, slug, url, author, image_url, stats and, for text queries, a snippet
+        """
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Invalid ordering '{ordering}'. Must be one of: {', '.join(ORDERINGS)}")
+        order = ORDERINGS[ordering]
+        columns = "m.id, m.name, m.slug, m.url, m.author, m.image_url, m.rating, m.likes, m.downloads, m.makes, m.published"
+        expression = _match_expression(query)
+        with self._lock:
+            if expression:
+                rows = self._conn.execute(
+                    f"SELECT {columns}, snippet(models_fts, -1, '**', '**', '...', 12), bm25(models_fts, 10.0, 3.0, 1.0, 2.0) AS rank"
+                    f" FROM models_fts JOIN models m ON m.rowid = models_fts.rowid"
+                    f" WHERE models_fts MATCH ? ORDER BY {order}"
+                    f" LIMIT ? OFFSET ?",
+                    (expression, limit, offset)
+                ).fetchall()
+            else:
+                # Without words to rank by, best_match falls back to popularity
+                order = order.replace("rank, ", "")
+                rows = self._conn.execute(
+                    f"SELECT {columns}, NULL, 0 AS rank FROM models m ORDER BY {order} LIMIT ? OFFSET ?",
+                    (limit, offset)
+                ).fetchall()
+        results = []
+        for row in rows:
+            result = {
+                "id": row[0], "name": row[1], "slug": row[2], "url": row[3], "author": row[4], "image_url": row[5],
+                "stats": {"rating": row[6], "likes": row[7], "downloads": row[8], "makes": row[9], "published": row[10]},
+            }
+            if row[11]:
+                result["snippet"] = row[11]
+            results.append(result)
+        return results
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM models").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def ingest_jsonl(index: ModelIndex, jsonl_path: str) -> int:
+    """
+    Indexes every record of a JSONL file written by printables_api's pipeline mode.
+
+    Returns:
+        Number of records indexed
+    """
+    indexed = 0
+    with open(jsonl_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Partial line left by an interrupted run
+            if record.get('id'):
+                index.add_record(record['id'], record)
+                indexed += 1
+    return indexed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local full-text index of Printables models.")
+    parser.add_argument("index", help="Path of the index database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    ingest_parser = subparsers.add_parser("ingest", help="Index the records of JSONL files written with printables_api.py --jsonl.")
+    ingest_parser.add_argument("jsonl", nargs="+", help="JSONL files to index.")
+    search_parser = subparsers.add_parser("search", help="Search the index.")
+    search_parser.add_argument("query", nargs="?", default="", help="Words to look for.")
+    search_parser.add_argument("-l", "--limit", type=int, default=10, help="Number of results (default: 10).")
+    search_parser.add_argument("-o", "--ordering", default="best_match", choices=list(ORDERINGS), help="Result ordering (default: best_match).")
+    args = parser.parse_args()
+
+    model_index = ModelIndex(args.index)
+    if args.command == "ingest":
+        for path in args.jsonl:
+            print(f"Indexed {ingest_jsonl(model_index, path)} models from {path}")
+        print(f"{model_index.count()} models in {args.index}")
+    else:
+        print(json.dumps(model_index.search(args.query, args.limit, args.ordering), ensure_ascii=False, indent=4))
+    model_index.close()
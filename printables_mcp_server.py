@@ -0,0 +1,919 @@
+import sys
+import os
+import argparse
+import asyncio
+import base64
+import functools
+import json
+import logging
+import math
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from mcp.server.fastmcp import FastMCP
+import printables_api
+import printables_download
+import printables_index
+import printables_metrics
+from printables_records import dumps, summary_dict
+
+# Configure logging to stderr (NEVER use stdout as it will corrupt MCP JSON-RPC messages)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.StreamHandler(sys.stderr)]
+)
+logger = logging.getLogger("printables-mcp")
+
+# Shared upstream HTTP client, configurable through environment variables
+printables_api.configure_client(
+    pool_size=int(os.environ.get("PRINTABLES_POOL_SIZE", "10")),
+    http2=os.environ.get("PRINTABLES_HTTP2", "").lower() in ("1", "true", "yes"),
+    timeout=float(os.environ.get("PRINTABLES_TIMEOUT", "15")),
+    api_url=os.environ.get("PRINTABLES_API_URL", printables_api.API_URL),
+)
+LINK_WORKERS = int(os.environ.get("PRINTABLES_LINK_WORKERS", str(printables_api.DEFAULT_LINK_WORKERS)))
+LINK_BATCH_SIZE = int(os.environ.get("PRINTABLES_LINK_BATCH_SIZE", str(printables_api.DEFAULT_LINK_BATCH_SIZE)))
+if os.environ.get("PRINTABLES_LINK_RATE"):
+    _link_rate = float(os.environ["PRINTABLES_LINK_RATE"])
+    printables_api.download_link_limiter = printables_api.RateLimiter(rate=_link_rate, burst=max(1, int(_link_rate)))
+printables_api.download_link_cache.max_entries = int(os.environ.get("PRINTABLES_LINK_CACHE_SIZE", str(printables_api.download_link_cache.max_entries)))
+# Speculative fetches of manifests and descriptions for the top hits of each search (0 disables).
+# Their results are only kept in the persistent cache, so they need PRINTABLES_CACHE_PATH.
+PREFETCH_TOP = int(os.environ.get("PRINTABLES_PREFETCH_TOP", "0"))
+if PREFETCH_TOP > 0 and not os.environ.get("PRINTABLES_CACHE_PATH"):
+    logger.warning("PRINTABLES_PREFETCH_TOP requires PRINTABLES_CACHE_PATH; prefetching is disabled")
+    PREFETCH_TOP = 0
+# Optional on-disk cache shared across server restarts
+if os.environ.get("PRINTABLES_CACHE_PATH"):
+    printables_api.configure_persistent_cache(
+        os.environ["PRINTABLES_CACHE_PATH"],
+        ttls={
+            namespace: float(os.environ[f"PRINTABLES_CACHE_TTL_{namespace.upper()}"])
+            for namespace in ("search", "summary", "manifest", "description")
+            if os.environ.get(f"PRINTABLES_CACHE_TTL_{namespace.upper()}")
+        },
+        max_bytes=int(float(os.environ.get("PRINTABLES_CACHE_MAX_MB", "64")) * 1024 * 1024),
+        stale_while_revalidate=float(os.environ.get("PRINTABLES_CACHE_STALE_SECONDS", "0")),
+    )
+printables_api.DEFAULT_DESCRIPTION_PARSER = os.environ.get("PRINTABLES_DESCRIPTION_PARSER", printables_api.DEFAULT_DESCRIPTION_PARSER)
+# Blocking work (cloudscraper page fetches) runs on a bounded thread pool so tools stay concurrent
+if os.environ.get("PRINTABLES_PARSE_WORKERS"):
+    printables_api.configure_parse_pool(
+        int(os.environ["PRINTABLES_PARSE_WORKERS"]),
+        min_size=int(os.environ.get("PRINTABLES_PARSE_MIN_SIZE", str(printables_api.DEFAULT_PARSE_POOL_MIN_SIZE))),
+    )
+printables_api.configure_blocking_pool(int(os.environ.get("PRINTABLES_BLOCKING_WORKERS", str(printables_api.DEFAULT_BLOCKING_WORKERS))))
+printables_api.configure_scraper_pool(
+    size=int(os.environ.get("PRINTABLES_SCRAPER_POOL_SIZE", "4")),
+    max_uses=int(os.environ.get("PRINTABLES_SCRAPER_MAX_USES", "100")),
+)
+DOWNLOAD_DIR = os.path.expanduser(os.environ.get("PRINTABLES_DOWNLOAD_DIR", "printables_downloads"))
+DOWNLOAD_WORKERS = int(os.environ.get("PRINTABLES_DOWNLOAD_WORKERS", str(printables_download.DEFAULT_DOWNLOAD_WORKERS)))
+printables_download.configure_download_executor(
+    int(os.environ.get("PRINTABLES_CONCURRENT_DOWNLOADS", str(printables_download.DEFAULT_CONCURRENT_DOWNLOADS)))
+)
+# Optional local full-text index, filled with everything the tools fetch and queried by search_printables_local
+model_index = printables_index.ModelIndex(os.environ["PRINTABLES_INDEX_PATH"]) if os.environ.get("PRINTABLES_INDEX_PATH") else None
+# Total seconds a tool call may take unless the client passes deadline_seconds (0 or less: no deadline)
+TOOL_DEADLINE = float(os.environ.get("PRINTABLES_TOOL_DEADLINE", "30"))
+DOWNLOAD_DEADLINE = float(os.environ.get("PRINTABLES_DOWNLOAD_DEADLINE", "600"))
+DEADLINE_GRACE = 1.0
+# Upper bound on models fetched at the same time by get_printables_models_bulk
+BULK_CONCURRENCY = int(os.environ.get("PRINTABLES_BULK_CONCURRENCY", "4"))
+BULK_MAX_MODELS = 50
+BULK_INCLUDE_OPTIONS = ("files", "description", "stats")
+# Adaptive per-host pacing: rates halve on 429/503 and creep back up on success;
+# a host's circuit opens after repeated failures so tools fail fast instead of piling on
+_api_host = urlsplit(os.environ.get("PRINTABLES_API_URL", printables_api.API_URL)).hostname
+for _host, _prefix in ((_api_host, "PRINTABLES_API"), ("www.printables.com", "PRINTABLES_WEB")):
+    _limits = {
+        name: float(os.environ[f"{_prefix}_{name.upper()}"])
+        for name in ("rate", "min_rate", "max_rate")
+        if os.environ.get(f"{_prefix}_{name.upper()}")
+    }
+    printables_api.configure_upstream(
+        _host,
+        failure_threshold=int(os.environ.get("PRINTABLES_BREAKER_THRESHOLD", "5")),
+        reset_timeout=float(os.environ.get("PRINTABLES_BREAKER_RESET_SECONDS", "30")),
+        **_limits
+    )
+
+class UpstreamSlots:
+    """
+    Caps how many upstream calls run at the same time, across all connected clients.
+    
+    The semaphore is created on first use in the running event loop (and again if the
+    loop changes), so the cap can be configured at import time.
+    
+    Args:
+        limit: Maximum number of upstream calls in flight
+    """
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self._semaphore = None
+        self._loop = None
+        self.active = 0
+        self.waiting = 0
+        self.peak = 0
+
+    @asynccontextmanager
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore, self._loop = asyncio.Semaphore(self.limit), loop
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "active": self.active, "waiting": self.waiting, "peak": self.peak}
+
+# Shared by every client when serving over HTTP; coalesced calls take a single slot
+upstream_slots = UpstreamSlots(int(os.environ.get("PRINTABLES_MAX_UPSTREAM_CALLS", "16")))
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical upstream calls.
+    
+    While a call for a key is in flight, later calls with the same key wait for it
+    and share its result or exception instead of repeating the upstream work.
+    The shared call runs as its own task, so a cancelled caller does not cancel it
+    for the others. Each shared call holds one of the slots while it runs, and runs
+    under the deadline of the caller that started it. A caller only joins a call
+    whose deadline ends no more than DEADLINE_GRACE before its own; one with a
+    longer budget starts a call of its own (which later callers then join) rather
+    than getting a result cut short. Callers joining a call stop waiting when their
+    own deadline passes.
+    """
+    def __init__(self, slots: Optional[UpstreamSlots] = None):
+        self._inflight: Dict[Any, tuple] = {}
+        self.slots = slots
+        self.calls = 0
+        self.coalesced = 0
+
+    async def _run(self, func, *args, **kwargs):
+        if self.slots is None:
+            return await func(*args, **kwargs)
+        async with self.slots.acquire():
+            return await func(*args, **kwargs)
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Awaits func(*args, **kwargs), or the identical call already in flight for key.
+        """
+        self.calls += 1
+        budget = printables_api.current_deadline()
+        expires_at = math.inf if budget is None else budget.expires_at
+        task, task_expires_at = self._inflight.get(key, (None, None))
+        if task is None or task_expires_at + DEADLINE_GRACE < expires_at:
+            task = asyncio.ensure_future(self._run(func, *args, **kwargs))
+            self._inflight[key] = (task, expires_at)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        if budget is None:
+            return await asyncio.shield(task)
+        try:
+            # The grace lets a call cut short by the deadline still hand over its partial result
+            return await asyncio.wait_for(asyncio.shield(task), budget.remaining() + DEADLINE_GRACE)
+        except asyncio.TimeoutError:
+            raise printables_api.DeadlineExceeded(f"Deadline of {budget.seconds:g}s reached")
+
+    def _forget(self, key, task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns how many calls were made, how many joined an in-flight call, and how many are running.
+        """
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+singleflight = SingleFlight(upstream_slots)
+
+class Prefetcher:
+    """
+    Fetches file manifests and descriptions of top search hits in the background, so
+    the get_printables_files / get_printables_description calls that usually follow
+    are answered from the cache.
+    
+    Prefetches are low priority: they run one at a time on their own rate budget,
+    go through singleflight (so a foreground call for the same item joins them
+    instead of repeating the work), and only start while at most half of the upstream
+    slots are busy and no foreground call is waiting. A job that could not start
+    within max_lag seconds of its search is dropped, as is the oldest job when
+    more than max_queue are pending. Download links are never minted
+    speculatively; only the manifest they are minted from is prefetched.
+    
+    Args:
+        top: Number of hits per search to prefetch
+        rate: Prefetch requests per second
+        max_lag: Seconds after which a pending prefetch is dropped
+        max_queue: Maximum number of pending prefetches
+    """
+    def __init__(self, top: int, rate: float = 0.5, max_lag: float = 30.0, max_queue: int = 50):
+        self.top = top
+        self.limiter = printables_api.RateLimiter(rate, burst=1)
+        self.max_lag = max_lag
+        self.max_queue = max_queue
+        self._pending = deque()
+        self._keys = set()
+        self._task = None
+        self.scheduled = 0
+        self.fetched = 0
+        self.cached = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def schedule(self, models: List[Dict[str, Any]]):
+        """
+        Queues the manifest and description of the first top models (formatted search results).
+        Does nothing without a persistent cache, which is the only place prefetched data is kept.
+        """
+        if printables_api.get_persistent_cache() is None:
+            return
+        for model in models[:self.top]:
+            if model.get("id"):
+                # Same call as the tools make, so one joining this prefetch still sees a failure as an error
+                self._enqueue(("manifest", str(model["id"])),
+                              functools.partial(printables_api.get_model_manifest_async, raise_errors=True),
+                              str(model["id"]))
+            if model.get("url"):
+                self._enqueue(("description", normalize_model_url(model["url"])),
+                              printables_api.get_model_description_async, model["url"])
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.ensure_future(self._run())
+
+    def _enqueue(self, key, func, arg):
+        if key in self._keys:
+            return
+        if len(self._pending) >= self.max_queue:
+            self._keys.discard(self._pending.popleft()[0])
+            self.dropped += 1
+        self._pending.append((key, func, arg, time.monotonic()))
+        self._keys.add(key)
+        self.scheduled += 1
+
+    def _is_stale(self, queued: float) -> bool:
+        return time.monotonic() - queued > self.max_lag
+
+    async def _run(self):
+        # Started from a search call, but prefetches are not bound by its deadline
+        printables_api.detach_deadline()
+        while self._pending:
+            key, func, arg, queued = self._pending.popleft()
+            self._keys.discard(key)
+            cache = printables_api.get_persistent_cache()
+            if cache is not None and cache.contains(key[0], arg):
+                self.cached += 1
+                continue
+            await self.limiter.acquire_async()
+            while not self._is_stale(queued) and (
+                    upstream_slots.waiting or upstream_slots.active * 2 >= upstream_slots.limit):
+                await asyncio.sleep(0.05)
+            if self._is_stale(queued):
+                self.dropped += 1
+                continue
+            try:
+                result = await singleflight.do(key, func, arg)
+                failed = not result or (isinstance(result, str) and result.startswith("Error:"))
+            except Exception as e:
+                logger.debug(f"Prefetch of {key} failed: {e}")
+                failed = True
+            if failed:
+                self.failed += 1
+            else:
+                self.fetched += 1
+
+    def cancel(self):
+        """
+        Drops the queued prefetches and stops the one running.
+        """
+        self.dropped += len(self._pending)
+        self._pending.clear()
+        self._keys.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def idle(self):
+        """
+        Waits until every queued prefetch has run or been dropped.
+        """
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def stats(self) -> Dict[str, int]:
+        return {"top": self.top, "pending": len(self._pending), "scheduled": self.scheduled, "fetched": self.fetched,
+                "cached": self.cached, "dropped": self.dropped, "failed": self.failed}
+
+prefetcher = Prefetcher(
+    PREFETCH_TOP,
+    rate=float(os.environ.get("PRINTABLES_PREFETCH_RATE", "0.5")),
+    max_lag=float(os.environ.get("PRINTABLES_PREFETCH_MAX_LAG", "30")),
+)
+
+def normalize_model_url(model_url: str) -> str:
+    """
+    Normalizes a model URL for request coalescing (whitespace, host case, fragment, trailing slash).
+    """
+    parts = urlsplit(model_url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+# Initialize FastMCP server
+mcp = FastMCP(
+    "printables-mcp",
+    instructions="Printables MCP Server - Access to Printables.com search, files, and descriptions",
+)
+
+def tool_deadline(seconds: Optional[float], default: Optional[float] = None):
+    """
+    Deadline for one tool call: the deadline_seconds the client asked for, or else the configured default.
+    """
+    if seconds is None:
+        seconds = TOOL_DEADLINE if default is None else default
+    return printables_api.deadline(seconds if seconds > 0 else None)
+
+def format_model(model: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Formats a search result from printables_api for MCP clients.
+    """
+    return summary_dict(model)
+
+def index_search_results(models: List[Dict[str, Any]]):
+    """
+    Adds fetched models to the local index, if one is configured. Indexing problems never fail a tool call.
+    """
+    if model_index is None:
+        return
+    try:
+        for model in models:
+            model_index.add_search_result(model)
+    except Exception as e:
+        logger.warning(f"Could not update local index: {e}")
+
+def index_model_fields(model_id: Optional[str], **fields):
+    """
+    Updates fields (e.g. description, file_names) of an indexed model, if an index is configured.
+    """
+    if model_index is None or not model_id:
+        return
+    try:
+        model_index.upsert(model_id, **fields)
+    except Exception as e:
+        logger.warning(f"Could not update local index: {e}")
+
+def model_id_from_url(model_url: str) -> Optional[str]:
+    match = re.search(r"/model/(\d+)", model_url)
+    return match.group(1) if match else None
+
+def encode_continuation_token(search_term: str, ordering: str, offset: int, seen_ids: List[str]) -> str:
+    """
+    Packs the paging state of search_printables_paged into an opaque token.
+    """
+    state = {"q": search_term, "o": ordering, "off": offset, "seen": seen_ids}
+    return base64.urlsafe_b64encode(dumps(state).encode("utf-8")).decode("ascii")
+
+def decode_continuation_token(token: str) -> Dict[str, Any]:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        if not isinstance(state, dict) or not isinstance(state.get("off"), int):
+            raise ValueError
+        return state
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid continuation_token")
+
+@mcp.tool()
+async def search_printables(search_term: str, limit: int = 5, ordering: str = "best_match",
+                            deadline_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Search Printables.com for 3D models.
+    
+    Args:
+        search_term: The search query (e.g. "benchy", "miniature", "vase")
+        limit: Maximum number of results to return (default: 5, max: 50)
+        ordering: Search ordering - one of: "best_match", "popular", "latest", "rating", "makes_count" (default: "best_match")
+        deadline_seconds: Seconds the search may take in total (default: 30)
+    
+    Returns:
+        List of model dictionaries containing id, name, slug, stats, user info, and image
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            # Validate limit
+            limit = max(1, min(limit, 50))
+        
+            logger.info(f"Searching Printables for '{search_term}' with limit {limit} and ordering {ordering}")
+            results = await singleflight.do(
+                ("search", search_term.strip(), limit, ordering, 0),
+                printables_api.search_models_async, search_term, limit, ordering
+            )
+        
+            if not results:
+                return []
+            index_search_results(results)
+        
+            # Format results for MCP
+            formatted_results = [format_model(model) for model in results]
+            if prefetcher.top > 0:
+                prefetcher.schedule(formatted_results)
+        
+            logger.info(f"Found {len(formatted_results)} models")
+            return formatted_results
+        
+    except Exception as e:
+        error_msg = f"Error searching Printables: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+@mcp.tool()
+async def search_printables_paged(search_term: str = "", ordering: str = "best_match", page_size: int = 20,
+                                  continuation_token: Optional[str] = None, deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Search Printables.com page by page, for result sets larger than search_printables returns.
+    
+    Args:
+        search_term: The search query (ignored when continuation_token is given)
+        ordering: Search ordering - one of: "best_match", "popular", "latest", "rating", "makes_count" (ignored when continuation_token is given)
+        page_size: Number of models per page (default: 20, max: 50)
+        continuation_token: Token returned by the previous call to fetch the next page
+        deadline_seconds: Seconds the page may take in total (default: 30)
+    
+    Returns:
+        Dictionary with "items" (models formatted like search_printables) and
+        "continuation_token" (pass it back to get the next page; null when there are no more results)
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            page_size = max(1, min(page_size, 50))
+            seen_ids = []
+            offset = 0
+            if continuation_token:
+                state = decode_continuation_token(continuation_token)
+                search_term, ordering, offset = state.get("q", ""), state.get("o", "best_match"), state["off"]
+                seen_ids = state.get("seen") or []
+
+            logger.info(f"Searching Printables for '{search_term}' (page_size {page_size}, offset {offset}, ordering {ordering})")
+            results = await singleflight.do(
+                ("search", search_term.strip(), page_size, ordering, offset),
+                printables_api.search_models_async, search_term, page_size, ordering, offset=offset
+            )
+
+            index_search_results(results)
+            # Drop models the previous page already returned (results shift as new models are published)
+            previous = set(seen_ids)
+            items = [format_model(model) for model in results if model.get("id") not in previous]
+            next_token = None
+            if len(results) >= page_size:
+                next_token = encode_continuation_token(
+                    search_term, ordering, offset + page_size, [model.get("id") for model in results]
+                )
+
+            logger.info(f"Found {len(items)} models at offset {offset}")
+            return {"items": items, "continuation_token": next_token}
+
+    except Exception as e:
+        error_msg = f"Error searching Printables: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+@mcp.tool()
+async def search_printables_local(search_term: str = "", limit: int = 10, ordering: str = "best_match") -> List[Dict[str, Any]]:
+    """
+    Search the local index of models fetched earlier, without contacting Printables.com.
+    
+    The index holds every model returned by the other tools (and models ingested with
+    printables_index.py), with descriptions and file names once they were fetched.
+    It only knows about models seen before, so fall back to search_printables for new topics.
+    
+    Args:
+        search_term: Words to look for in names, authors, descriptions and file names (empty lists all models)
+        limit: Maximum number of results to return (default: 10, max: 100)
+        ordering: Result ordering - one of: "best_match", "popular", "latest", "rating", "makes_count" (default: "best_match")
+    
+    Returns:
+        List of model dictionaries containing id, name, slug, url, stats, author, image_url and,
+        for text searches, a snippet of the matching text
+    """
+    try:
+        if model_index is None:
+            raise RuntimeError("No local index configured: set PRINTABLES_INDEX_PATH")
+        limit = max(1, min(limit, 100))
+        logger.info(f"Searching local index for '{search_term}' with limit {limit} and ordering {ordering}")
+        results = await printables_api.run_blocking(model_index.search, search_term, limit, ordering)
+        logger.info(f"Found {len(results)} models in local index")
+        return results
+
+    except Exception as e:
+        error_msg = f"Error searching local index: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+@mcp.tool()
+async def get_printables_files(model_id, manifest_only: bool = False,
+                               deadline_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Get downloadable files for a specific Printables model.
+    
+    Args:
+        model_id: The numeric ID of the model (accepts int or string)
+        manifest_only: List the files without download links (one cheap request); mint links for
+                       the files you need with resolve_printables_file_link (default: False)
+        deadline_seconds: Seconds the call may take in total (default: 30); files whose link could not be
+                          minted in time are still listed, with a null download_url
+    
+    Returns:
+        List of file dictionaries containing file_id, name, size_bytes, file_type and,
+        unless manifest_only is set, download_url
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            # Convert to string if needed and validate
+            model_id_str = str(model_id).strip()
+            if not model_id_str or not model_id_str.isdigit():
+                raise ValueError(f"Invalid model_id: must be a numeric string, got '{model_id}'")
+            
+            logger.info(f"Fetching {'manifest' if manifest_only else 'files'} for model ID {model_id_str}")
+            if manifest_only:
+                files = await singleflight.do(
+                    ("manifest", model_id_str), printables_api.get_model_manifest_async, model_id_str, raise_errors=True
+                )
+            else:
+                files = await singleflight.do(
+                    ("files", model_id_str),
+                    printables_api.get_model_files_async, model_id_str, max_workers=LINK_WORKERS,
+                    batch_size=LINK_BATCH_SIZE, raise_errors=True
+                )
+        
+            if not files:
+                return []
+            index_model_fields(model_id_str, file_names=[f.get("name") for f in files])
+        
+            logger.info(f"Found {len(files)} files for model {model_id_str}")
+            return files
+        
+    except Exception as e:
+        error_msg = f"Error fetching files for model {model_id}: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+@mcp.tool()
+async def resolve_printables_file_link(model_id, file_id, file_type: str,
+                                       deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Mint a temporary download link for one file listed by get_printables_files(manifest_only=True).
+    
+    Args:
+        model_id: The numeric ID of the model (accepts int or string)
+        file_id: The file_id from the manifest
+        file_type: The file_type from the manifest - "stl" or "gcode"
+        deadline_seconds: Seconds the call may take in total (default: 30)
+    
+    Returns:
+        Dictionary with model_id, file_id, file_type and download_url
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            model_id_str = str(model_id).strip()
+            if not model_id_str or not model_id_str.isdigit():
+                raise ValueError(f"Invalid model_id: must be a numeric string, got '{model_id}'")
+            file_id_str = str(file_id).strip()
+            if not file_id_str:
+                raise ValueError("Invalid file_id: must not be empty")
+            if file_type not in ("stl", "gcode"):
+                raise ValueError(f"Invalid file_type '{file_type}': must be \"stl\" or \"gcode\"")
+
+            logger.info(f"Resolving download link for file {file_id_str} of model {model_id_str}")
+            url = await singleflight.do(
+                ("link", model_id_str, file_id_str, file_type),
+                printables_api.get_real_download_url_async, file_id_str, model_id_str, file_type
+            )
+            if not url:
+                raise RuntimeError("Printables did not return a download link")
+            return {"model_id": model_id_str, "file_id": file_id_str, "file_type": file_type, "download_url": url}
+
+    except Exception as e:
+        error_msg = f"Error resolving download link for file {file_id} of model {model_id}: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+def resolve_download_dir(target_dir: Optional[str], model_id_str: str) -> str:
+    """
+    Returns the directory to download a model into, which must lie inside DOWNLOAD_DIR.
+
+    Relative target directories are taken from DOWNLOAD_DIR. Raises ValueError for
+    paths (including symlinks) that lead outside it, so clients cannot write anywhere
+    the server can.
+    """
+    root = os.path.realpath(DOWNLOAD_DIR)
+    if not target_dir:
+        return os.path.join(root, model_id_str)
+    target = os.path.realpath(os.path.join(root, os.path.expanduser(target_dir)))
+    if os.path.commonpath([root, target]) != root:
+        raise ValueError(f"target_dir must be inside the download directory {root}, got '{target_dir}'")
+    return target
+
+@mcp.tool()
+async def download_printables_files(model_id, target_dir: Optional[str] = None, file_ids: Optional[List[str]] = None,
+                                    file_types: Optional[List[str]] = None,
+                                    deadline_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Download the files of a Printables model to a local directory.
+    
+    Files are streamed to disk several at a time; interrupted downloads resume and
+    files already present with the right size are skipped.
+    
+    Args:
+        model_id: The numeric ID of the model (accepts int or string)
+        target_dir: Directory to save into, inside PRINTABLES_DOWNLOAD_DIR; relative paths are taken
+                    from there (default: <PRINTABLES_DOWNLOAD_DIR>/<model_id>)
+        file_ids: Only download these file_ids from get_printables_files (default: all files)
+        file_types: Only download these types - "stl" and/or "gcode" (default: all types)
+        deadline_seconds: Seconds the downloads may take in total (default: 600); files not finished in
+                          time are reported as errors and resume on the next call
+    
+    Returns:
+        One dictionary per file with file_id, name, path, size_bytes and status
+        ("downloaded", "skipped" or "error" with an "error" message)
+    """
+    try:
+        with tool_deadline(deadline_seconds, DOWNLOAD_DEADLINE):
+            model_id_str = str(model_id).strip()
+            if not model_id_str or not model_id_str.isdigit():
+                raise ValueError(f"Invalid model_id: must be a numeric string, got '{model_id}'")
+            target = resolve_download_dir(target_dir, model_id_str)
+
+            manifest = await singleflight.do(
+                ("manifest", model_id_str), printables_api.get_model_manifest_async, model_id_str, raise_errors=True
+            )
+            if file_ids is not None:
+                wanted = {str(file_id) for file_id in file_ids}
+                manifest = [entry for entry in manifest if str(entry.get("file_id")) in wanted]
+
+            logger.info(f"Downloading {len(manifest)} files of model {model_id_str} to {target}")
+            async with upstream_slots.acquire():
+                results = await printables_download.download_model_files_async(
+                    model_id_str, target, manifest, file_types, max_workers=DOWNLOAD_WORKERS
+                )
+            logger.info(f"Downloaded files of model {model_id_str}: {sum(r['status'] != 'error' for r in results)}/{len(results)} ok")
+            return results
+
+    except Exception as e:
+        error_msg = f"Error downloading files for model {model_id}: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+@mcp.tool()
+async def get_printables_description(model_url: str, deadline_seconds: Optional[float] = None) -> str:
+    """
+    Get the description text for a Printables model by scraping its page.
+    
+    Args:
+        model_url: Full URL to the model page (e.g. https://www.printables.com/model/12345-model-name)
+        deadline_seconds: Seconds the call may take in total (default: 30)
+    
+    Returns:
+        Formatted description text in markdown format
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            logger.info(f"Fetching description for {model_url}")
+            description = await singleflight.do(
+                ("description", normalize_model_url(model_url)),
+                printables_api.get_model_description_async, model_url
+            )
+        
+            if description.startswith("Error:"):
+                raise RuntimeError(description)
+            if description != "Description not found on this page.":
+                index_model_fields(model_id_from_url(model_url), description=description)
+        
+            logger.info("Description fetched successfully")
+            return description
+        
+    except Exception as e:
+        error_msg = f"Error fetching description from {model_url}: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+async def fetch_model_details(model_id: str, include: List[str]) -> Dict[str, Any]:
+    """
+    Fetches the requested parts of one model for get_printables_models_bulk.
+    
+    Failures are recorded per part under "errors" instead of being raised, so one
+    broken model or part does not fail the whole batch.
+    """
+    details: Dict[str, Any] = {"id": model_id}
+    errors: Dict[str, str] = {}
+
+    async def summary_part():
+        summary = await singleflight.do(("summary", model_id), printables_api.get_model_summary_async, model_id)
+        if summary is None:
+            errors["model"] = "Model not found or could not be fetched"
+        else:
+            index_search_results([summary])
+        return summary
+
+    async def files_part():
+        details["files"] = await singleflight.do(
+            ("files", model_id),
+            printables_api.get_model_files_async, model_id, max_workers=LINK_WORKERS, batch_size=LINK_BATCH_SIZE,
+            raise_errors=True
+        )
+
+    # Summary (needed for the page URL) and files are independent; the description waits for the URL
+    parts = [summary_part()]
+    if "files" in include:
+        parts.append(files_part())
+    results = await asyncio.gather(*parts, return_exceptions=True)
+    for part, result in zip(("model", "files"), results):
+        if isinstance(result, BaseException):
+            errors[part] = str(result)
+    summary = results[0] if not isinstance(results[0], BaseException) else None
+
+    if summary:
+        formatted = format_model(summary)
+        details.update({key: formatted[key] for key in ("name", "slug", "url", "author", "image_url")})
+        if "stats" in include:
+            details["stats"] = formatted["stats"]
+        if "description" in include:
+            url = formatted["url"]
+            try:
+                description = await singleflight.do(
+                    ("description", normalize_model_url(url)), printables_api.get_model_description_async, url
+                )
+                if description.startswith("Error:"):
+                    errors["description"] = description
+                else:
+                    details["description"] = description
+                    index_model_fields(model_id, description=description)
+            except Exception as e:
+                errors["description"] = str(e)
+    elif "description" in include:
+        errors.setdefault("description", "Skipped: the model page URL is unknown")
+
+    if details.get("files"):
+        index_model_fields(model_id, file_names=[f.get("name") for f in details["files"]])
+    if errors:
+        details["errors"] = errors
+    return details
+
+@mcp.tool()
+async def get_printables_models_bulk(model_ids: List[str], include: Optional[List[str]] = None,
+                                     deadline_seconds: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Get details for several Printables models in one call, fetched concurrently.
+    
+    Args:
+        model_ids: Numeric IDs of the models (max 50; ints or strings)
+        include: Parts to fetch per model - any of "files", "description", "stats" (default: all three)
+        deadline_seconds: Seconds the call may take in total (default: 30); parts not fetched in time are
+                          reported under "errors"
+    
+    Returns:
+        One dictionary per model, in the given order, with id, name, slug, url, author, image_url and the
+        requested parts. Parts that failed are reported in an "errors" dictionary on that model.
+    """
+    try:
+        with tool_deadline(deadline_seconds):
+            include = list(BULK_INCLUDE_OPTIONS) if include is None else [part.strip().lower() for part in include]
+            unknown = [part for part in include if part not in BULK_INCLUDE_OPTIONS]
+            if unknown:
+                raise ValueError(f"Invalid include {unknown}: must be any of {', '.join(BULK_INCLUDE_OPTIONS)}")
+
+            ids = [str(model_id).strip() for model_id in model_ids]
+            if len(ids) > BULK_MAX_MODELS:
+                raise ValueError(f"Too many model_ids: at most {BULK_MAX_MODELS} per call, got {len(ids)}")
+
+            logger.info(f"Fetching {include} for {len(ids)} models")
+            semaphore = asyncio.Semaphore(max(1, BULK_CONCURRENCY))
+
+            async def fetch(model_id: str) -> Dict[str, Any]:
+                if not model_id.isdigit():
+                    return {"id": model_id, "errors": {"model": "Invalid model_id: must be a numeric string"}}
+                async with semaphore:
+                    try:
+                        printables_api.check_deadline()
+                    except printables_api.DeadlineExceeded as e:
+                        return {"id": model_id, "errors": {"model": f"Skipped: {e}"}}
+                    return await fetch_model_details(model_id, include)
+
+            results = await asyncio.gather(*(fetch(model_id) for model_id in ids))
+            logger.info(f"Fetched {len(results)} models ({sum('errors' in r for r in results)} with errors)")
+            return results
+
+    except Exception as e:
+        error_msg = f"Error fetching models in bulk: {str(e)}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+
+def collect_stats() -> Dict[str, Any]:
+    cache = printables_api.get_persistent_cache()
+    return {
+        "stages": printables_metrics.registry.snapshot(),
+        "singleflight": singleflight.stats(),
+        "upstream_slots": upstream_slots.stats(),
+        "prefetch": prefetcher.stats(),
+        "download_link_cache": printables_api.download_link_cache.stats(),
+        "persistent_cache": cache.stats() if cache is not None else None,
+        "upstreams": printables_api.upstream_stats(),
+        "scraper_pool": printables_api.scraper_pool.stats(),
+        "parse_pool": printables_api.parse_pool.stats() if printables_api.parse_pool is not None else None,
+    }
+
+@mcp.tool()
+async def printables_stats() -> Dict[str, Any]:
+    """
+    Report where time goes in upstream calls, plus cache, coalescing and rate-limit state.
+    
+    Returns:
+        Dictionary with "stages" ({function: {outcome: {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}},
+        stages being queue, connect, ttfb, body, challenge, parse, process and total), "singleflight",
+        "download_link_cache", "persistent_cache" (None when disabled), "upstreams", "scraper_pool" and "parse_pool" (None when disabled)
+    """
+    return collect_stats()
+
+@mcp.resource("printables://stats", mime_type="application/json")
+def printables_stats_resource() -> str:
+    """
+    The same report as the printables_stats tool, as a JSON resource.
+    """
+    return dumps(collect_stats())
+
+TRANSPORTS = ("stdio", "streamable-http", "sse")
+
+def shutdown():
+    """
+    Releases the process-wide upstream clients once the server has stopped serving.
+    
+    This is not a FastMCP lifespan: the SDK runs that once per session (and once per
+    request in stateless HTTP mode), while these clients are shared by every session.
+    Serving has ended the event loop, so the async client is only dropped.
+    """
+    prefetcher.cancel()
+    logger.info("Closing Printables HTTP clients")
+    printables_api.close_client()
+    printables_download.close_download_session()
+    cache = printables_api.get_persistent_cache()
+    if cache is not None:
+        cache.close()  # Writes the batched access times
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Entry point of the printables-mcp-server command.
+    
+    stdio (the default) serves the one client that spawned the process. The HTTP
+    transports serve any number of clients from one process, all sharing its
+    caches, connection pools, rate limits and upstream slots.
+    """
+    parser = argparse.ArgumentParser(description="Printables MCP server.")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=os.environ.get("PRINTABLES_TRANSPORT", "stdio"),
+                        help="How clients connect (default: stdio, or PRINTABLES_TRANSPORT).")
+    parser.add_argument("--host", default=os.environ.get("PRINTABLES_HOST", "127.0.0.1"),
+                        help="Address the HTTP transports listen on (default: 127.0.0.1, or PRINTABLES_HOST).")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PRINTABLES_PORT", "8000")),
+                        help="Port the HTTP transports listen on (default: 8000, or PRINTABLES_PORT).")
+    parser.add_argument("--stateless", action="store_true",
+                        default=os.environ.get("PRINTABLES_STATELESS_HTTP", "").lower() in ("1", "true", "yes"),
+                        help="Serve streamable HTTP without per-client sessions, e.g. behind a load balancer.")
+    args = parser.parse_args(argv)
+
+    if args.transport != "stdio":
+        mcp.settings.host = args.host
+        mcp.settings.port = args.port
+        mcp.settings.stateless_http = args.stateless
+        if args.host not in ("127.0.0.1", "localhost", "::1"):
+            # FastMCP pins its DNS rebinding protection to localhost names when created with the default host
+            mcp.settings.transport_security = None
+        path = mcp.settings.streamable_http_path if args.transport == "streamable-http" else mcp.settings.sse_path
+        logger.info(f"Starting Printables MCP server with {args.transport} transport on http://{args.host}:{args.port}{path} "
+                    f"(at most {upstream_slots.limit} upstream calls at a time)")
+    else:
+        logger.info("Starting Printables MCP server with stdio transport")
+    # Optional Prometheus endpoint exposing the per-stage latency histograms at /metrics. Started here
+    # rather than on import, since parse pool workers import this module (as the main module) again.
+    if os.environ.get("PRINTABLES_METRICS_PORT"):
+        printables_metrics.start_prometheus_server(
+            int(os.environ["PRINTABLES_METRICS_PORT"]),
+            host=os.environ.get("PRINTABLES_METRICS_HOST", "127.0.0.1"),
+        )
+    try:
+        mcp.run(transport=args.transport)
+    finally:
+        shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stages a call is split into; not every call has every stage
+STAGES = ("queue", "connect", "ttfb", "body", "challenge", "parse", "process", "total")
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus style.
+
+    Args:
+        buckets: Sorted bucket upper bounds in seconds (an implicit +Inf bucket is added)
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        index = 0
+        while index < len(self.buckets) and value > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> float:
+        """
+        Estimates a percentile by interpolating linearly inside the bucket it falls in.
+        """
+        if not self.count:
+            return 0.0
+        target = pct / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= target:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                return min(self.max, lower + (upper - lower) * (target - seen) / bucket_count)
+            seen += bucket_count
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.sum / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class CallTimer:
+    """
+    Collects the stage timings of one tracked call until it finishes.
+    """
+    def __init__(self, function: str):
+        self.function = function
+        self.outcome = "ok"
+        self.stages = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + max(0.0, seconds)
+
+    def get(self, stage: str) -> float:
+        return self.stages.get(stage, 0.0)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of stage latency histograms keyed by (function, stage, outcome).
+    """
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, function: str, stage: str, seconds: float, outcome: str = "ok"):
+        key = (function, stage, outcome)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record(self, timer: CallTimer):
+        for stage, seconds in timer.stages.items():
+            self.observe(timer.function, stage, seconds, timer.outcome)
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def snapshot(self) -> dict:
+        """
+        Returns {function: {outcome: {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}}}.
+        """
+        with self._lock:
+            items = [(key, histogram.snapshot()) for key, histogram in self._histograms.items()]
+        result = {}
+        for (function, stage, outcome), stats in sorted(items):
+            result.setdefault(function, {}).setdefault(outcome, {})[stage] = stats
+        return result
+
+    def prometheus_text(self) -> str:
+        """
+        Renders every histogram in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP printables_stage_seconds Time spent per stage of Printables upstream calls.",
+            "# TYPE printables_stage_seconds histogram",
+        ]
+        with self._lock:
+            items = sorted((key, list(h.counts), h.count, h.sum) for key, h in self._histograms.items())
+        for (function, stage, outcome), counts, count, total in items:
+            labels = f'function="{function}",stage="{stage}",outcome="{outcome}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'printables_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'printables_stage_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"printables_stage_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"printables_stage_seconds_count{{{labels}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+_current = contextvars.ContextVar("printables_call", default=None)
+
+
+def current_timer():
+    """
+    Returns the CallTimer of the innermost tracked call running in this context, or None.
+    """
+    return _current.get()
+
+
+def add_stage(stage: str, seconds: float):
+    """
+    Adds time to a stage of the current tracked call (or to an "untracked" entry outside of one).
+    """
+    timer = _current.get()
+    if timer is not None:
+        timer.add(stage, seconds)
+    else:
+        registry.observe("untracked", stage, max(0.0, seconds))
+
+
+def set_outcome(outcome: str):
+    """
+    Labels the current tracked call, e.g. "error" for failures reported by return value or "cache_hit".
+    """
+    timer = _current.get()
+    if timer is not None:
+        timer.outcome = outcome
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Times the enclosed block as one stage of the current tracked call.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage(name, time.perf_counter() - start)
+
+
+@contextmanager
+def track(function: str):
+    """
+    Tracks one call: stages added while it runs are recorded under function once it finishes.
+    """
+    timer = CallTimer(function)
+    token = _current.set(timer)
+    start = time.perf_counter()
+    try:
+        yield timer
+    except BaseException:
+        timer.outcome = "error"
+        raise
+    finally:
+        _current.reset(token)
+        timer.add("total", time.perf_counter() - start)
+        registry.record(timer)
+
+
+def tracked(function: str = None):
+    """
+    Decorator tracking every call of a sync or async function under the given name (default: its __name__).
+    """
+    def decorate(func):
+        name = function or func.__name__
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with track(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def httpx_trace():
+    """
+    Returns (sync_trace, async_trace, apply) for an httpx "trace" request extension.
+
+    The trace callbacks timestamp httpcore's connection and HTTP events; apply()
+    turns them into connect, ttfb and body stages of the current tracked call.
+    """
+    events = {}
+
+    def record(name, info):
+        events[name] = time.perf_counter()
+
+    async def record_async(name, info):
+        record(name, info)
+
+    def span(prefix_suffix: str) -> float:
+        started = [t for name, t in events.items() if name.endswith(prefix_suffix + ".started")]
+        completed = [t for name, t in events.items() if name.endswith(prefix_suffix + ".complete")]
+        return completed[0] - started[0] if started and completed else 0.0
+
+    def apply():
+        connect = span("connect_tcp") + span("start_tls")
+        if connect:
+            add_stage("connect", connect)
+        sent = [t for name, t in events.items() if name.endswith("send_request_headers.started")]
+        headers = [t for name, t in events.items() if name.endswith("receive_response_headers.complete")]
+        if sent and headers:
+            add_stage("ttfb", headers[0] - sent[0])
+        body = span("receive_response_body")
+        if body:
+            add_stage("body", body)
+
+    return record, record_async, apply
+
+
+def start_prometheus_server(port: int, host: str = "127.0.0.1", extra=None):
+    """
+    Serves registry.prometheus_text() (plus extra(), a callable returning more exposition text) at /metrics.
+
+    Returns:
+        The running ThreadingHTTPServer (call shutdown() to stop it)
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = (registry.prometheus_text() + (extra() if extra else "")).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer((host, port), Handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="printables-metrics", daemon=True).start()
+    return httpd
@@ -0,0 +1,196 @@
+"""
+Typed records for the model data produced by printables_api, and the JSON serializer
+shared by the CLI output files and the MCP server.
+
+The dataclass fields are laid out exactly like the JSON objects written so far, so
+orjson (when installed) serializes the records directly without building dicts first.
+"""
+import json
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+try:
+    import orjson
+except ImportError:  # Optional: pip install orjson
+    orjson = None
+
+# __slots__ dataclasses need Python 3.10; older versions fall back to regular instances
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+MODEL_URL = "https://www.printables.com/model/{id}-{slug}"
+MEDIA_URL = "https://media.printables.com/{path}"
+
+
+def _image_url(model: dict):
+    path = (model.get('image') or {}).get('filePath')
+    return MEDIA_URL.format(path=path) if path else None
+
+
+@dataclass(**_SLOTS)
+class ModelStats:
+    rating: Optional[float] = None
+    likes: Optional[int] = None
+    downloads: Optional[int] = None
+    published: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {"rating": self.rating, "likes": self.likes, "downloads": self.downloads, "published": self.published}
+
+
+@dataclass(**_SLOTS)
+class ModelSummary:
+    """
+    A search result as returned to MCP clients.
+    """
+    id: Optional[str]
+    name: Optional[str]
+    slug: Optional[str]
+    url: Optional[str]
+    stats: ModelStats
+    author: Optional[str]
+    image_url: Optional[str]
+
+    @classmethod
+    def from_api(cls, model: dict) -> "ModelSummary":
+        """
+        Builds the summary of a search result (or model summary) from the GraphQL API.
+        """
+        model_id, slug = model.get('id'), model.get('slug')
+        return cls(
+            id=model_id,
+            name=model.get('name'),
+            slug=slug,
+            url=MODEL_URL.format(id=model_id, slug=slug) if model_id and slug else None,
+            stats=ModelStats(rating=model.get('ratingAvg'), likes=model.get('likesCount'),
+                             downloads=model.get('downloadCount'), published=model.get('datePublished')),
+            author=(model.get('user') or {}).get('publicUsername'),
+            image_url=_image_url(model),
+        )
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "slug": self.slug, "url": self.url, "stats": self.stats.to_dict(),
+                "author": self.author, "image_url": self.image_url}
+
+
+def summary_dict(model: dict) -> dict:
+    """
+    Builds the JSON object of ModelSummary.from_api(model) directly, for callers that hand
+    the summary to a dict-based serializer (the MCP tools) and would only build the record to discard it.
+    """
+    model_id, slug = model.get('id'), model.get('slug')
+    return {
+        "id": model_id,
+        "name": model.get('name'),
+        "slug": slug,
+        "url": MODEL_URL.format(id=model_id, slug=slug) if model_id and slug else None,
+        "stats": {"rating": model.get('ratingAvg'), "likes": model.get('likesCount'),
+                  "downloads": model.get('downloadCount'), "published": model.get('datePublished')},
+        "author": (model.get('user') or {}).get('publicUsername'),
+        "image_url": _image_url(model),
+    }
+
+
+@dataclass(**_SLOTS)
+class ModelFile:
+    """
+    A downloadable file of a model, with its signed download link (None if it could not be fetched).
+    """
+    file_id: Optional[str]
+    name: Optional[str]
+    download_url: Optional[str]
+    size_bytes: Optional[int]
+    file_type: Optional[str]
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "ModelFile":
+        """
+        Builds a record from an entry returned by printables_api.get_model_files.
+        """
+        return cls(entry.get('file_id'), entry.get('name'), entry.get('download_url'), entry.get('size_bytes'),
+                   entry.get('file_type'))
+
+    def to_dict(self) -> dict:
+        return {"file_id": self.file_id, "name": self.name, "download_url": self.download_url,
+                "size_bytes": self.size_bytes, "file_type": self.file_type}
+
+
+@dataclass(**_SLOTS)
+class RecordStats:
+    """
+    Statistics of a CLI record; the key names differ from ModelStats to keep existing output files readable.
+    """
+    likes: Optional[int] = None
+    downloads: Optional[int] = None
+    rating: Optional[float] = None
+    published_date: Optional[str] = None
+    makes: Optional[int] = None
+
+    def to_dict(self) -> dict:
+        return {"likes": self.likes, "downloads": self.downloads, "rating": self.rating,
+                "published_date": self.published_date, "makes": self.makes}
+
+
+@dataclass(**_SLOTS)
+class ModelDetails:
+    """
+    A model with its description and files, as written by the CLI (one per JSONL line in pipeline mode).
+    """
+    id: str
+    name: Optional[str]
+    url: str
+    main_image_url: Optional[str]
+    author: Optional[str]
+    stats: RecordStats
+    description: Optional[str]
+    files: List[ModelFile]
+
+    @classmethod
+    def from_api(cls, model: dict, description: Optional[str], files: list) -> "ModelDetails":
+        """
+        Builds the record of a search result from its description and get_model_files entries.
+        """
+        return cls(
+            id=model['id'],
+            name=model.get('name'),
+            url=MODEL_URL.format(id=model['id'], slug=model.get('slug')),
+            main_image_url=_image_url(model),
+            author=(model.get('user') or {}).get('publicUsername'),
+            stats=RecordStats(likes=model.get('likesCount'), downloads=model.get('downloadCount'),
+                              rating=model.get('ratingAvg'), published_date=model.get('datePublished'),
+                              makes=model.get('makesCount')),
+            description=description,
+            files=[ModelFile.from_dict(entry) for entry in files or []],
+        )
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "url": self.url, "main_image_url": self.main_image_url,
+                "author": self.author, "stats": self.stats.to_dict(), "description": self.description,
+                "files": [entry.to_dict() for entry in self.files]}
+
+
+def _default(obj):
+    if hasattr(obj, "to_dict"):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj, indent: bool = False) -> str:
+    """
+    Serializes records (and plain JSON data containing them) to JSON text.
+
+    Uses orjson when it is installed and the standard library otherwise. Non-ASCII
+    characters are written as-is in both cases.
+
+    Args:
+        obj: Value to serialize
+        indent: Pretty-print with two-space indentation instead of compact output
+
+    Returns:
+        The JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_default)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default)
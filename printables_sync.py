@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import time
+
+import printables_api
+
+
+# Search result fields whose change makes a model worth fetching again
+FINGERPRINT_FIELDS = ("name", "slug", "likesCount", "downloadCount", "ratingAvg", "makesCount", "image")
+# Models published just before the mark that are still checked for changes on every run
+DEFAULT_RECHECK = 20
+
+
+def fingerprint(model: dict) -> str:
+    """
+    Hashes the search result fields that change when a model is updated or gains likes/downloads.
+    """
+    content = json.dumps({field: model.get(field) for field in FINGERPRINT_FIELDS}, sort_keys=True, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def _position(model: dict) -> list:
+    """
+    Sort position of a model in the "latest" ordering: publish date, then numeric ID for ties.
+    """
+    model_id = str(model.get("id") or "")
+    return [model.get("datePublished") or "", int(model_id) if model_id.isdigit() else 0]
+
+
+class SyncState:
+    """
+    JSON file remembering, per query, the newest model already synced (the high-water
+    mark) and, per model, the fingerprint of the search result it was fetched with.
+
+    While a query's runs stop short of the mark (because of max_items or an
+    interruption), the mark stays put and the newest position synced so far is kept
+    as a resume cursor; the run that finally pages down to the mark raises the mark
+    to it.
+
+    Args:
+        path: Path of the state file (created on the first save)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.queries = {}
+        self.models = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.queries = data.get("queries", {})
+            self.models = data.get("models", {})
+
+    def high_water(self, query: str):
+        """
+        Returns the [datePublished, id] position of the newest synced model of query, or None.
+        """
+        return (self.queries.get(query) or {}).get("high_water")
+
+    def resume(self, query: str):
+        """
+        Returns the [datePublished, id] position of the newest model synced by runs that stopped short of the mark, or None.
+        """
+        return (self.queries.get(query) or {}).get("resume")
+
+    def save(self):
+        """
+        Writes the state to a temporary file and renames it, so an interrupted save keeps the previous state.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"queries": self.queries, "models": self.models}, f, ensure_ascii=False)
+        os.replace(temporary, self.path)
+
+
+def sync_query(search_term: str, output_path: str, state_path: str, max_items: int = None,
+               recheck: int = DEFAULT_RECHECK, page_size: int = printables_api.DEFAULT_SEARCH_PAGE_SIZE,
+               workers: int = 4, rate: float = 1.0, debug: bool = False, on_record=None) -> dict:
+    """
+    Appends the models published since the last sync of a query to a JSONL file.
+
+    Pages through the "latest" ordering only until the high-water mark of the
+    previous run (plus recheck models past it), and fetches descriptions and files
+    only for models that are new or whose search result changed since they were
+    synced. Changed models get a new record appended, so readers should keep the
+    last record per ID (as printables_index.ingest_jsonl does). The mark only
+    advances once paging reached it (or the end of the results), and never past a
+    model that failed, so models skipped by max_items or failures are picked up by
+    the next run. Search failures are raised rather than taken for the end of the
+    results.
+
+    Args:
+        search_term: The search query
+        output_path: JSONL file records are appended to
+        state_path: State file holding the high-water marks and fingerprints
+        max_items: Stop after this many new models (e.g. to bound the first run; None has no limit)
+        recheck: Number of models at or below the mark still checked for changes
+        page_size: Number of models requested per search page
+        workers: Number of models processed at the same time
+        rate: Maximum number of models started per second
+        debug: Enable debug output
+        on_record: Optional callable(model_id, record) run for each written record
+
+    Returns:
+        Summary dictionary with seen, new, changed, unchanged, written, failed, complete (whether
+        paging reached the mark or the end of the results) and high_water
+    """
+    state = SyncState(state_path)
+    mark = state.high_water(search_term)
+    resume = state.resume(search_term)
+    todo = []
+    seen = new = changed = 0
+    past_mark = 0
+    complete = True
+    for model in printables_api.iter_search_models(search_term, "latest", page_size=page_size, debug=debug,
+                                                   raise_errors=True):
+        if not model.get("id"):
+            continue
+        is_new = mark is None or _position(model) > mark
+        if not is_new:
+            past_mark += 1
+            if past_mark > recheck:
+                break
+        seen += 1
+        known = state.models.get(model["id"])
+        if known is None:
+            new += 1
+        elif known != fingerprint(model):
+            changed += 1
+        else:
+            continue
+        todo.append(model)
+        if max_items is not None and is_new and new >= max_items:
+            complete = False
+            break
+
+    if debug:
+        print(f"Sync '{search_term}': {seen} models checked, {new} new, {changed} changed")
+
+    written_ids = set()
+
+    def record_written(model_id, record):
+        written_ids.add(model_id)
+        if on_record is not None:
+            on_record(model_id, record)
+
+    fingerprints = {model["id"]: fingerprint(model) for model in todo}
+    try:
+        written = printables_api.run_pipeline(todo, output_path, workers, rate, debug=debug, append=True,
+                                              on_record=record_written)
+    finally:
+        # Even after an interruption, what was written is not fetched again
+        for model_id in written_ids:
+            state.models[model_id] = fingerprints[model_id]
+        failed = [model for model in todo if model["id"] not in written_ids]
+        candidates = [_position(model) for model in todo if model["id"] in written_ids]
+        if resume is not None:
+            candidates.append(resume)
+        query_state = dict(state.queries.get(search_term) or {})
+        if complete:
+            if failed:
+                oldest_failure = min(_position(model) for model in failed)
+                candidates = [position for position in candidates if position < oldest_failure]
+            if mark is not None:
+                candidates.append(mark)
+            if candidates:
+                query_state["high_water"] = max(candidates)
+            query_state.pop("resume", None)
+        elif candidates:
+            # Models between where paging stopped and the mark are still unsynced: keep the mark
+            query_state["resume"] = max(candidates)
+        query_state["synced"] = time.time()
+        state.queries[search_term] = query_state
+        state.save()
+
+    return {
+        "seen": seen,
+        "new": new,
+        "changed": changed,
+        "unchanged": seen - new - changed,
+        "written": written,
+        "failed": len(failed),
+        "complete": complete,
+        "high_water": state.high_water(search_term),
+    }
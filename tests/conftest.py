@@ -0,0 +1,20 @@
+import pytest
+import printables_api
+import printables_download
+import printables_metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_printables_state():
+    """
+    Drops the shared client and caches between tests so pooled state never leaks across them.
+    """
+    yield
+    printables_api.close_client()
+    printables_api.download_link_cache.clear()
+    printables_api.configure_persistent_cache(None)
+    printables_api.configure_scraper_pool()
+    printables_api.configure_parse_pool()
+    printables_api.reset_upstream_guards()
+    printables_download.close_download_session()
+    printables_metrics.registry.reset()
@@ -0,0 +1,91 @@
+import glob
+import os
+import pytest
+import printables_api
+from printables_api import DESCRIPTION_PARSERS, extract_description
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "descriptions")
+PAGES = sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+# Backends that build no tree around the container cannot see an enclosing element's end tag
+# close it, so they keep reading past it (documented on the backends)
+KNOWN_DIVERGENCES = {("strainer", "ancestor_closed.html"), ("lxml", "ancestor_closed.html")}
+
+
+def _read(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _expected(page):
+    """
+    Returns the Markdown snapshot for a page, or None for pages without a description.
+    """
+    snapshot = page[:-len(".html")] + ".md"
+    return _read(snapshot) if os.path.exists(snapshot) else None
+
+
+@pytest.mark.parametrize("parser", sorted(DESCRIPTION_PARSERS))
+@pytest.mark.parametrize("page", PAGES, ids=os.path.basename)
+def test_backends_match_snapshot(parser, page):
+    """
+    Tests that every extraction backend produces the reference Markdown for every corpus page.
+    """
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+    if (parser, os.path.basename(page)) in KNOWN_DIVERGENCES:
+        pytest.xfail(f"{parser} does not end the container at an enclosing element's end tag")
+    result = extract_description(_read(page), parser)
+    expected = _expected(page)
+    if parser == "lxml" and expected is not None:
+        # lxml normalizes carriage returns; everything else must match exactly
+        expected = expected.replace("\r", "")
+    assert result == expected
+
+
+def test_register_description_parser():
+    """
+    Tests that custom backends can be plugged in and selected by name.
+    """
+    calls = []
+
+    def find_container(html):
+        calls.append(html)
+        return DESCRIPTION_PARSERS["html.parser"](html)
+
+    printables_api.register_description_parser("custom", find_container)
+    try:
+        html = '<div class="user-inserted"><p>Hello</p></div>'
+        assert extract_description(html, "custom") == "Hello"
+        assert calls == [html]
+    finally:
+        del DESCRIPTION_PARSERS["custom"]
+
+
+def test_parse_pool_matches_inline_and_keeps_small_pages_inline():
+    """
+    Tests that pages parsed in worker processes give the inline result, and that short pages are not sent to them.
+    """
+    pool = printables_api.configure_parse_pool(2, min_size=1000)
+    pages = [_read(page) for page in PAGES]
+    large = [html for html in pages if len(html) >= 1000]
+    small = "<div class='user-inserted'><p>Short</p></div>"
+
+    assert [pool.extract(html) for html in large] == [extract_description(html) for html in large]
+    assert printables_api._parse_description(small) == "Short"
+    assert pool.stats() == {"workers": 2, "min_size": 1000, "offloaded": len(large), "inline": 1, "failures": 0}
+    # Workers are not forked from this (multithreaded) process
+    assert pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+
+
+def test_parse_pool_parses_registered_parsers_inline():
+    """
+    Tests that pages for a parser registered at runtime, which worker processes do not have, stay inline.
+    """
+    pool = printables_api.configure_parse_pool(1, min_size=10)
+    printables_api.register_description_parser("custom", DESCRIPTION_PARSERS["html.parser"])
+    try:
+        html = '<div class="user-inserted"><p>Registered later</p></div>'
+        assert pool.extract(html, "custom") == "Registered later"
+        assert (pool.stats()["offloaded"], pool.stats()["inline"]) == (0, 1)
+    finally:
+        del DESCRIPTION_PARSERS["custom"]
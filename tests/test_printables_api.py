@@ -1,15 +1,83 @@
+import asyncio
+import json
+import time
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import requests
+from datetime import timedelta
+import printables_api
+import printables_metrics
+from printables_records import ModelDetails
 from printables_api import (
+    PrintablesClient,
+    RateLimiter,
+    DownloadLinkCache,
     search_models,
     get_real_download_url,
+    get_real_download_urls,
     get_model_files,
     get_model_description,
+    search_models_async,
+    get_model_files_async,
 )
 
+# Tests for the shared client
+def test_client_pool_configuration():
+    """
+    Tests that the client mounts a pooled adapter and merges custom headers.
+    """
+    client = PrintablesClient(pool_size=4, headers={"X-Test": "1"}, timeout=7)
+    adapter = client.session.get_adapter("https://api.printables.com/graphql/")
+    assert adapter._pool_maxsize == 4
+    assert client.session.headers["X-Test"] == "1"
+    assert "Mozilla" in client.session.headers["User-Agent"]
+    client.close()
+
+def test_shared_client_is_reused_and_closed():
+    """
+    Tests that get_client returns one shared instance until close_client is called.
+    """
+    first = printables_api.get_client()
+    assert printables_api.get_client() is first
+    printables_api.close_client()
+    assert printables_api.get_client() is not first
+
+def test_configure_client_closes_the_replaced_async_client():
+    """
+    Tests that reconfiguring closes the previous async client, with and without a running event loop.
+    """
+    pytest.importorskip("httpx")
+    old = printables_api.get_async_client()
+    printables_api.configure_client(timeout=3)
+    assert old._client.is_closed
+
+    async def reconfigure_while_serving():
+        current = printables_api.get_async_client()
+        printables_api.configure_client(timeout=4)
+        await asyncio.sleep(0)
+        return current
+
+    assert asyncio.run(reconfigure_while_serving())._client.is_closed
+    assert printables_api.get_async_client().timeout == 4
+
+@patch('printables_api.requests.Session.post')
+def test_search_and_files_share_one_session(mock_post):
+    """
+    Tests that every GraphQL call goes through the shared client with its default timeout.
+    """
+    printables_api.configure_client(timeout=3)
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": {"result": {"items": []}}}
+    mock_post.return_value = mock_response
+
+    search_models("test")
+    get_model_files("model1")
+    assert mock_post.call_count == 2
+    for call in mock_post.call_args_list:
+        assert call.kwargs["timeout"] == 3
+
 # Tests for search_models
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_search_models_success(mock_post):
     """
     Tests successful search functionality.
@@ -30,7 +98,7 @@ def test_search_models_success(mock_post):
     assert results[0]["name"] == "Test Model"
     mock_post.assert_called_once()
 
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_search_models_no_results(mock_post):
     """
     Tests search that returns no results.
@@ -56,7 +124,7 @@ def test_search_models_invalid_ordering():
     with pytest.raises(ValueError):
         search_models("test", ordering="invalid_ordering")
 
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_search_models_request_exception(mock_post):
     """
     Tests handling of a request exception.
@@ -66,7 +134,7 @@ def test_search_models_request_exception(mock_post):
     assert results == []
 
 # Tests for get_real_download_url
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_get_real_download_url_success(mock_post):
     """
     Tests successfully getting a real download URL.
@@ -88,7 +156,7 @@ def test_get_real_download_url_success(mock_post):
     url = get_real_download_url("file1", "model1", "stl")
     assert url == "https://example.com/download"
 
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_get_real_download_url_failure(mock_post):
     """
     Tests failure to get a download URL.
@@ -108,7 +176,7 @@ def test_get_real_download_url_failure(mock_post):
     url = get_real_download_url("file1", "model1", "stl")
     assert url is None
 
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_get_real_download_url_request_exception(mock_post):
     """
     Tests handling of a request exception.
@@ -117,10 +185,101 @@ def test_get_real_download_url_request_exception(mock_post):
     url = get_real_download_url("file1", "model1", "stl")
     assert url is None
 
+@patch('printables_api.requests.Session.post')
+def test_get_real_download_url_served_from_cache(mock_post):
+    """
+    Tests that a link minted with a TTL is reused on the next call.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": {"getDownloadLink": {"ok": True, "output": {"link": "https://example.com/download", "ttl": 600}}}
+    }
+    mock_post.return_value = mock_response
+
+    assert get_real_download_url("file1", "model1", "stl") == "https://example.com/download"
+    assert get_real_download_url("file1", "model1", "stl") == "https://example.com/download"
+    mock_post.assert_called_once()
+    assert printables_api.download_link_cache.stats()["hits"] == 1
+
+# Tests for DownloadLinkCache
+def test_link_cache_expires_with_safety_margin():
+    """
+    Tests that entries expire safety_margin seconds before their TTL.
+    """
+    cache = DownloadLinkCache(safety_margin=10)
+    cache.put(("m", "f", "stl"), "https://example.com/short", ttl=10)
+    cache.put(("m", "g", "stl"), "https://example.com/long", ttl=10.05)
+    assert cache.get(("m", "f", "stl")) is None
+    assert cache.get(("m", "g", "stl")) == "https://example.com/long"
+    time.sleep(0.06)
+    assert cache.get(("m", "g", "stl")) is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+def test_link_cache_evicts_least_recently_used():
+    """
+    Tests that the cache is bounded by entry count and evicts the least recently used link.
+    """
+    cache = DownloadLinkCache(max_entries=2, safety_margin=0)
+    cache.put(("m", "a", "stl"), "a", ttl=60)
+    cache.put(("m", "b", "stl"), "b", ttl=60)
+    cache.get(("m", "a", "stl"))
+    cache.put(("m", "c", "stl"), "c", ttl=60)
+    assert cache.get(("m", "b", "stl")) is None
+    assert cache.get(("m", "a", "stl")) == "a"
+    assert cache.stats()["evictions"] == 1
+
+# Tests for get_real_download_urls
+@patch('printables_api.requests.Session.post')
+def test_get_real_download_urls_batches_with_aliases(mock_post):
+    """
+    Tests that several links are minted in one aliased mutation and mapped back in order.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": {
+            "f0": {"ok": True, "output": {"link": "https://example.com/a", "ttl": 600}},
+            "f1": {"ok": False, "errors": [{"field": "id", "messages": ["bad"]}], "output": None},
+            "f2": {"ok": True, "output": {"link": "https://example.com/c", "ttl": 600}},
+        }
+    }
+    mock_post.return_value = mock_response
+
+    urls = get_real_download_urls([("a", "stl"), ("b", "stl"), ("c", "gcode")], "model1", batch_size=3)
+    assert urls == ["https://example.com/a", None, "https://example.com/c"]
+    mock_post.assert_called_once()
+    payload = mock_post.call_args.kwargs["json"]
+    assert "f2: getDownloadLink(id: $id2" in payload["query"]
+    assert payload["variables"]["fileType2"] == "gcode"
+
+    # Cached links are not minted again; only the failed file is requested
+    mock_response.json.return_value = {
+        "data": {"getDownloadLink": {"ok": True, "output": {"link": "https://example.com/b", "ttl": 600}}}
+    }
+    urls = get_real_download_urls([("a", "stl"), ("b", "stl"), ("c", "gcode")], "model1", batch_size=3)
+    assert urls == ["https://example.com/a", "https://example.com/b", "https://example.com/c"]
+    assert mock_post.call_count == 2
+    assert mock_post.call_args.kwargs["json"]["variables"]["id"] == "b"
+
+@patch('printables_api.get_real_download_url', side_effect=lambda file_id, *args: f"https://example.com/{file_id}")
+@patch('printables_api.requests.Session.post')
+def test_get_real_download_urls_falls_back_when_batch_rejected(mock_post, mock_get_url):
+    """
+    Tests that a rejected batch falls back to one call per file.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"errors": [{"message": "Cannot query field 'f0'"}]}
+    mock_post.return_value = mock_response
+
+    urls = get_real_download_urls([("a", "stl"), ("b", "stl")], "model1")
+    assert urls == ["https://example.com/a", "https://example.com/b"]
+    assert mock_get_url.call_count == 2
+
 # Tests for get_model_files
-@patch('printables_api.get_real_download_url', return_value="https://example.com/download")
-@patch('printables_api.requests.post')
-def test_get_model_files_success(mock_post, mock_get_url):
+@patch('printables_api.get_real_download_urls', side_effect=lambda files, *args: ["https://example.com/download"] * len(files))
+@patch('printables_api.requests.Session.post')
+def test_get_model_files_success(mock_post, mock_get_urls):
     """
     Tests getting model files successfully.
     """
@@ -141,10 +300,174 @@ def test_get_model_files_success(mock_post, mock_get_url):
     assert len(files) == 2
     assert files[0]['name'] == "part1.stl"
     assert files[1]['download_url'] == "https://example.com/download"
-    assert mock_get_url.call_count == 2
+    # Both supported files are minted in a single batch
+    mock_get_urls.assert_called_once()
+    assert mock_get_urls.call_args.args[0] == [("stl1", "stl"), ("gcode1", "gcode")]
 
+@patch('printables_api.get_real_download_urls')
+@patch('printables_api.requests.Session.post')
+def test_get_model_manifest_skips_link_minting(mock_post, mock_get_urls):
+    """
+    Tests that the manifest lists file IDs, names, sizes and types from one request without minting links.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": {
+            "model": {
+                "stls": [{"id": "stl1", "name": "part1.stl", "fileSize": 1024}],
+                "gcodes": [{"id": "gcode1", "name": "part1.gcode", "fileSize": 2048}],
+            }
+        }
+    }
+    mock_post.return_value = mock_response
+
+    manifest = printables_api.get_model_manifest("model1")
+    assert manifest == [
+        {"file_id": "stl1", "name": "part1.stl", "size_bytes": 1024, "file_type": "stl"},
+        {"file_id": "gcode1", "name": "part1.gcode", "size_bytes": 2048, "file_type": "gcode"},
+    ]
+    assert mock_post.call_count == 1
+    assert "printer" not in mock_post.call_args.kwargs["json"]["query"]
+    mock_get_urls.assert_not_called()
+
+@patch('printables_api.requests.Session.post')
+def test_get_model_files_keeps_order_when_concurrent(mock_post):
+    """
+    Tests that concurrently resolved links come back in the original file order.
+    """
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "data": {
+            "model": {
+                "stls": [{"id": f"stl{i}", "name": f"part{i}.stl", "fileSize": i} for i in range(8)],
+            }
+        }
+    }
+    mock_post.return_value = mock_response
+
+    def fake_resolve(files, model_id, batch_size, debug=False):
+        # Finish later batches first to shake out any ordering bugs
+        time.sleep(0.01 * (8 - int(files[0][0][3:])))
+        return [f"https://example.com/{file_id}" for file_id, _ in files]
+
+    with patch('printables_api.get_real_download_urls', side_effect=fake_resolve), \
+         patch.object(printables_api, 'download_link_limiter', RateLimiter(rate=1000, burst=1000)):
+        files = get_model_files("model1", max_workers=4, batch_size=2)
+    assert [f['name'] for f in files] == [f"part{i}.stl" for i in range(8)]
+    assert [f['download_url'] for f in files] == [f"https://example.com/stl{i}" for i in range(8)]
+
+def test_rate_limiter_paces_after_burst():
+    """
+    Tests that the token bucket allows a burst and then waits for refills.
+    """
+    limiter = RateLimiter(rate=20, burst=2)
+    start = time.monotonic()
+    for _ in range(4):
+        limiter.acquire()
+    # Two tokens come from the burst, the other two need ~0.05s each
+    assert time.monotonic() - start >= 0.09
+
+def test_adaptive_limiter_backs_off_and_recovers():
+    """
+    Tests that throttling halves the rate down to min_rate and successes raise it again.
+    """
+    limiter = printables_api.AdaptiveRateLimiter(rate=4, burst=4, min_rate=1, max_rate=5, increase=0.5)
+    limiter.on_throttle()
+    assert limiter.rate == 2
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 1
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.rate == 5
 
-@patch('printables_api.requests.post')
+def test_adaptive_limiter_honors_retry_after():
+    """
+    Tests that a Retry-After value holds callers back even with tokens left.
+    """
+    limiter = printables_api.AdaptiveRateLimiter(rate=100, burst=10)
+    limiter.on_throttle(retry_after=0.1)
+    start = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+    assert printables_api._parse_retry_after("2") == 2.0
+    assert printables_api._parse_retry_after("not a date") is None
+
+def test_circuit_breaker_opens_and_half_opens():
+    """
+    Tests that the breaker opens after the threshold and lets one trial through after the timeout.
+    """
+    breaker = printables_api.CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    with pytest.raises(printables_api.CircuitOpenError):
+        breaker.before_request()
+    time.sleep(0.06)
+    breaker.before_request()
+    with pytest.raises(printables_api.CircuitOpenError):
+        breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    breaker.before_request()
+
+@patch('printables_api.requests.Session.post')
+def test_trial_request_with_client_error_frees_the_circuit(mock_post):
+    """
+    Tests that a half-open trial ending in a 4xx or a deadline does not leave the circuit refusing every request.
+    """
+    guard = printables_api.configure_upstream("api.printables.com", failure_threshold=1, reset_timeout=0.01,
+                                              rate=1000, burst=1000)
+    bad_request = MagicMock(status_code=400)
+    bad_request.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Bad Request", response=bad_request)
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"data": {}}
+    mock_post.side_effect = [bad_request, ok]
+    client = printables_api.get_client()
+
+    guard.breaker.record_failure()
+    time.sleep(0.02)
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.post_graphql({"query": "q"})
+    assert guard.breaker.state == guard.breaker.HALF_OPEN
+    with printables_api.deadline(0.1):
+        with pytest.raises(printables_api.DeadlineExceeded):
+            client.post_graphql({"query": "q"})
+    assert client.post_graphql({"query": "q"}) == {"data": {}}
+    assert guard.breaker.state == guard.breaker.CLOSED
+
+@patch('printables_api.requests.Session.post')
+def test_client_retries_after_429(mock_post):
+    """
+    Tests that a 429 is retried after its Retry-After and slows the API limiter down.
+    """
+    throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+    ok = MagicMock(status_code=200)
+    ok.json.return_value = {"data": {"result": {"items": []}}}
+    mock_post.side_effect = [throttled, ok]
+    guard = printables_api.get_upstream_guard(printables_api.API_URL)
+    start_rate = guard.limiter.rate
+
+    assert search_models("test") == []
+    assert mock_post.call_count == 2
+    assert guard.limiter.throttled == 1
+    assert guard.limiter.rate < start_rate
+
+@patch('printables_api.requests.Session.post')
+def test_open_circuit_fails_fast(mock_post):
+    """
+    Tests that repeated connection errors open the circuit so later calls skip the network.
+    """
+    printables_api.configure_upstream("api.printables.com", failure_threshold=2, reset_timeout=60, rate=1000, burst=1000)
+    mock_post.side_effect = requests.exceptions.ConnectionError("down")
+    search_models("a")
+    search_models("b")
+    assert mock_post.call_count == 2
+    assert search_models("c") == []
+    assert mock_post.call_count == 2
+    assert printables_api.upstream_stats()["api.printables.com"]["circuit"] == "open"
+
+@patch('printables_api.requests.Session.post')
 def test_get_model_files_no_files(mock_post):
     """
     Tests a model with no files.
@@ -161,7 +484,7 @@ def test_get_model_files_no_files(mock_post):
     files = get_model_files("model1")
     assert len(files) == 0
 
-@patch('printables_api.requests.post')
+@patch('printables_api.requests.Session.post')
 def test_get_model_files_request_exception(mock_post):
     """
     Tests handling of a request exception.
@@ -171,7 +494,7 @@ def test_get_model_files_request_exception(mock_post):
     assert files == []
 
 # Tests for get_model_description
-@patch('printables_api.cloudscraper.create_scraper')
+@patch('cloudscraper.create_scraper')
 def test_get_model_description_success(mock_create_scraper):
     """
     Tests successful scraping of a model description.
@@ -187,7 +510,7 @@ def test_get_model_description_success(mock_create_scraper):
     assert "## Title" in description
     assert "Description" in description
 
-@patch('printables_api.cloudscraper.create_scraper')
+@patch('cloudscraper.create_scraper')
 def test_get_model_description_not_found(mock_create_scraper):
     """
     Tests when the description div is not found.
@@ -202,7 +525,7 @@ def test_get_model_description_not_found(mock_create_scraper):
     description = get_model_description("https://example.com/model")
     assert description == "Description not found on this page."
 
-@patch('printables_api.cloudscraper.create_scraper')
+@patch('cloudscraper.create_scraper')
 def test_get_model_description_request_exception(mock_create_scraper):
     """
     Tests handling of a request exception.
@@ -212,4 +535,246 @@ def test_get_model_description_request_exception(mock_create_scraper):
     mock_create_scraper.return_value = mock_scraper
 
     description = get_model_description("https://example.com/model")
-    assert "Error: Could not fetch model page" in description
\ No newline at end of file
+    assert "Error: Could not fetch model page" in description
+
+# Tests for the async code path
+@patch('printables_api.AsyncPrintablesClient.post_graphql', new_callable=AsyncMock)
+def test_search_models_async_success(mock_post):
+    """
+    Tests that the async search parses results like the sync version.
+    """
+    mock_post.return_value = {"data": {"result": {"items": [{"id": "123", "name": "Test Model"}]}}}
+    results = asyncio.run(search_models_async("test", limit=1))
+    assert results == [{"id": "123", "name": "Test Model"}]
+
+@patch('printables_api.AsyncPrintablesClient.post_graphql', new_callable=AsyncMock)
+def test_search_models_async_request_exception(mock_post, capsys, caplog):
+    """
+    Tests that the async search maps request failures to an empty list, logged rather than printed to stdout.
+    """
+    mock_post.side_effect = requests.exceptions.ConnectionError("Test error")
+    assert asyncio.run(search_models_async("test")) == []
+    assert asyncio.run(printables_api.get_model_summary_async("1")) is None
+    assert asyncio.run(printables_api.get_model_manifest_async("1")) == []
+    assert asyncio.run(get_model_files_async("1")) == []
+    assert capsys.readouterr().out == ""
+    assert len([r for r in caplog.records if "Test error" in r.getMessage()]) == 4
+
+@patch('printables_api.AsyncPrintablesClient.post_graphql', new_callable=AsyncMock)
+def test_get_model_files_async_batches_links(mock_post):
+    """
+    Tests that the async file listing mints links in batches and keeps file order.
+    """
+    def respond(payload, timeout=None):
+        if payload["operationName"] == "ModelFiles":
+            return {"data": {"model": {
+                "stls": [{"id": "stl1", "name": "part1.stl", "fileSize": 1}],
+                "gcodes": [{"id": "gcode1", "name": "part1.gcode", "fileSize": 2}],
+            }}}
+        return {"data": {
+            alias: {"ok": True, "output": {"link": f"https://example.com/{payload['variables']['id' + alias[1:]]}"}}
+            for alias in ("f0", "f1")
+        }}
+    mock_post.side_effect = respond
+
+    files = asyncio.run(get_model_files_async("model1"))
+    assert [f["download_url"] for f in files] == ["https://example.com/stl1", "https://example.com/gcode1"]
+    assert mock_post.call_count == 2
+
+@patch('cloudscraper.create_scraper')
+def test_get_model_description_reuses_scraper_session(mock_create_scraper):
+    """
+    Tests that consecutive descriptions share one pooled scraper session until it is worn out.
+    """
+    printables_api.configure_scraper_pool(size=1, max_uses=2)
+    mock_response = MagicMock()
+    mock_response.text = '<html><body><div class="user-inserted"><p>Description</p></div></body></html>'
+    mock_create_scraper.return_value.get.return_value = mock_response
+
+    for _ in range(3):
+        assert get_model_description("https://example.com/model") == "Description"
+    # Two requests on the first session, then a fresh one
+    assert mock_create_scraper.call_count == 2
+    assert printables_api.scraper_pool.stats()["recycled"] == 1
+
+@patch('cloudscraper.create_scraper')
+def test_get_model_description_recycles_session_on_challenge(mock_create_scraper):
+    """
+    Tests that a session refused by Cloudflare is discarded instead of returned to the pool.
+    """
+    blocked = MagicMock()
+    blocked.status_code = 403
+    blocked.raise_for_status.side_effect = requests.exceptions.HTTPError("403 Forbidden", response=blocked)
+    mock_create_scraper.return_value.get.return_value = blocked
+
+    description = get_model_description("https://example.com/model")
+    assert description.startswith("Error:")
+    stats = printables_api.scraper_pool.stats()
+    assert stats["recycled"] == 1
+    assert stats["idle"] == 0
+
+@patch('cloudscraper.create_scraper')
+def test_sessions_returned_to_a_replaced_pool_are_closed(mock_create_scraper):
+    """
+    Tests that a session checked out while the pool is replaced is closed when it comes back.
+    """
+    old_pool = printables_api.scraper_pool
+    scraper = old_pool.checkout()
+    printables_api.configure_scraper_pool()
+    old_pool.checkin(scraper)
+
+    scraper.close.assert_called_once_with()
+    assert (old_pool.stats()["alive"], old_pool.stats()["idle"]) == (0, 0)
+
+# Tests for the per-stage latency metrics
+@patch('printables_api.requests.Session.post')
+def test_search_models_records_stage_latencies(mock_post):
+    """
+    Tests that a search is split into stages and failures are recorded under the error outcome.
+    """
+    ok = MagicMock()
+    ok.status_code = 200
+    ok.elapsed = timedelta(milliseconds=5)
+    ok.json.return_value = {"data": {"result": {"items": [{"id": "1"}]}}}
+    mock_post.side_effect = [ok, requests.exceptions.ConnectionError("down")]
+
+    assert search_models("benchy") == [{"id": "1"}]
+    assert search_models("vase") == []
+
+    stages = printables_metrics.registry.snapshot()["search_models"]
+    assert {"queue", "ttfb", "body", "parse", "process", "total"} <= set(stages["ok"])
+    assert stages["ok"]["ttfb"]["max_ms"] == 5.0
+    assert stages["error"]["total"]["count"] == 1
+
+# Tests for the CLI pipeline mode
+def _fake_record(model, debug=False):
+    return ModelDetails.from_api(model, None, [])
+
+def test_run_pipeline_streams_records(tmp_path):
+    """
+    Tests that every model is written as one JSONL record.
+    """
+    models = [{"id": str(i), "name": f"Model {i}"} for i in range(5)]
+    output = tmp_path / "out.jsonl"
+    with patch('printables_api.build_model_record', side_effect=_fake_record):
+        written = printables_api.run_pipeline(models, str(output), workers=3, rate=1000)
+
+    assert written == 5
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["id"] for r in records) == ["0", "1", "2", "3", "4"]
+    assert all(r["name"] == f"Model {r['id']}" for r in records)
+
+def test_run_pipeline_stops_queueing_when_interrupted(tmp_path):
+    """
+    Tests that an exception while writing leaves the remaining models unstarted.
+    """
+    models = [{"id": str(i), "name": f"Model {i}"} for i in range(50)]
+
+    def interrupt(model_id, record):
+        raise KeyboardInterrupt
+
+    with patch('printables_api.build_model_record', side_effect=_fake_record) as build, \
+            pytest.raises(KeyboardInterrupt):
+        printables_api.run_pipeline(models, str(tmp_path / "out.jsonl"), workers=2, rate=1000, on_record=interrupt)
+
+    assert build.call_count <= 4
+
+def test_run_pipeline_skips_failed_models_and_resume_retries_them(tmp_path):
+    """
+    Tests that models whose fetch failed are not written, and that resume refetches old error records.
+    """
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"id": "0", "description": "Error: Could not fetch model page"}\n', encoding="utf-8")
+    models = [{"id": str(i), "name": f"Model {i}", "slug": f"m{i}"} for i in range(3)]
+
+    def description(model_url, debug=False):
+        return "Error: Could not fetch model page" if "/2-" in model_url else "Text"
+
+    with patch('printables_api.get_model_description', side_effect=description), \
+            patch('printables_api.get_model_files', return_value=[]):
+        written = printables_api.run_pipeline(models, str(output), workers=2, rate=1000, resume=True)
+
+    assert written == 2
+    assert printables_api.read_pipeline_progress(str(output)) == {"0", "1"}
+
+def test_run_pipeline_resumes_after_interruption(tmp_path):
+    """
+    Tests that resume skips finished models and drops a half-written last line.
+    """
+    output = tmp_path / "out.jsonl"
+    output.write_text('{"id": "0", "name": "Model 0"}\n{"id": "1", "na', encoding="utf-8")
+    models = [{"id": str(i), "name": f"Model {i}"} for i in range(3)]
+    with patch('printables_api.build_model_record', side_effect=_fake_record) as build:
+        written = printables_api.run_pipeline(models, str(output), workers=2, rate=1000, resume=True)
+
+    assert written == 2
+    assert sorted(call.args[0]["id"] for call in build.call_args_list) == ["1", "2"]
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["id"] for r in records) == ["0", "1", "2"]
+
+# Tests for paginated search
+def _fake_pages(pages):
+    def search(search_term, limit=5, ordering="best_match", debug=False, offset=0, raise_errors=False):
+        return pages.get(offset, [])
+    return search
+
+def test_iter_search_models_pages_and_dedupes():
+    """
+    Tests that the iterator walks pages by offset and skips IDs it already yielded.
+    """
+    pages = {
+        0: [{"id": "1"}, {"id": "2"}],
+        2: [{"id": "2"}, {"id": "3"}],
+        4: [{"id": "4"}],
+    }
+    with patch('printables_api.search_models', side_effect=_fake_pages(pages)) as search:
+        ids = [model["id"] for model in printables_api.iter_search_models("test", page_size=2)]
+    assert ids == ["1", "2", "3", "4"]
+    assert [call.args[4] for call in search.call_args_list] == [0, 2, 4]
+
+def test_iter_search_models_stops_at_max_items():
+    """
+    Tests that max_items bounds the iteration.
+    """
+    pages = {offset: [{"id": str(offset + i)} for i in range(2)] for offset in range(0, 100, 2)}
+    with patch('printables_api.search_models', side_effect=_fake_pages(pages)):
+        ids = [model["id"] for model in printables_api.iter_search_models("test", max_items=3, page_size=2)]
+    assert ids == ["0", "1", "2"]
+
+def test_aiter_search_models_pages():
+    """
+    Tests the async iterator against the same paging rules.
+    """
+    pages = {0: [{"id": "1"}, {"id": "2"}], 2: [{"id": "2"}]}
+
+    async def fake_search(search_term, limit=5, ordering="best_match", debug=False, offset=0):
+        return pages.get(offset, [])
+
+    async def collect():
+        return [model["id"] async for model in printables_api.aiter_search_models("test", page_size=2)]
+
+    with patch('printables_api.search_models_async', side_effect=fake_search):
+        assert asyncio.run(collect()) == ["1", "2"]
+
+@patch('printables_api.requests.Session.post')
+def test_deadline_shrinks_timeouts_and_refuses_late_requests(mock_post):
+    """
+    Tests that requests get the remaining budget as timeout and are not sent once it is used up.
+    """
+    mock_post.return_value.json.return_value = {"data": {}}
+    client = printables_api.get_client()
+    with printables_api.deadline(5) as budget:
+        with printables_api.deadline(60):
+            client.post_graphql({"query": "q"})
+        assert 4 < mock_post.call_args.kwargs["timeout"] <= 5
+        budget.expires_at = time.monotonic()
+        with pytest.raises(printables_api.DeadlineExceeded):
+            client.post_graphql({"query": "q"})
+        # A rate-limit wait that would overrun the deadline is refused too
+        with pytest.raises(printables_api.DeadlineExceeded):
+            RateLimiter(rate=1, burst=0).acquire()
+    client.post_graphql({"query": "q"})
+
+    assert mock_post.call_count == 2
+    assert mock_post.call_args.kwargs["timeout"] == client.timeout
+    assert printables_api.get_upstream_guard(printables_api.API_URL).breaker.failures == 0
@@ -0,0 +1,129 @@
+import time
+from unittest.mock import patch, MagicMock
+import printables_api
+from printables_cache import PersistentCache, FRESH, STALE, MISS
+
+
+def test_set_and_lookup_round_trip(tmp_path):
+    """
+    Tests that stored values survive reopening the database file.
+    """
+    path = str(tmp_path / "cache.db")
+    cache = PersistentCache(path)
+    cache.set("search", "benchy", [{"id": "3161"}])
+    cache.close()
+
+    reopened = PersistentCache(path)
+    assert reopened.lookup("search", "benchy") == ([{"id": "3161"}], FRESH)
+    assert reopened.lookup("search", "other") == (None, MISS)
+    reopened.close()
+
+
+def test_ttl_per_namespace_and_stale_window(tmp_path):
+    """
+    Tests that each namespace expires on its own TTL and can be served stale afterwards.
+    """
+    cache = PersistentCache(str(tmp_path / "cache.db"), ttls={"search": 0.05, "description": 60},
+                            stale_while_revalidate=0.1)
+    cache.set("search", "k", "results")
+    cache.set("description", "k", "text")
+    time.sleep(0.08)
+    assert cache.lookup("search", "k") == ("results", STALE)
+    assert cache.lookup("description", "k") == ("text", FRESH)
+    time.sleep(0.1)
+    assert cache.lookup("search", "k") == (None, MISS)
+    cache.close()
+
+
+def test_in_memory_cache_and_contains():
+    """
+    Tests the in-memory cache and that contains() sees only fresh entries without touching the counters.
+    """
+    cache = PersistentCache(":memory:", ttls={"search": 0.05})
+    cache.set("search", "k", "results")
+    cache.set("manifest", "k", [])
+    assert cache.contains("search", "k") and cache.contains("manifest", "k")
+    assert not cache.contains("search", "other")
+    time.sleep(0.08)
+    assert not cache.contains("search", "k")
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (0, 0)
+    cache.close()
+
+
+def test_size_based_eviction_drops_least_recently_used(tmp_path):
+    """
+    Tests that the cache stays under max_bytes by evicting the least recently used entries.
+    """
+    cache = PersistentCache(str(tmp_path / "cache.db"), max_bytes=250)
+    cache.set("description", "a", "x" * 100)
+    time.sleep(0.01)
+    cache.set("description", "b", "x" * 100)
+    time.sleep(0.01)
+    cache.lookup("description", "a")
+    cache.set("description", "c", "x" * 100)
+
+    assert cache.lookup("description", "b") == (None, MISS)
+    assert cache.lookup("description", "a")[1] == FRESH
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= 250
+    cache.close()
+
+
+def test_hits_batch_their_access_time_writes(tmp_path):
+    """
+    Tests that lookups do not write to the database until the batched access times are flushed.
+    """
+    path = str(tmp_path / "cache.db")
+    cache = PersistentCache(path)
+    cache.set("search", "k", "results")
+    changes = cache._conn.total_changes
+    time.sleep(0.01)
+    for _ in range(10):
+        assert cache.lookup("search", "k") == ("results", FRESH)
+    assert cache._conn.total_changes == changes
+    cache.close()
+
+    reopened = PersistentCache(path)
+    created, accessed = reopened._conn.execute("SELECT created, accessed FROM entries").fetchone()
+    assert accessed > created
+    reopened.close()
+
+
+@patch('printables_api.requests.Session.post')
+def test_search_models_uses_persistent_cache(mock_post, tmp_path):
+    """
+    Tests that a cached search is answered without touching the network.
+    """
+    printables_api.configure_persistent_cache(str(tmp_path / "cache.db"))
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": {"result": {"items": [{"id": "123"}]}}}
+    mock_post.return_value = mock_response
+
+    assert printables_api.search_models("test") == [{"id": "123"}]
+    assert printables_api.search_models("test") == [{"id": "123"}]
+    mock_post.assert_called_once()
+
+
+@patch('printables_api.requests.Session.post')
+def test_stale_manifest_is_served_and_refreshed(mock_post, tmp_path):
+    """
+    Tests stale-while-revalidate: a stale manifest is returned at once and refreshed in the background.
+    """
+    cache = printables_api.configure_persistent_cache(
+        str(tmp_path / "cache.db"), ttls={"manifest": 0}, stale_while_revalidate=60
+    )
+    cache.set("manifest", "model1", [[{"id": "old", "name": "old.stl", "fileSize": 1}, "stl"]])
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"data": {"model": {"stls": [{"id": "new", "name": "new.stl", "fileSize": 2}]}}}
+    mock_post.return_value = mock_response
+
+    with patch('printables_api.get_real_download_urls', side_effect=lambda files, *args: [None] * len(files)):
+        files = printables_api.get_model_files("model1")
+    assert [f["name"] for f in files] == ["old.stl"]
+
+    for _ in range(50):
+        if cache.lookup("manifest", "model1")[0][0][0]["id"] == "new":
+            break
+        time.sleep(0.01)
+    assert cache.lookup("manifest", "model1")[0][0][0]["id"] == "new"
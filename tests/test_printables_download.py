@@ -0,0 +1,145 @@
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from unittest.mock import patch
+import printables_api
+from printables_download import download_file, download_model_files, safe_filename
+
+CONTENT = bytes(range(256)) * 400  # 102400 bytes
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """
+    Serves CONTENT with Range support; /expired answers 403 like a stale download link.
+    """
+    requests_seen = []
+
+    def do_GET(self):
+        self.requests_seen.append((self.path, self.headers.get("Range")))
+        if self.path.startswith("/expired"):
+            self.send_response(403)
+            self.end_headers()
+            return
+        start, end = 0, len(CONTENT) - 1
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range") or "")
+        if match and self.path != "/norange":
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+            if start >= len(CONTENT):
+                self.send_response(416)
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(CONTENT)}")
+        else:
+            self.send_response(200)
+        body = CONTENT[start:end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def file_server():
+    FileHandler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), FileHandler)
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    printables_api.configure_upstream("127.0.0.1", rate=1000, burst=1000)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_streams_file_and_verifies_size(file_server, tmp_path):
+    """
+    Tests a plain download in small chunks ending up complete under its final name.
+    """
+    path = str(tmp_path / "model.stl")
+    size = download_file(lambda refresh: f"{file_server}/file", path, len(CONTENT), chunk_size=4096)
+    assert size == len(CONTENT)
+    assert open(path, "rb").read() == CONTENT
+    assert not os.path.exists(path + ".part")
+
+
+def test_download_resumes_partial_file(file_server, tmp_path):
+    """
+    Tests that an existing .part file is continued with a Range request.
+    """
+    path = str(tmp_path / "model.stl")
+    with open(path + ".part", "wb") as f:
+        f.write(CONTENT[:1000])
+    download_file(lambda refresh: f"{file_server}/file", path, len(CONTENT))
+    assert open(path, "rb").read() == CONTENT
+    assert FileHandler.requests_seen == [("/file", "bytes=1000-")]
+
+
+def test_download_restarts_when_range_is_ignored(file_server, tmp_path):
+    """
+    Tests that a server answering a resume with the whole file overwrites the partial data.
+    """
+    path = str(tmp_path / "model.stl")
+    with open(path + ".part", "wb") as f:
+        f.write(b"x" * 1000)
+    download_file(lambda refresh: f"{file_server}/norange", path, len(CONTENT))
+    assert open(path, "rb").read() == CONTENT
+
+
+def test_download_splits_large_files_into_ranges(file_server, tmp_path):
+    """
+    Tests that a file above the split threshold is fetched as parallel ranges and joined in order.
+    """
+    path = str(tmp_path / "big.stl")
+    download_file(lambda refresh: f"{file_server}/file", path, len(CONTENT), split_threshold=50000, split_parts=4)
+    assert open(path, "rb").read() == CONTENT
+    ranges = sorted(r for _, r in FileHandler.requests_seen if r != "bytes=0-0")
+    assert ranges == ["bytes=0-25599", "bytes=25600-51199", "bytes=51200-76799", "bytes=76800-102399"]
+
+
+def test_download_rejects_size_mismatch(file_server, tmp_path):
+    """
+    Tests that a file not matching the expected size is discarded.
+    """
+    path = str(tmp_path / "model.stl")
+    with pytest.raises(ValueError):
+        download_file(lambda refresh: f"{file_server}/file", path, len(CONTENT) + 1)
+    assert not os.path.exists(path) and not os.path.exists(path + ".part")
+
+
+def test_download_model_files_remints_expired_links(file_server, tmp_path):
+    """
+    Tests that a refused link is dropped from the cache and minted again.
+    """
+    manifest = [
+        {"file_id": "1", "name": "a.stl", "size_bytes": len(CONTENT), "file_type": "stl"},
+        {"file_id": "2", "name": "../b.stl", "size_bytes": len(CONTENT), "file_type": "stl"},
+    ]
+    printables_api.download_link_cache.put(("42", "1", "stl"), f"{file_server}/expired", 300)
+    minted = []
+
+    def fake_url(file_id, model_id, file_type, debug=False):
+        cached = printables_api.download_link_cache.get((model_id, file_id, file_type))
+        if cached:
+            return cached
+        minted.append(file_id)
+        return f"{file_server}/file"
+
+    with patch("printables_api.get_real_download_url", side_effect=fake_url):
+        results = download_model_files("42", str(tmp_path), manifest)
+        again = download_model_files("42", str(tmp_path), manifest)
+
+    assert [r["status"] for r in results] == ["downloaded", "downloaded"]
+    assert sorted(minted) == ["1", "2"]
+    assert os.path.dirname(results[1]["path"]) == str(tmp_path)
+    assert [r["status"] for r in again] == ["skipped", "skipped"]
+
+
+def test_safe_filename():
+    assert safe_filename("../../etc/passwd", "x") == "passwd"
+    assert safe_filename('a:b?.stl', "x") == "a_b_.stl"
+    assert safe_filename("", "1.stl") == "1.stl"
@@ -0,0 +1,87 @@
+import json
+import pytest
+from unittest.mock import patch
+import printables_api
+from printables_index import ModelIndex, ingest_jsonl
+
+
+def make_model(model_id, name, downloads, rating=4.0, published="2023-01-01", makes=None):
+    return {
+        "id": model_id, "name": name, "slug": name.lower().replace(" ", "-"), "ratingAvg": rating,
+        "likesCount": 1, "downloadCount": downloads, "datePublished": published, "makesCount": makes,
+        "user": {"publicUsername": "maker"}, "image": {"filePath": f"{model_id}.png"},
+    }
+
+
+def test_search_matches_name_description_and_file_names(tmp_path):
+    """
+    Tests prefix matching across fields and that later updates keep earlier fields.
+    """
+    index = ModelIndex(str(tmp_path / "index.db"))
+    index.add_search_result(make_model("1", "Benchy Boat", 100))
+    index.add_search_result(make_model("2", "Cable Clip", 50))
+    index.upsert("2", description="Holds a USB cable under the desk")
+    index.upsert("2", file_names=["clip_v2.stl"])
+
+    assert [r["id"] for r in index.search("bench")] == ["1"]
+    assert [r["id"] for r in index.search("desk")] == ["2"]
+    assert [r["id"] for r in index.search("clip_v2")] == ["2"]
+    result = index.search("usb")[0]
+    assert result["url"] == "https://www.printables.com/model/2-cable-clip"
+    assert "**usb**" in result["snippet"].lower()
+    assert index.search('"unbalanced (quote') == []
+    index.close()
+
+
+def test_search_orderings_use_stored_stats(tmp_path):
+    """
+    Tests the search_models orderings on stored stats, including an empty query.
+    """
+    index = ModelIndex(str(tmp_path / "index.db"))
+    index.add_search_result(make_model("1", "Vase A", 10, rating=5.0, published="2021-01-01", makes=3))
+    index.add_search_result(make_model("2", "Vase B", 30, rating=3.0, published="2024-01-01", makes=1))
+    index.add_search_result(make_model("3", "Vase C", 20, rating=4.0, published="2022-01-01"))
+
+    assert [r["id"] for r in index.search("vase", ordering="popular")] == ["2", "3", "1"]
+    assert [r["id"] for r in index.search("vase", ordering="rating")] == ["1", "3", "2"]
+    assert [r["id"] for r in index.search("", ordering="latest")] == ["2", "3", "1"]
+    assert [r["id"] for r in index.search("", ordering="makes_count")] == ["1", "2", "3"]
+    assert len(index.search("", limit=2)) == 2
+    with pytest.raises(ValueError):
+        index.search("vase", ordering="random")
+
+
+def test_makes_count_reaches_the_index_through_built_records(tmp_path):
+    """
+    Tests that makesCount is requested from the API and kept by the records the CLI and sync mode index.
+    """
+    assert "makesCount" in printables_api._MODEL_FRAGMENTS
+    index = ModelIndex(str(tmp_path / "index.db"))
+    with patch.object(printables_api, "get_model_description", return_value="A vase."), \
+            patch.object(printables_api, "get_model_files", return_value=[]):
+        for model in (make_model("1", "Vase A", 10, makes=2), make_model("2", "Vase B", 30, makes=5)):
+            record = printables_api.build_model_record(model)
+            index.add_record(model["id"], json.loads(printables_api.dumps(record)))
+
+    results = index.search("vase", ordering="makes_count")
+    assert [(r["id"], r["stats"]["makes"]) for r in results] == [("2", 5), ("1", 2)]
+    index.close()
+
+
+def test_ingest_pipeline_jsonl(tmp_path):
+    """
+    Tests indexing the JSONL written by the pipeline mode, skipping a truncated last line and error descriptions.
+    """
+    path = tmp_path / "out.jsonl"
+    records = [
+        {"id": "1", "name": "Planter", "url": "https://www.printables.com/model/1-planter", "author": "a",
+         "stats": {"downloads": 5}, "description": "Self watering pot", "files": [{"name": "pot.stl"}]},
+        {"id": "2", "name": "Hook", "stats": {}, "description": "Error: blocked", "files": []},
+    ]
+    path.write_text("\n".join(json.dumps(r) for r in records) + '\n{"id": "3", "na', encoding="utf-8")
+
+    index = ModelIndex(str(tmp_path / "index.db"))
+    assert ingest_jsonl(index, str(path)) == 2
+    assert index.count() == 2
+    assert [r["id"] for r in index.search("watering pot")] == ["1"]
+    assert index.search("blocked") == []
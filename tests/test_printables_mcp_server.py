@@ -0,0 +1,474 @@
+import asyncio
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import patch, AsyncMock
+
+pytest.importorskip("mcp.server.fastmcp")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def server():
+    """
+    Imports the MCP server module.
+    """
+    return importlib.import_module("printables_mcp_server")
+
+
+def test_server_startup_defers_scraping_dependencies():
+    """
+    Tests that starting the server does not import cloudscraper or bs4 until a description is fetched.
+    """
+    code = "import sys, printables_mcp_server; print(sorted({'cloudscraper', 'bs4'} & set(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.strip() == "[]"
+
+
+def test_search_printables_formats_results(server):
+    """
+    Tests that the async search tool formats the API results.
+    """
+    items = [{
+        "id": "3161", "name": "Benchy", "slug": "3d-benchy", "ratingAvg": 4.9,
+        "likesCount": 10, "downloadCount": 20, "datePublished": "2019-01-01",
+        "user": {"publicUsername": "creative"}, "image": {"filePath": "media/benchy.png"},
+    }]
+    with patch.object(server.printables_api, "search_models_async", AsyncMock(return_value=items)):
+        results = asyncio.run(server.search_printables("benchy", limit=500))
+
+    assert results[0]["url"] == "https://www.printables.com/model/3161-3d-benchy"
+    assert results[0]["image_url"] == "https://media.printables.com/media/benchy.png"
+    assert results[0]["stats"]["downloads"] == 20
+
+
+def test_description_tools_run_concurrently(server):
+    """
+    Tests that a slow blocking scrape does not serialize other tool calls.
+    """
+    def slow_description(model_url, debug=False, parser=None):
+        time.sleep(0.3)
+        return f"description of {model_url}"
+
+    async def call_both():
+        return await asyncio.gather(
+            server.get_printables_description("https://www.printables.com/model/1-a"),
+            server.get_printables_description("https://www.printables.com/model/2-b"),
+        )
+
+    with patch.object(server.printables_api, "get_model_description", side_effect=slow_description):
+        start = time.monotonic()
+        results = asyncio.run(call_both())
+        elapsed = time.monotonic() - start
+
+    assert results == ["description of https://www.printables.com/model/1-a",
+                       "description of https://www.printables.com/model/2-b"]
+    assert elapsed < 0.55
+
+
+def test_search_printables_paged_continuation(server):
+    """
+    Tests that the paged search hands out a token that resumes at the next offset without duplicates.
+    """
+    pages = {
+        0: [{"id": "1", "slug": "a"}, {"id": "2", "slug": "b"}],
+        2: [{"id": "2", "slug": "b"}, {"id": "3", "slug": "c"}],
+        4: [{"id": "4", "slug": "d"}],
+    }
+
+    async def fake_search(search_term, limit=5, ordering="best_match", debug=False, offset=0):
+        return pages.get(offset, [])
+
+    async def walk():
+        ids = []
+        page = await server.search_printables_paged("vase", ordering="popular", page_size=2)
+        ids += [item["id"] for item in page["items"]]
+        while page["continuation_token"]:
+            page = await server.search_printables_paged(continuation_token=page["continuation_token"], page_size=2)
+            ids += [item["id"] for item in page["items"]]
+        return ids
+
+    with patch.object(server.printables_api, "search_models_async", side_effect=fake_search) as search:
+        assert asyncio.run(walk()) == ["1", "2", "3", "4"]
+    assert all(call.args[:3] == ("vase", 2, "popular") for call in search.call_args_list)
+
+
+def test_search_printables_paged_rejects_bad_token(server):
+    """
+    Tests that a malformed continuation token is reported as an error.
+    """
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.search_printables_paged(continuation_token="not-a-token"))
+
+
+def test_identical_concurrent_calls_are_coalesced(server):
+    """
+    Tests that concurrent identical tool calls share one upstream call and its result.
+    """
+    calls = []
+
+    async def slow_files(model_id_str, **kwargs):
+        calls.append(model_id_str)
+        await asyncio.sleep(0.05)
+        return [{"name": "part.stl", "download_url": "https://example.com/part.stl"}]
+
+    async def call_many():
+        return await asyncio.gather(
+            server.get_printables_files(3161),
+            server.get_printables_files(" 3161 "),
+            server.get_printables_files("3161"),
+            server.get_printables_files("42"),
+        )
+
+    before = server.singleflight.stats()["coalesced"]
+    with patch.object(server.printables_api, "get_model_files_async", side_effect=slow_files):
+        results = asyncio.run(call_many())
+
+    assert sorted(calls) == ["3161", "42"]
+    assert results[0] == results[1] == results[2]
+    assert server.singleflight.stats()["coalesced"] - before == 2
+    assert server.singleflight.stats()["in_flight"] == 0
+
+
+def test_coalesced_calls_never_shorten_a_callers_deadline(server):
+    """
+    Tests that a caller with a longer budget does not join a call running under a shorter deadline.
+    """
+    flight = server.SingleFlight()
+    budgets = []
+
+    async def fetch():
+        seconds = server.printables_api.current_deadline().seconds
+        budgets.append(seconds)
+        await asyncio.sleep(0.05)
+        return seconds
+
+    async def call(seconds):
+        with server.printables_api.deadline(seconds):
+            return await flight.do("key", fetch)
+
+    async def call_many():
+        return await asyncio.gather(call(5), call(5.5), call(20), call(20))
+
+    assert asyncio.run(call_many()) == [5, 5, 20, 20]
+    assert budgets == [5, 20]
+    assert flight.stats() == {"calls": 4, "coalesced": 2, "in_flight": 0}
+
+
+def test_upstream_slots_cap_concurrent_calls(server):
+    """
+    Tests that distinct upstream calls beyond the cap wait for a free slot, across event loops.
+    """
+    slots = server.UpstreamSlots(2)
+    flight = server.SingleFlight(slots)
+    running = []
+
+    async def fetch(model_id):
+        running.append(model_id)
+        assert slots.active <= 2
+        await asyncio.sleep(0.02)
+        return model_id
+
+    async def call_many():
+        return await asyncio.gather(*(flight.do(("files", i), fetch, i) for i in range(5)))
+
+    assert asyncio.run(call_many()) == [0, 1, 2, 3, 4]
+    assert asyncio.run(call_many()) == [0, 1, 2, 3, 4]
+    assert slots.stats() == {"limit": 2, "active": 0, "waiting": 0, "peak": 2}
+
+
+def test_main_configures_http_transport(server):
+    """
+    Tests that the HTTP transport options reach FastMCP's settings and that shared clients are closed on exit.
+    """
+    settings = server.mcp.settings.model_copy()
+    try:
+        with patch.object(server.mcp, "run") as run, \
+                patch.object(server.printables_api, "close_client") as close_client:
+            server.main(["--transport", "streamable-http", "--host", "0.0.0.0", "--port", "9123", "--stateless"])
+        run.assert_called_once_with(transport="streamable-http")
+        # Shared clients are released once, when serving ends, not per session
+        close_client.assert_called_once_with()
+        assert (server.mcp.settings.host, server.mcp.settings.port) == ("0.0.0.0", 9123)
+        assert server.mcp.settings.stateless_http
+        assert server.mcp.settings.transport_security is None
+    finally:
+        server.mcp.settings = settings
+
+
+def test_coalesced_calls_share_exceptions(server):
+    """
+    Tests that every waiter of a coalesced call sees the upstream exception.
+    """
+    async def failing(model_url, *args):
+        await asyncio.sleep(0.02)
+        raise ValueError("upstream down")
+
+    async def call_both():
+        return await asyncio.gather(
+            server.get_printables_description("https://www.printables.com/model/1-a/"),
+            server.get_printables_description("https://WWW.printables.com/model/1-a#comments"),
+            return_exceptions=True,
+        )
+
+    with patch.object(server.printables_api, "get_model_description_async", side_effect=failing) as description:
+        results = asyncio.run(call_both())
+
+    assert description.call_count == 1
+    assert all(isinstance(result, RuntimeError) and "upstream down" in str(result) for result in results)
+
+
+def test_bulk_tool_returns_partial_results(server):
+    """
+    Tests that the bulk tool fetches every requested part and reports failures per model.
+    """
+    summaries = {
+        "1": {"id": "1", "name": "One", "slug": "one", "downloadCount": 5, "user": {"publicUsername": "a"}, "image": {}},
+        "2": None,
+    }
+
+    async def summary(model_id, *args):
+        return summaries[model_id]
+
+    async def description(model_url, *args):
+        return f"about {model_url}"
+
+    with patch.object(server.printables_api, "get_model_summary_async", side_effect=summary), \
+         patch.object(server.printables_api, "get_model_files_async", AsyncMock(return_value=[{"name": "a.stl"}])), \
+         patch.object(server.printables_api, "get_model_description_async", side_effect=description):
+        results = asyncio.run(server.get_printables_models_bulk(["1", 2, "x"]))
+
+    assert [r["id"] for r in results] == ["1", "2", "x"]
+    assert results[0]["stats"]["downloads"] == 5
+    assert results[0]["files"] == [{"name": "a.stl"}]
+    assert results[0]["description"] == "about https://www.printables.com/model/1-one"
+    assert "errors" not in results[0]
+    assert "model" in results[1]["errors"] and results[1]["files"] == [{"name": "a.stl"}]
+    assert "Invalid model_id" in results[2]["errors"]["model"]
+
+
+def test_file_list_failures_are_reported_not_empty(server):
+    """
+    Tests that a failed file list shows up as an error rather than as a model without files.
+    """
+    summary = {"id": "1", "name": "One", "slug": "one", "user": {}, "image": {}}
+    with patch.object(server.printables_api, "get_model_summary_async", AsyncMock(return_value=summary)), \
+         patch.object(server.printables_api, "_load_manifest_async",
+                      AsyncMock(side_effect=requests.exceptions.ConnectionError("connection reset"))):
+        results = asyncio.run(server.get_printables_models_bulk(["1"], include=["files"]))
+        with pytest.raises(RuntimeError, match="connection reset"):
+            asyncio.run(server.get_printables_files("1"))
+        with pytest.raises(RuntimeError, match="connection reset"):
+            asyncio.run(server.get_printables_files("1", manifest_only=True))
+        with pytest.raises(RuntimeError, match="connection reset"):
+            asyncio.run(server.download_printables_files("1"))
+
+    assert "files" not in results[0]
+    assert "connection reset" in results[0]["errors"]["files"]
+
+
+def test_bulk_tool_respects_include_and_concurrency(server):
+    """
+    Tests that only the requested parts are fetched, with at most BULK_CONCURRENCY models at a time.
+    """
+    running = 0
+    peak = 0
+
+    async def summary(model_id, *args):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return {"id": model_id, "name": model_id, "slug": "m", "user": {}, "image": {}}
+
+    files = AsyncMock(return_value=[])
+    with patch.object(server, "BULK_CONCURRENCY", 2), \
+         patch.object(server.printables_api, "get_model_summary_async", side_effect=summary), \
+         patch.object(server.printables_api, "get_model_files_async", files):
+        results = asyncio.run(server.get_printables_models_bulk([str(i) for i in range(6)], include=["stats"]))
+
+    assert peak == 2
+    assert files.call_count == 0
+    assert all("stats" in r and "description" not in r for r in results)
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.get_printables_models_bulk(["1"], include=["comments"]))
+
+
+def test_manifest_only_and_single_link_resolution(server):
+    """
+    Tests that manifest_only skips link minting and resolve_printables_file_link mints one link.
+    """
+    manifest = [{"file_id": "7", "name": "a.stl", "size_bytes": 1, "file_type": "stl"}]
+    files = AsyncMock(return_value=[])
+    with patch.object(server.printables_api, "get_model_manifest_async", AsyncMock(return_value=manifest)), \
+         patch.object(server.printables_api, "get_model_files_async", files), \
+         patch.object(server.printables_api, "get_real_download_url_async",
+                      AsyncMock(return_value="https://files.printables.com/a.stl")) as resolve:
+        listed = asyncio.run(server.get_printables_files("42", manifest_only=True))
+        link = asyncio.run(server.resolve_printables_file_link(42, "7", "stl"))
+
+    assert listed == manifest
+    files.assert_not_called()
+    resolve.assert_called_once_with("7", "42", "stl")
+    assert link == {"model_id": "42", "file_id": "7", "file_type": "stl",
+                    "download_url": "https://files.printables.com/a.stl"}
+    with pytest.raises(RuntimeError):
+        asyncio.run(server.resolve_printables_file_link(42, "7", "zip"))
+
+
+def test_local_search_uses_index_filled_by_tools(server, tmp_path):
+    """
+    Tests that search results and descriptions land in the local index and are searchable offline.
+    """
+    items = [{"id": "3161", "name": "Benchy", "slug": "3d-benchy", "downloadCount": 20, "user": {}, "image": {}}]
+    index = server.printables_index.ModelIndex(str(tmp_path / "index.db"))
+    with patch.object(server, "model_index", index), \
+         patch.object(server.printables_api, "search_models_async", AsyncMock(return_value=items)), \
+         patch.object(server.printables_api, "get_model_description_async", AsyncMock(return_value="A torture test boat")):
+        asyncio.run(server.search_printables("benchy"))
+        asyncio.run(server.get_printables_description("https://www.printables.com/model/3161-3d-benchy"))
+        results = asyncio.run(server.search_printables_local("torture"))
+
+    assert [r["id"] for r in results] == ["3161"]
+    assert results[0]["url"] == "https://www.printables.com/model/3161-3d-benchy"
+    with patch.object(server, "model_index", None), pytest.raises(RuntimeError):
+        asyncio.run(server.search_printables_local("boat"))
+
+
+def test_stats_tool_reports_stages_and_state(server):
+    """
+    Tests that the stats tool and resource expose recorded stages next to cache and upstream state.
+    """
+    server.printables_metrics.registry.observe("search_models", "ttfb", 0.02)
+    stats = asyncio.run(server.printables_stats())
+
+    assert stats["stages"]["search_models"]["ok"]["ttfb"]["count"] == 1
+    assert stats["singleflight"] == server.singleflight.stats()
+    assert stats["persistent_cache"] is None
+    assert "hits" in stats["download_link_cache"]
+    assert json.loads(server.printables_stats_resource())["stages"] == stats["stages"]
+
+
+def test_prefetched_hits_serve_follow_up_calls_from_cache(server):
+    """
+    Tests that manifests and descriptions of top hits are prefetched, and that stale prefetches are dropped.
+    """
+    items = [{"id": str(i), "name": f"Model {i}", "slug": f"model-{i}", "user": {}, "image": {}} for i in (1, 2, 3)]
+    manifest = {"data": {"model": {"stls": [{"id": "9", "name": "part.stl", "fileSize": 5}], "gcodes": []}}}
+    prefetcher = server.Prefetcher(2, rate=1000)
+    prefetcher.schedule([server.format_model(items[0])])
+    assert prefetcher.stats()["scheduled"] == 0  # Nowhere to keep the results without a persistent cache
+    server.printables_api.configure_persistent_cache(":memory:")
+
+    async def search_then_follow_up():
+        await server.search_printables("model")
+        await prefetcher.idle()
+        files = await server.get_printables_files(1, manifest_only=True)
+        description = await server.get_printables_description("https://www.printables.com/model/2-model-2")
+        return files, description
+
+    with patch.object(server, "prefetcher", prefetcher), \
+         patch.object(server.printables_api, "search_models_async", AsyncMock(return_value=items)), \
+         patch.object(server.printables_api.AsyncPrintablesClient, "post_graphql", AsyncMock(return_value=manifest)) as post, \
+         patch.object(server.printables_api, "_fetch_model_description", return_value="Prefetched text") as fetch:
+        files, description = asyncio.run(search_then_follow_up())
+
+    assert files == [{"file_id": "9", "name": "part.stl", "size_bytes": 5, "file_type": "stl"}]
+    assert description == "Prefetched text"
+    assert post.call_count == 2  # Manifests of models 1 and 2 only, none for the follow-up call
+    assert fetch.call_count == 2
+    assert prefetcher.stats()["fetched"] == 4
+
+    lagging = server.Prefetcher(2, rate=1000, max_lag=-1)
+    with patch.object(server.printables_api, "get_model_manifest_async", AsyncMock()) as fetch_manifest:
+        async def schedule():
+            lagging.schedule([server.format_model(items[2])])
+            await lagging.idle()
+        asyncio.run(schedule())
+    fetch_manifest.assert_not_called()
+    assert lagging.stats()["dropped"] == 2
+
+
+def test_tool_deadline_returns_links_minted_in_time(server):
+    """
+    Tests that a tool call past its deadline returns the files whose links were minted before it ran out.
+    """
+    def respond(payload, timeout=None):
+        if payload["operationName"] == "ModelFiles":
+            return {"data": {"model": {"stls": [{"id": f"stl{i}", "name": f"part{i}.stl", "fileSize": i} for i in range(4)]}}}
+        # The first link batch uses up the whole budget
+        server.printables_api.current_deadline().expires_at = time.monotonic()
+        return {"data": {
+            alias: {"ok": True, "output": {"link": f"https://example.com/{payload['variables']['id' + alias[1:]]}"}}
+            for alias in ("f0", "f1")
+        }}
+
+    with patch.object(server.printables_api.AsyncPrintablesClient, "post_graphql", new_callable=AsyncMock,
+                      side_effect=respond) as post, \
+            patch.object(server, "LINK_BATCH_SIZE", 2), patch.object(server, "LINK_WORKERS", 1):
+        files = asyncio.run(server.get_printables_files(1, deadline_seconds=5))
+
+    assert [f["download_url"] for f in files] == ["https://example.com/stl0", "https://example.com/stl1", None, None]
+    assert post.call_count == 2
+
+
+def test_coalesced_caller_stops_waiting_at_its_deadline(server):
+    """
+    Tests that a call joining a slower in-flight call gives up at its own deadline without cancelling it.
+    """
+    async def slow_description(model_url, *args):
+        await asyncio.sleep(0.3)
+        return "Description"
+
+    async def call_both():
+        leader = asyncio.ensure_future(server.get_printables_description("https://www.printables.com/model/2-b",
+                                                                         deadline_seconds=0))
+        await asyncio.sleep(0)
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="Deadline"):
+            await server.get_printables_description("https://www.printables.com/model/2-b", deadline_seconds=0.05)
+        waited = time.monotonic() - start
+        return waited, await leader
+
+    with patch.object(server.printables_api, "get_model_description_async", side_effect=slow_description), \
+            patch.object(server, "DEADLINE_GRACE", 0):
+        waited, description = asyncio.run(call_both())
+
+    assert waited < 0.25
+    assert description == "Description"
+
+
+def test_downloads_stay_inside_the_download_dir(server, tmp_path):
+    """
+    Tests that target_dir cannot leave PRINTABLES_DOWNLOAD_DIR and that downloads run on their own threads.
+    """
+    root = tmp_path / "downloads"
+    threads = []
+
+    def download(model_id_str, target_dir, files, file_types, **kwargs):
+        threads.append(threading.current_thread().name)
+        return [{"file_id": "1", "path": target_dir, "status": "downloaded"}]
+
+    with patch.object(server, "DOWNLOAD_DIR", str(root)), \
+         patch.object(server.printables_api, "get_model_manifest_async", AsyncMock(return_value=[])), \
+         patch.object(server.printables_download, "download_model_files", side_effect=download):
+        assert server.resolve_download_dir(None, "42") == os.path.join(os.path.realpath(root), "42")
+        assert server.resolve_download_dir("boats/v2", "42") == os.path.join(os.path.realpath(root), "boats", "v2")
+        for outside in ("../elsewhere", str(tmp_path / "elsewhere"), "~"):
+            with pytest.raises(ValueError):
+                server.resolve_download_dir(outside, "42")
+        with pytest.raises(RuntimeError, match="download directory"):
+            asyncio.run(server.download_printables_files(42, target_dir=str(tmp_path)))
+        results = asyncio.run(server.download_printables_files(42, target_dir="boats"))
+
+    assert results[0]["path"] == os.path.join(os.path.realpath(root), "boats")
+    assert threads == [threads[0]] and threads[0].startswith("printables-download")
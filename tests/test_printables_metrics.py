@@ -0,0 +1,75 @@
+import asyncio
+import urllib.request
+import pytest
+import printables_metrics
+from printables_metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_percentiles_interpolate_within_buckets():
+    """
+    Tests that percentiles land in the right bucket and never exceed the largest observation.
+    """
+    histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+    for _ in range(90):
+        histogram.observe(0.005)
+    for _ in range(10):
+        histogram.observe(0.5)
+
+    assert histogram.percentile(50) <= 0.01
+    assert 0.1 < histogram.percentile(95) <= 0.5
+    assert histogram.percentile(100) == 0.5
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["max_ms"] == 500.0
+
+
+def test_tracked_records_stages_and_outcomes():
+    """
+    Tests that stages of a tracked call are recorded under its outcome, including errors and async calls.
+    """
+    @printables_metrics.tracked()
+    def lookup(hit):
+        with printables_metrics.stage("parse"):
+            pass
+        if hit:
+            printables_metrics.set_outcome("cache_hit")
+        return hit
+
+    @printables_metrics.tracked("failing")
+    async def failing():
+        printables_metrics.add_stage("ttfb", 0.2)
+        raise ValueError("boom")
+
+    lookup(True)
+    lookup(False)
+    with pytest.raises(ValueError):
+        asyncio.run(failing())
+
+    snapshot = printables_metrics.registry.snapshot()
+    assert set(snapshot["lookup"]) == {"ok", "cache_hit"}
+    assert set(snapshot["lookup"]["ok"]) == {"parse", "total"}
+    assert snapshot["failing"]["error"]["ttfb"]["max_ms"] == 200.0
+
+
+def test_prometheus_text_and_endpoint():
+    """
+    Tests the cumulative buckets of the exposition format and the /metrics endpoint.
+    """
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    registry.observe("search_models", "ttfb", 0.05)
+    registry.observe("search_models", "ttfb", 0.5)
+    text = registry.prometheus_text()
+    labels = 'function="search_models",stage="ttfb",outcome="ok"'
+    assert f'printables_stage_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'printables_stage_seconds_bucket{{{labels},le="+Inf"}} 2' in text
+    assert f"printables_stage_seconds_count{{{labels}}} 2" in text
+
+    printables_metrics.registry.observe("search_models", "total", 0.01)
+    httpd = printables_metrics.start_prometheus_server(0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+    assert 'stage="total"' in body
@@ -0,0 +1,49 @@
+import json
+import sys
+import pytest
+from unittest.mock import patch
+import printables_records
+from printables_records import ModelDetails, ModelSummary, dumps, summary_dict
+
+SEARCH_RESULT = {
+    "id": "123", "name": "Vase é", "slug": "vase", "ratingAvg": 4.5, "likesCount": 10, "downloadCount": 20,
+    "datePublished": "2024-01-01T00:00:00Z", "makesCount": 3, "user": {"publicUsername": "maker"},
+    "image": {"filePath": "media/prints/123.png"},
+}
+FILES = [{"file_id": "1", "name": "vase.stl", "download_url": "https://files/1", "size_bytes": 100, "file_type": "stl"}]
+
+
+def test_records_keep_the_existing_json_layout():
+    """
+    Tests that records serialize to the same objects the tools and the CLI returned as dicts.
+    """
+    summary = ModelSummary.from_api(SEARCH_RESULT)
+    assert json.loads(dumps(summary)) == summary.to_dict() == {
+        "id": "123", "name": "Vase é", "slug": "vase", "url": "https://www.printables.com/model/123-vase",
+        "stats": {"rating": 4.5, "likes": 10, "downloads": 20, "published": "2024-01-01T00:00:00Z"},
+        "author": "maker", "image_url": "https://media.printables.com/media/prints/123.png",
+    }
+    assert summary_dict(SEARCH_RESULT) == summary.to_dict()
+    assert summary_dict({"id": "7"}) == ModelSummary.from_api({"id": "7"}).to_dict()
+    details = ModelDetails.from_api(SEARCH_RESULT, "A vase.", FILES)
+    assert json.loads(dumps(details)) == details.to_dict() == {
+        "id": "123", "name": "Vase é", "url": "https://www.printables.com/model/123-vase",
+        "main_image_url": "https://media.printables.com/media/prints/123.png", "author": "maker",
+        "stats": {"likes": 10, "downloads": 20, "rating": 4.5, "published_date": "2024-01-01T00:00:00Z", "makes": 3},
+        "description": "A vase.", "files": FILES,
+    }
+    if sys.version_info >= (3, 10):
+        assert not hasattr(details, "__dict__")
+
+
+@pytest.mark.parametrize("indent", [False, True])
+def test_dumps_matches_without_orjson(indent):
+    """
+    Tests that the standard library fallback produces the same JSON as orjson, non-ASCII kept as-is.
+    """
+    data = {"123": ModelDetails.from_api(SEARCH_RESULT, None, FILES)}
+    with patch.object(printables_records, "orjson", None):
+        fallback = dumps(data, indent=indent)
+    assert "é" in fallback
+    assert ("\n" in fallback) == indent
+    assert json.loads(fallback) == json.loads(dumps(data, indent=indent))
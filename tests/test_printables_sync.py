@@ -0,0 +1,150 @@
+import json
+from unittest.mock import patch
+import pytest
+import requests
+import printables_sync
+from printables_records import ModelDetails
+from printables_sync import SyncState, sync_query
+
+
+def make_model(model_id, published, likes=0):
+    return {"id": str(model_id), "name": f"Model {model_id}", "slug": f"model-{model_id}",
+            "datePublished": published, "likesCount": likes, "downloadCount": 0}
+
+
+def run_sync(tmp_path, models, failing=(), **kwargs):
+    pulled = []
+
+    def iter_latest(search_term, ordering, page_size=20, debug=False, raise_errors=False):
+        assert ordering == "latest" and raise_errors
+        for model in models:
+            pulled.append(model["id"])
+            yield model
+
+    def build(model, debug=False):
+        if model["id"] in failing:
+            raise RuntimeError("upstream failed")
+        return ModelDetails.from_api(model, None, [])
+
+    with patch.object(printables_sync.printables_api, "iter_search_models", side_effect=iter_latest), \
+         patch.object(printables_sync.printables_api, "build_model_record", side_effect=build):
+        summary = sync_query("vase", str(tmp_path / "out.jsonl"), str(tmp_path / "state.json"), workers=2,
+                             rate=1000, **kwargs)
+    return summary, pulled
+
+
+def read_ids(tmp_path):
+    return [json.loads(line)["id"] for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+
+
+def test_sync_fetches_only_new_and_changed_models(tmp_path):
+    """
+    Tests that a second run stops paging near the mark and refetches only new or changed models.
+    """
+    first = [make_model(3, "2024-03-01"), make_model(2, "2024-02-01"), make_model(1, "2024-01-01")]
+    summary, _ = run_sync(tmp_path, first)
+    assert (summary["new"], summary["written"]) == (3, 3)
+    assert summary["high_water"] == ["2024-03-01", 3]
+
+    second = [make_model(5, "2024-05-01"), make_model(4, "2024-05-01"),
+              make_model(3, "2024-03-01", likes=7), make_model(2, "2024-02-01"), make_model(1, "2024-01-01")]
+    summary, pulled = run_sync(tmp_path, second, recheck=2)
+    assert (summary["new"], summary["changed"], summary["unchanged"], summary["written"]) == (2, 1, 1, 3)
+    assert pulled == ["5", "4", "3", "2", "1"]  # Stopped after the third model past the mark
+    assert sorted(read_ids(tmp_path)) == ["1", "2", "3", "3", "4", "5"]
+    assert summary["high_water"] == ["2024-05-01", 5]
+
+
+def test_sync_keeps_mark_below_failed_models(tmp_path):
+    """
+    Tests that a model that failed is retried on the next run instead of being skipped by the mark.
+    """
+    models = [make_model(3, "2024-03-01"), make_model(2, "2024-02-01"), make_model(1, "2024-01-01")]
+    summary, _ = run_sync(tmp_path, models, failing={"2"})
+    assert (summary["written"], summary["failed"]) == (2, 1)
+    assert summary["high_water"] == ["2024-01-01", 1]
+
+    summary, _ = run_sync(tmp_path, models)
+    assert (summary["new"], summary["unchanged"], summary["written"]) == (1, 2, 1)
+    assert "2" in SyncState(str(tmp_path / "state.json")).models
+
+
+def test_sync_limited_runs_do_not_skip_models_below_where_they_stopped(tmp_path):
+    """
+    Tests that a run stopped by max_items leaves the mark in place so the next run fetches the rest.
+    """
+    models = [make_model(i, f"2024-01-01T00:{i:02d}") for i in range(60, 0, -1)]
+    run_sync(tmp_path, models[40:])
+    summary, _ = run_sync(tmp_path, models, max_items=10)
+    assert (summary["written"], summary["complete"]) == (10, False)
+    assert summary["high_water"] == ["2024-01-01T00:20", 20]
+
+    summary, _ = run_sync(tmp_path, models)
+    assert (summary["new"], summary["written"], summary["complete"]) == (30, 30, True)
+    assert sorted(read_ids(tmp_path), key=int) == [str(i) for i in range(1, 61)]
+    assert summary["high_water"] == ["2024-01-01T00:60", 60]
+    assert SyncState(str(tmp_path / "state.json")).resume("vase") is None
+
+
+def test_sync_search_failure_raises_and_keeps_state(tmp_path):
+    """
+    Tests that a failing search aborts the sync instead of being taken for the end of the results.
+    """
+    models = [make_model(2, "2024-02-01"), make_model(1, "2024-01-01")]
+    run_sync(tmp_path, models[1:])
+    state_before = (tmp_path / "state.json").read_text(encoding="utf-8")
+
+    def failing_search(search_term, ordering, page_size=20, debug=False, raise_errors=False):
+        yield models[0]
+        raise requests.exceptions.ConnectionError("connection reset")
+
+    with patch.object(printables_sync.printables_api, "iter_search_models", side_effect=failing_search), \
+         pytest.raises(requests.exceptions.ConnectionError):
+        sync_query("vase", str(tmp_path / "out.jsonl"), str(tmp_path / "state.json"))
+    assert (tmp_path / "state.json").read_text(encoding="utf-8") == state_before
+    assert read_ids(tmp_path) == ["1"]
+
+
+def test_cli_sync_mode_uses_the_configured_module(tmp_path, monkeypatch):
+    """
+    Tests that --cache and --parser apply to the printables_api module the sync runs against.
+    """
+    monkeypatch.setattr(printables_sync.printables_api, "DEFAULT_DESCRIPTION_PARSER", "stream")
+    seen = {}
+
+    def fake_sync(search_term, output_path, state_path, **kwargs):
+        seen["parser"] = printables_sync.printables_api.DEFAULT_DESCRIPTION_PARSER
+        seen["cache"] = printables_sync.printables_api._persistent_cache
+        return {"written": 0, "unchanged": 0, "failed": 0, "complete": True}
+
+    with patch.object(printables_sync, "sync_query", side_effect=fake_sync):
+        printables_sync.printables_api.main(["vase", "--jsonl", str(tmp_path / "out.jsonl"), "--sync",
+                                             str(tmp_path / "state.json"), "--cache", str(tmp_path / "cache.db"),
+                                             "--parser", "strainer"])
+    assert seen["parser"] == "strainer"
+    assert seen["cache"] is not None
+
+
+def test_sync_does_not_record_models_whose_fetch_failed(tmp_path):
+    """
+    Tests that an error description or a failed file list counts as a failure, so the next run retries the model.
+    """
+    models = [make_model(2, "2024-02-01"), make_model(1, "2024-01-01")]
+
+    def description(model_url, debug=False):
+        return "Error: Could not fetch model page" if "/2-" in model_url else "A vase."
+
+    def files(model_id_str, debug=False, raise_errors=False):
+        raise requests.exceptions.ConnectionError("connection reset")
+
+    def iter_latest(search_term, ordering, page_size=20, debug=False, raise_errors=False):
+        yield from models
+
+    with patch.object(printables_sync.printables_api, "iter_search_models", side_effect=iter_latest), \
+         patch.object(printables_sync.printables_api, "get_model_description", side_effect=description), \
+         patch.object(printables_sync.printables_api, "get_model_files", side_effect=files):
+        summary = sync_query("vase", str(tmp_path / "out.jsonl"), str(tmp_path / "state.json"), rate=1000)
+
+    assert (summary["written"], summary["failed"], summary["high_water"]) == (0, 2, None)
+    assert SyncState(str(tmp_path / "state.json")).models == {}
+    assert (tmp_path / "out.jsonl").read_text(encoding="utf-8") == ""